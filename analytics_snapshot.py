@@ -0,0 +1,334 @@
+"""
+Columnar analytics snapshot for the M&A Market Intelligence Tool
+Mirrors the deals and companies tables into partitioned Parquet files so the
+dashboard aggregations read only the columns they need instead of scanning
+SQLite rows
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+SNAPSHOT_TABLES = ['deals', 'companies']
+
+# Rows per partition, by id range; a refresh rewrites only the partitions
+# holding new, changed or deleted rows
+SNAPSHOT_PARTITION_ROWS = 250000
+
+MANIFEST_FILE = '_manifest.json'
+
+# Arrow types used in snapshots, by the names stored in the manifest
+ARROW_TYPES = {str(arrow_type): arrow_type for arrow_type in
+               (pa.int64(), pa.float64(), pa.timestamp('us'), pa.string())}
+
+# One refresh at a time per table directory among this process's sessions
+_refresh_locks: Dict[str, threading.RLock] = {}
+_refresh_locks_lock = threading.Lock()
+
+
+def _refresh_lock(table_dir: str) -> threading.RLock:
+    """Return the process-wide lock serializing refreshes of a table directory"""
+    with _refresh_locks_lock:
+        return _refresh_locks.setdefault(os.path.abspath(table_dir), threading.RLock())
+
+
+def _temp_path(path: str) -> str:
+    """
+    A new, uniquely named file beside path to write before swapping it in,
+    so concurrent writers (other processes included) never share one
+    """
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + '.',
+                                         suffix='.tmp')
+    os.close(handle)
+    return temp_path
+
+
+def _arrow_type(declared_type: str) -> pa.DataType:
+    """Arrow type for a SQLite declared column type"""
+    declared_type = declared_type.upper()
+    if 'INT' in declared_type or 'BOOL' in declared_type:
+        return pa.int64()
+    if 'REAL' in declared_type or 'FLOA' in declared_type or 'DOUB' in declared_type:
+        return pa.float64()
+    if 'DATE' in declared_type or 'TIME' in declared_type:
+        return pa.timestamp('us')
+    return pa.string()
+
+
+def create_change_tracking(cursor: sqlite3.Cursor):
+    """
+    Create the dirty-partition table and the triggers that fill it.
+    Every insert, update or delete on a snapshotted table marks its id-range
+    partition, so refreshes know exactly which files to rewrite. Triggers are
+    recreated on each call to follow SNAPSHOT_PARTITION_ROWS.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS snapshot_dirty_partitions (
+            table_name TEXT,
+            partition INTEGER,
+            PRIMARY KEY (table_name, partition)
+        ) WITHOUT ROWID
+    ''')
+    
+    for table in SNAPSHOT_TABLES:
+        for event, row in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+            trigger = f"{table}_snapshot_{event.lower()}"
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            # A WHEN guard rather than INSERT OR IGNORE: an outer upsert's
+            # conflict handling would override the trigger's OR IGNORE
+            cursor.execute(f'''
+                CREATE TRIGGER {trigger} AFTER {event} ON {table}
+                WHEN NOT EXISTS (
+                    SELECT 1 FROM snapshot_dirty_partitions
+                    WHERE table_name = '{table}' AND partition = {row}.id / {SNAPSHOT_PARTITION_ROWS}
+                )
+                BEGIN
+                    INSERT INTO snapshot_dirty_partitions (table_name, partition)
+                    VALUES ('{table}', {row}.id / {SNAPSHOT_PARTITION_ROWS});
+                END
+            ''')
+
+
+class AnalyticsSnapshot:
+    """
+    Parquet mirror of the deals and companies tables.
+    Each table is stored as one Parquet file per id range plus a manifest;
+    the partitions to rewrite come from the snapshot_dirty_partitions table.
+    Reads re-export any partition marked dirty first, so writes outside
+    imports (manual entries, tags, deletes) show up on the next read.
+    """
+    
+    def __init__(self, db_path: str = "market_intelligence.db", snapshot_dir: Optional[str] = None):
+        self.db_path = db_path
+        self.snapshot_dir = snapshot_dir or os.path.splitext(db_path)[0] + '_snapshot'
+    
+    def table_dir(self, table: str) -> str:
+        """Directory holding the partitions of a table"""
+        return os.path.join(self.snapshot_dir, table)
+    
+    def is_available(self, table: str) -> bool:
+        """True once a table has been exported at least once"""
+        return self._load_manifest(table) is not None
+    
+    def refresh(self, tables: Optional[List[str]] = None, full: bool = False) -> Dict[str, int]:
+        """
+        Bring the snapshot up to date and return the partitions rewritten per table.
+        Incremental refreshes only export partitions touched since the last
+        refresh; full=True rebuilds every partition.
+        """
+        rewritten = {}
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for table in tables or SNAPSHOT_TABLES:
+                rewritten[table] = self._refresh_table(conn, table, full)
+        finally:
+            conn.close()
+        return rewritten
+    
+    def invalidate(self, table: str):
+        """Drop a table's manifest so readers fall back to SQLite until the next rebuild"""
+        manifest_path = os.path.join(self.table_dir(table), MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            os.remove(manifest_path)
+    
+    def read(self, table: str, columns: Optional[List[str]] = None, filters=None) -> Optional[pd.DataFrame]:
+        """
+        Read selected columns of a snapshotted table (memory-mapped, with
+        pyarrow filters pushed down to the row groups).
+        Returns None when the table has no snapshot yet.
+        """
+        if not self.is_available(table) or not self._catch_up(table):
+            return None
+        
+        partitions = self._partition_files(table)
+        if not partitions:
+            schema = pa.schema([(name, ARROW_TYPES[type_name])
+                                for name, type_name in self._load_manifest(table)['schema']])
+            return schema.empty_table().select(columns or schema.names).to_pandas()
+        
+        return pq.read_table(partitions, columns=columns, filters=filters, memory_map=True).to_pandas()
+    
+    def deal_metrics(self) -> Optional[Dict]:
+        """Headline dashboard metrics computed from the deals snapshot"""
+        deals = self.read('deals', columns=['announcement_date', 'deal_value', 'status'])
+        if deals is None:
+            return None
+        
+        month_start = pd.Timestamp(datetime.now().date().replace(day=1))
+        positive_values = deals['deal_value'][deals['deal_value'] > 0]
+        
+        return {
+            'total_deals': len(deals),
+            'deals_this_month': int((deals['announcement_date'] >= month_start).sum()),
+            'avg_deal_size': float(positive_values.mean()) if len(positive_values) else 0.0,
+            'active_deals': int(deals['status'].isin(['Announced', 'Pending']).sum())
+        }
+    
+    def monthly_deal_volume(self, months: int = 12) -> Optional[pd.DataFrame]:
+        """Deal count and total value per month over the trailing window"""
+        since = pd.Timestamp(datetime.now().date()) - pd.DateOffset(months=months)
+        deals = self.read('deals', columns=['announcement_date', 'deal_value'],
+                          filters=[('announcement_date', '>=', since)])
+        if deals is None:
+            return None
+        
+        # Group on the month period and format only the group labels
+        volume = (
+            deals.groupby(deals['announcement_date'].dt.to_period('M'))['deal_value']
+            .agg(deal_count='size', total_value='sum')
+            .sort_index()
+        )
+        volume.index = volume.index.strftime('%Y-%m')
+        return volume.rename_axis('month').reset_index()
+    
+    def industry_distribution(self, limit: int = 10) -> Optional[pd.DataFrame]:
+        """Most common deal industries"""
+        deals = self.read('deals', columns=['industry'])
+        if deals is None:
+            return None
+        
+        industries = deals['industry'][deals['industry'].notna() & (deals['industry'] != '')]
+        counts = industries.value_counts().head(limit)
+        return pd.DataFrame({'industry': counts.index, 'count': counts.to_numpy()})
+    
+    def _catch_up(self, table: str) -> bool:
+        """
+        Re-export the table's dirty partitions, if any (one primary-key probe
+        when there are none). False if the refresh failed and the snapshot
+        should not be read.
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            # Probing under the lock waits out a refresh another session has
+            # already cleared the markers for, instead of reading mid-export
+            with _refresh_lock(self.table_dir(table)):
+                dirty = conn.execute(
+                    "SELECT 1 FROM snapshot_dirty_partitions WHERE table_name = ? LIMIT 1", (table,)
+                ).fetchone()
+                if dirty is not None:
+                    self._refresh_table(conn, table, full=False)
+            return True
+        except Exception:
+            return False
+        finally:
+            conn.close()
+    
+    def _refresh_table(self, conn: sqlite3.Connection, table: str, full: bool) -> int:
+        """Export the dirty partitions of one table (all of them when rebuilding)"""
+        # Sessions catching up at once would otherwise rebuild under each other
+        with _refresh_lock(self.table_dir(table)):
+            return self._refresh_table_locked(conn, table, full)
+    
+    def _refresh_table_locked(self, conn: sqlite3.Connection, table: str, full: bool) -> int:
+        """_refresh_table, with the table's refresh lock held"""
+        schema = self._arrow_schema(conn, table)
+        schema_spec = [[field.name, str(field.type)] for field in schema]
+        
+        manifest = None if full else self._load_manifest(table)
+        if manifest is not None and (manifest['schema'] != schema_spec
+                                     or manifest['partition_rows'] != SNAPSHOT_PARTITION_ROWS):
+            manifest = None
+        
+        # Markers are cleared before exporting, so a write landing mid-export
+        # marks its partition again for the next refresh
+        if manifest is None:
+            conn.execute("DELETE FROM snapshot_dirty_partitions WHERE table_name = ?", (table,))
+            conn.commit()
+            max_id = conn.execute(f"SELECT MAX(id) FROM {table}").fetchone()[0]
+            partitions = list(range(max_id // SNAPSHOT_PARTITION_ROWS + 1)) if max_id else []
+            shutil.rmtree(self.table_dir(table), ignore_errors=True)
+        else:
+            partitions = [row[0] for row in conn.execute(
+                "SELECT partition FROM snapshot_dirty_partitions WHERE table_name = ? ORDER BY partition",
+                (table,)
+            )]
+            conn.executemany(
+                "DELETE FROM snapshot_dirty_partitions WHERE table_name = ? AND partition = ?",
+                [(table, partition) for partition in partitions]
+            )
+            conn.commit()
+        
+        os.makedirs(self.table_dir(table), exist_ok=True)
+        try:
+            for partition in partitions:
+                self._export_partition(conn, table, partition, schema)
+        except Exception:
+            # The cleared markers are lost, so force a rebuild next time
+            self.invalidate(table)
+            raise
+        
+        self._save_manifest(table, {
+            'partition_rows': SNAPSHOT_PARTITION_ROWS,
+            'schema': schema_spec,
+            'refreshed_at': datetime.now().isoformat()
+        })
+        return len(partitions)
+    
+    def _export_partition(self, conn: sqlite3.Connection, table: str, partition: int, schema: pa.Schema):
+        """Rewrite one id-range partition file from SQLite"""
+        low = partition * SNAPSHOT_PARTITION_ROWS
+        path = os.path.join(self.table_dir(table), f'part-{partition:06d}.parquet')
+        
+        df = pd.read_sql(
+            f"SELECT {', '.join(schema.names)} FROM {table} WHERE id >= ? AND id < ? ORDER BY id",
+            conn, params=(low, low + SNAPSHOT_PARTITION_ROWS)
+        )
+        if df.empty:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        
+        for field in schema:
+            if pa.types.is_timestamp(field.type):
+                df[field.name] = pd.to_datetime(df[field.name], format='ISO8601', errors='coerce')
+        
+        # Write beside the live file and swap it in, so readers never see a partial partition
+        temp_path = _temp_path(path)
+        try:
+            pq.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False), temp_path)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+    
+    def _arrow_schema(self, conn: sqlite3.Connection, table: str) -> pa.Schema:
+        """Arrow schema derived from the SQLite table definition"""
+        return pa.schema([
+            (row[1], _arrow_type(row[2] or ''))
+            for row in conn.execute(f"PRAGMA table_info({table})")
+        ])
+    
+    def _partition_files(self, table: str) -> List[str]:
+        """Partition files of a table in id order"""
+        table_dir = self.table_dir(table)
+        return [
+            os.path.join(table_dir, name)
+            for name in sorted(os.listdir(table_dir))
+            if name.endswith('.parquet')
+        ]
+    
+    def _load_manifest(self, table: str) -> Optional[Dict]:
+        """Manifest of the last refresh, if any"""
+        manifest_path = os.path.join(self.table_dir(table), MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            return None
+        with open(manifest_path) as handle:
+            return json.load(handle)
+    
+    def _save_manifest(self, table: str, manifest: Dict):
+        """Persist the manifest after all partitions are written"""
+        manifest_path = os.path.join(self.table_dir(table), MANIFEST_FILE)
+        temp_path = _temp_path(manifest_path)
+        with open(temp_path, 'w') as handle:
+            json.dump(manifest, handle)
+        os.replace(temp_path, manifest_path)
@@ -0,0 +1,264 @@
+"""
+Command-line bulk loader for the M&A Market Intelligence Tool
+Parses and enriches files in worker processes while a single writer applies
+every chunk to SQLite, for backfills too large for the Streamlit uploader.
+Workers only read the database: the document tokens and date formats they
+learn are sent back with the chunks and written by the same writer
+    
+    python -m enhanced_data_ingestion load --source mergermarket 'exports/*.csv' --workers 8
+"""
+
+import argparse
+import glob
+import multiprocessing
+import os
+import queue
+import sqlite3
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from data_normalization import DateFormatRegistry
+from enhanced_data_ingestion import (DEFAULT_CHUNK_SIZE, SOURCE_TABLES, EnhancedDataIngestion,
+                                     process_memory_mb)
+from ingest_daemon import detect_data_source, file_format_for
+from token_cache import TokenCache
+
+# Prepared chunks buffered per worker; bounds memory when parsing outpaces the writer
+QUEUE_CHUNKS_PER_WORKER = 2
+
+
+def expand_patterns(patterns: List[str]) -> List[str]:
+    """Files matched by glob patterns (recursive with **), in order and without repeats"""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) or ([pattern] if os.path.isfile(pattern) else [])
+        paths.extend(path for path in matches if os.path.isfile(path) and path not in paths)
+    return paths
+
+
+def _prepare_file(ingestion: EnhancedDataIngestion, path: str, data_source: Optional[str],
+                  chunk_size: int, skip_seen_rows: bool) -> Iterator[Tuple[str, str, object]]:
+    """
+    Messages for one file: ('chunk', path, (source, frame, hashes)) and
+    ('learned', path, (tokens, date formats)) as they come, then ('done', path, stats)
+    """
+    file_format = file_format_for(path)
+    if file_format is None:
+        raise ValueError("Unsupported file type")
+    source = data_source or detect_data_source(ingestion, path, file_format)
+    if source is None:
+        raise ValueError("Could not detect the data source from the file name or columns")
+    
+    file_hash = ingestion.import_registry.file_fingerprint(path)
+    if skip_seen_rows and ingestion.import_registry.lookup_file(file_hash, source):
+        yield 'done', path, {'data_source': source, 'status': 'duplicate', 'rows_read': 0, 'rejected': 0}
+        return
+    
+    rows_read = rejected = 0
+    for chunk in ingestion.iter_file_chunks(path, file_format, chunk_size):
+        rows_read += len(chunk)
+        chunk, row_hashes, chunk_rejected = ingestion.prepare_chunk(chunk, source, skip_seen_rows)
+        rejected += chunk_rejected
+        learned = (ingestion.token_cache.take_unstored(), ingestion.date_formats.take_learned())
+        if any(learned):
+            yield 'learned', path, learned
+        if not chunk.empty:
+            yield 'chunk', path, (source, chunk, row_hashes)
+    
+    yield 'done', path, {'data_source': source, 'status': 'loaded', 'rows_read': rows_read,
+                         'rejected': rejected, 'file_hash': file_hash}
+
+
+def _file_worker(db_path: str, data_source: Optional[str], chunk_size: int, skip_seen_rows: bool,
+                 file_queue, chunk_queue):
+    """Worker loop: prepare files from file_queue until the None sentinel"""
+    # Parallelism comes from the file workers; nested pools would oversubscribe
+    ingestion = EnhancedDataIngestion(db_path, auto_init=False, enrichment_workers=1, excel_workers=1)
+    # Writes would contend with the parent for the lock, so new tokens and
+    # date formats go back to it instead
+    ingestion.token_cache = TokenCache(db_path, persist=False)
+    ingestion.date_formats = DateFormatRegistry(db_path, persist=False)
+    for path in iter(file_queue.get, None):
+        try:
+            for message in _prepare_file(ingestion, path, data_source, chunk_size, skip_seen_rows):
+                chunk_queue.put(message)
+        except Exception as e:
+            chunk_queue.put(('error', path, str(e)))
+
+
+def _iter_serial(ingestion: EnhancedDataIngestion, paths: List[str], data_source: Optional[str],
+                 chunk_size: int, skip_seen_rows: bool) -> Iterator[Tuple[str, str, object]]:
+    """Prepare files in this process"""
+    for path in paths:
+        try:
+            yield from _prepare_file(ingestion, path, data_source, chunk_size, skip_seen_rows)
+        except Exception as e:
+            yield 'error', path, str(e)
+
+
+def _iter_parallel(db_path: str, paths: List[str], data_source: Optional[str], chunk_size: int,
+                   skip_seen_rows: bool, workers: int) -> Iterator[Tuple[str, str, object]]:
+    """Prepare files in worker processes, streaming their chunks back through a bounded queue"""
+    context = multiprocessing.get_context()
+    file_queue = context.Queue()
+    chunk_queue = context.Queue(maxsize=workers * QUEUE_CHUNKS_PER_WORKER)
+    for path in paths:
+        file_queue.put(path)
+    for _ in range(workers):
+        file_queue.put(None)
+    
+    processes = [
+        context.Process(target=_file_worker, daemon=True,
+                        args=(db_path, data_source, chunk_size, skip_seen_rows, file_queue, chunk_queue))
+        for _ in range(workers)
+    ]
+    try:
+        for process in processes:
+            process.start()
+        
+        remaining = len(paths)
+        while remaining:
+            try:
+                message = chunk_queue.get(timeout=1)
+            except queue.Empty:
+                # A worker killed mid-file (e.g. out of memory) never reports back
+                if any(process.exitcode not in (None, 0) for process in processes):
+                    raise RuntimeError("Bulk load worker exited unexpectedly")
+                continue
+            if message[0] in ('done', 'error'):
+                remaining -= 1
+            yield message
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            if process.pid is not None:
+                process.join()
+
+
+def load_files(paths: List[str], data_source: Optional[str] = None, db_path: str = "market_intelligence.db",
+               workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               skip_seen_rows: bool = True) -> Dict:
+    """
+    Import files with parallel parsing and a single writer.
+    data_source None detects each file's source. Returns per-file results
+    and the overall rows/s, MB/s and peak resident memory (workers included).
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(paths)))
+    
+    ingestion = EnhancedDataIngestion(db_path)
+    start_time = time.perf_counter()
+    peak_memory_mb = process_memory_mb()
+    files = {path: {'path': path, 'data_source': data_source, 'status': 'failed', 'records': 0,
+                    'rejected': 0, 'skipped': 0, 'error': None} for path in paths}
+    written = {path: 0 for path in paths}
+    rows_read = 0
+    
+    if workers > 1:
+        messages = _iter_parallel(db_path, paths, data_source, chunk_size, skip_seen_rows, workers)
+    else:
+        messages = _iter_serial(ingestion, paths, data_source, chunk_size, skip_seen_rows)
+    
+    # The only connection writing during the run, so workers never contend for the lock
+    conn = sqlite3.connect(db_path)
+    try:
+        for kind, path, payload in messages:
+            if kind == 'chunk':
+                source, chunk, row_hashes = payload
+                if row_hashes is not None:
+                    # Workers only see rows registered before they read; this
+                    # catches rows repeated across files of the same run
+                    unseen = ingestion.import_registry.unseen_mask(source, row_hashes)
+                    chunk, row_hashes = chunk[unseen], row_hashes[unseen]
+                if not chunk.empty:
+                    ingestion.write_frame(conn, chunk, source)
+                    if row_hashes is not None:
+                        ingestion.import_registry.register_rows(source, row_hashes)
+                written[path] += len(chunk)
+            elif kind == 'learned':
+                tokens, date_formats = payload
+                if tokens:
+                    ingestion.token_cache.store(tokens)
+                for (source, column), date_format in date_formats.items():
+                    ingestion.date_formats.set_format(source, column, date_format)
+            elif kind == 'done':
+                entry = files[path]
+                entry.update(data_source=payload['data_source'], status=payload['status'],
+                             records=written[path], rejected=payload['rejected'],
+                             skipped=payload['rows_read'] - written[path] - payload['rejected'])
+                rows_read += payload['rows_read']
+                # The writer's Bloom filters are persisted once per file
+                ingestion.import_registry.save_bloom_filters()
+                if payload['status'] == 'loaded' and payload['file_hash']:
+                    ingestion.import_registry.register_file(payload['file_hash'], payload['data_source'],
+                                                            os.path.basename(path), payload['rows_read'])
+            else:
+                files[path].update(records=written[path], error=payload)
+            peak_memory_mb = max(peak_memory_mb, process_memory_mb())
+    finally:
+        messages.close()
+        conn.close()
+        ingestion.import_registry.save_bloom_filters()
+    
+    # One snapshot refresh per table at the end of the run
+    for source in {entry['data_source'] for entry in files.values() if entry['records']}:
+        ingestion.refresh_analytics_snapshot(source)
+    
+    elapsed = time.perf_counter() - start_time
+    total_bytes = sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+    return {
+        'files': list(files.values()),
+        'rows_read': rows_read,
+        'records': sum(entry['records'] for entry in files.values()),
+        'rejected': sum(entry['rejected'] for entry in files.values()),
+        'elapsed': elapsed,
+        'rows_per_second': rows_read / elapsed if elapsed > 0 else 0.0,
+        'mb_per_second': total_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0,
+        'peak_memory_mb': peak_memory_mb
+    }
+
+
+def print_summary(result: Dict):
+    """Per-file outcome lines and the throughput summary"""
+    for entry in result['files']:
+        if entry['status'] == 'loaded':
+            print(f"✅ {entry['path']} ({entry['data_source']}): {entry['records']:,} records, "
+                  f"{entry['rejected']:,} rejected, {entry['skipped']:,} skipped")
+        elif entry['status'] == 'duplicate':
+            print(f"⏭️  {entry['path']}: already imported")
+        else:
+            print(f"❌ {entry['path']}: {entry['error']}")
+    
+    print(f"📦 {result['records']:,} of {result['rows_read']:,} rows loaded from "
+          f"{len(result['files'])} files in {result['elapsed']:.1f}s")
+    print(f"⚡ {result['rows_per_second']:,.0f} rows/s, {result['mb_per_second']:.1f} MB/s, "
+          f"peak RSS {result['peak_memory_mb']:,.0f} MB")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command-line entry point; returns the process exit code"""
+    parser = argparse.ArgumentParser(prog='python -m enhanced_data_ingestion',
+                                     description='Bulk-load data files without the web interface')
+    commands = parser.add_subparsers(dest='command', required=True)
+    load = commands.add_parser('load', help='Import files matching glob patterns')
+    load.add_argument('patterns', nargs='+', help="Files or glob patterns, e.g. 'exports/*.csv'")
+    load.add_argument('--source', choices=sorted(SOURCE_TABLES),
+                      help='Data source of every file (detected per file when omitted)')
+    load.add_argument('--workers', type=int, default=None, help='Parsing processes (default: one per CPU)')
+    load.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows per chunk')
+    load.add_argument('--db', default='market_intelligence.db', help='SQLite database path')
+    load.add_argument('--reimport', action='store_true', help='Import rows and files seen before again')
+    args = parser.parse_args(argv)
+    
+    paths = expand_patterns(args.patterns)
+    if not paths:
+        print("❌ No files match the given patterns")
+        return 1
+    
+    result = load_files(paths, args.source, args.db, args.workers, args.chunk_size,
+                        skip_seen_rows=not args.reimport)
+    print_summary(result)
+    return 0 if all(entry['status'] != 'failed' for entry in result['files']) else 1
@@ -0,0 +1,133 @@
+"""
+Source-to-table column mapping for the M&A Market Intelligence Tool
+Each data source compiles once into a fixed projection onto its table and a
+prepared INSERT; rows are bound straight from the frame's column buffers
+"""
+
+import sqlite3
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Source columns stored under a different table column; any other column
+# is stored under its own name when the table has it, and dropped otherwise
+COLUMN_RENAMES = {
+    'preqin': {
+        'target_company': 'target_name',
+        'fund_name': 'acquirer_name',
+        'investment_amount': 'deal_value',
+        'investment_date': 'announcement_date',
+        'stage': 'deal_type'
+    },
+    'index_constituents': {
+        'index_name': 'index_membership',
+        'country': 'geography',
+        'import_date': 'last_updated'
+    }
+}
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def column_values(series: pd.Series) -> np.ndarray:
+    """
+    SQLite-ready values of one column as an object array: timestamps as
+    text (each distinct value formatted once), missing values as None
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        formatted = np.append(uniques.strftime(TIMESTAMP_FORMAT).to_numpy(dtype=object), None)
+        return formatted[codes]
+    
+    values = series.to_numpy(dtype=object)
+    missing = pd.isna(series).to_numpy()
+    if missing.any():
+        if not values.flags.writeable:
+            # Object columns come back as read-only views under copy-on-write
+            values = values.copy()
+        values[missing] = None
+    return values
+
+
+def frame_records(df: pd.DataFrame) -> Iterator[tuple]:
+    """Row tuples for executemany, zipped from per-column buffers without copying the frame"""
+    return zip(*(column_values(df[col]) for col in df.columns))
+
+
+class CompiledMapping:
+    """
+    Projection of one data source onto its table.
+    The INSERT for each set of present columns is built once; sqlite3 keeps
+    the prepared statement in its per-connection cache across batches.
+    """
+    
+    def __init__(self, data_source: str, table: str, table_columns: List[str],
+                 schema_columns: Optional[List[str]] = None):
+        self.data_source = data_source
+        self.table = table
+        renames = COLUMN_RENAMES.get(data_source, {})
+        renamed_from = {target: source for source, target in renames.items()}
+        # (source column, table column) pairs; 'id' is always assigned by SQLite
+        self.columns: List[Tuple[str, str]] = [
+            (renamed_from.get(column, column), column)
+            for column in table_columns if column != 'id'
+        ]
+        # Schema columns the table has no place for
+        mapped = {source for source, _ in self.columns}
+        self.unmapped = [column for column in schema_columns or [] if column not in mapped]
+        self._statements: Dict[Tuple[str, ...], str] = {}
+    
+    def insert_statement(self, table_columns: Tuple[str, ...]) -> str:
+        """Cached INSERT for a set of table columns"""
+        statement = self._statements.get(table_columns)
+        if statement is None:
+            statement = (f"INSERT INTO {self.table} ({', '.join(table_columns)}) "
+                         f"VALUES ({', '.join('?' for _ in table_columns)})")
+            self._statements[table_columns] = statement
+        return statement
+    
+    def rename(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Frame with its source columns renamed to the table columns they are stored under"""
+        renames = {
+            source: target for source, target in self.columns
+            if source != target and source in df.columns and target not in df.columns
+        }
+        return df.rename(columns=renames) if renames else df
+    
+    def insert(self, conn: sqlite3.Connection, df: pd.DataFrame) -> int:
+        """
+        Insert a frame, under its source or (after rename) its table column
+        names, in one transaction and return the rows written. Columns absent
+        from the frame are left to their table defaults.
+        """
+        present = []
+        for source, target in self.columns:
+            column = source if source in df.columns else target
+            if column in df.columns:
+                present.append((column, target))
+        if df.empty or not present:
+            return 0
+        
+        statement = self.insert_statement(tuple(target for _, target in present))
+        records = zip(*(column_values(df[source]) for source, _ in present))
+        
+        cursor = conn.cursor()
+        try:
+            # Joins a transaction the caller already opened (filing blobs
+            # are written first so they commit with their rows)
+            if not conn.in_transaction:
+                cursor.execute("BEGIN")
+            cursor.executemany(statement, records)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return len(df)
+
+
+def compile_mapping(conn: sqlite3.Connection, data_source: str, table: str, schema: Optional[Dict] = None) -> CompiledMapping:
+    """Compile a source schema's mapping against the live table definition"""
+    table_columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    schema_columns = (schema or {}).get('required_columns', []) + (schema or {}).get('optional_columns', [])
+    return CompiledMapping(data_source, table, table_columns, schema_columns)
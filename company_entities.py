@@ -0,0 +1,216 @@
+"""
+Company entity resolution for the M&A Market Intelligence Tool
+Company names are normalized (case, punctuation, legal suffixes) to a
+canonical key with a stable id assigned at import, so deals, filings and
+press releases are looked up by indexed id equality instead of LIKE scans
+"""
+
+import re
+import sqlite3
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+# Trailing words dropped from names; "Acme Holdings Inc." and "ACME HOLDINGS" resolve alike
+LEGAL_SUFFIXES = {
+    'inc', 'incorporated', 'corp', 'corporation', 'co', 'company', 'ltd', 'limited',
+    'llc', 'llp', 'lp', 'plc', 'sa', 'ag', 'se', 'nv', 'bv', 'gmbh', 'spa', 'srl',
+    'oyj', 'ab', 'asa', 'kk', 'pty', 'pte', 'sarl', 'sas'
+}
+
+# Name columns of each table and the entity id column stored beside them
+ENTITY_COLUMNS = {
+    'deals': {'target_name': 'target_id', 'acquirer_name': 'acquirer_id'},
+    'filings': {'company_name': 'company_id'},
+    'press_releases': {'company_name': 'company_id'},
+    'companies': {'company_name': 'entity_id'}
+}
+
+# Names resolved per query when looking up ids
+RESOLVE_BATCH_NAMES = 500
+
+# Distinct names whose keys are kept between chunks of an import
+NORMALIZE_CACHE_SIZE = 1 << 16
+
+_ABBREVIATION_DOTS = re.compile(r"[.']")
+_NAME_WORDS = re.compile(r'[a-z0-9]+')
+
+
+def normalize_company_name(name) -> Optional[str]:
+    """
+    Canonical key of a company name: accents, case, punctuation, a leading
+    "the" and trailing legal suffixes removed. None if nothing is left.
+    """
+    if name is None or pd.isna(name):
+        return None
+    return _normalize_text(str(name))
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_text(text: str) -> Optional[str]:
+    """normalize_company_name for a non-missing name"""
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+    text = text.lower().replace('&', ' and ')
+    # Dotted abbreviations collapse first, so "S.A." becomes "sa" rather than "s a"
+    words = _NAME_WORDS.findall(_ABBREVIATION_DOTS.sub('', text))
+    if words and words[0] == 'the' and len(words) > 1:
+        words = words[1:]
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return ' '.join(words) or None
+
+
+def create_entity_tables(cursor: sqlite3.Cursor):
+    """
+    Create the entity table and id columns, then resolve rows written before
+    they existed (or by paths that do not resolve names)
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS company_entities (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            normalized_name TEXT UNIQUE NOT NULL,
+            display_name TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    for table, columns in ENTITY_COLUMNS.items():
+        existing = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+        if not existing:
+            continue
+        for name_column, id_column in columns.items():
+            if id_column not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {id_column} INTEGER REFERENCES company_entities(id)")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{id_column} ON {table}({id_column})")
+            backfill_entity_ids(cursor, table, name_column, id_column)
+
+
+def backfill_entity_ids(cursor: sqlite3.Cursor, table: str, name_column: str, id_column: str) -> int:
+    """Resolve names whose id is still NULL; each distinct name is normalized once"""
+    names = [row[0] for row in cursor.execute(
+        f"SELECT DISTINCT {name_column} FROM {table} WHERE {id_column} IS NULL AND {name_column} IS NOT NULL"
+    )]
+    ids = resolve_entities(cursor, names)
+    if not ids:
+        return 0
+    
+    cursor.execute("DROP TABLE IF EXISTS temp.entity_backfill")
+    cursor.execute("CREATE TEMP TABLE entity_backfill (name TEXT PRIMARY KEY, entity_id INTEGER)")
+    cursor.executemany("INSERT INTO entity_backfill VALUES (?, ?)", ids.items())
+    cursor.execute(f'''
+        UPDATE {table}
+        SET {id_column} = (SELECT entity_id FROM entity_backfill WHERE name = {table}.{name_column})
+        WHERE {id_column} IS NULL AND {name_column} IN (SELECT name FROM entity_backfill)
+    ''')
+    updated = cursor.rowcount
+    cursor.execute("DROP TABLE temp.entity_backfill")
+    return updated
+
+
+def resolve_entities(conn, names: Iterable) -> Dict[str, int]:
+    """
+    Entity id of each distinct name, creating entities for unseen keys.
+    Names that normalize to nothing are left out. Runs in the caller's
+    transaction.
+    """
+    keys = {}
+    for name in names:
+        if name is None or name != name:  # missing (None or NaN)
+            continue
+        name = str(name)
+        if name not in keys:
+            key = _normalize_text(name)
+            if key is not None:
+                keys[name] = key
+    if not keys:
+        return {}
+    
+    # The first spelling seen becomes the entity's display name
+    display_names = {}
+    for name, key in keys.items():
+        display_names.setdefault(key, name.strip())
+    
+    # Most keys of a re-import already exist; only the rest are inserted
+    key_ids = _lookup_keys(conn, list(display_names))
+    new_keys = [key for key in display_names if key not in key_ids]
+    if new_keys:
+        conn.executemany(
+            "INSERT OR IGNORE INTO company_entities (normalized_name, display_name) VALUES (?, ?)",
+            [(key, display_names[key]) for key in new_keys]
+        )
+        key_ids.update(_lookup_keys(conn, new_keys))
+    return {name: key_ids[key] for name, key in keys.items()}
+
+
+def _lookup_keys(conn, keys: List[str]) -> Dict[str, int]:
+    """Ids of the existing entities among keys"""
+    key_ids = {}
+    for start in range(0, len(keys), RESOLVE_BATCH_NAMES):
+        batch = keys[start:start + RESOLVE_BATCH_NAMES]
+        key_ids.update(conn.execute(
+            f"SELECT normalized_name, id FROM company_entities WHERE normalized_name IN ({', '.join('?' for _ in batch)})",
+            batch
+        ).fetchall())
+    return key_ids
+
+
+def assign_entity_ids(conn, table: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Frame with the entity id columns of table filled from its name columns"""
+    columns = {name: id_column for name, id_column in ENTITY_COLUMNS.get(table, {}).items() if name in df.columns}
+    if not columns or df.empty:
+        return df
+    
+    ids = resolve_entities(conn, pd.unique(pd.concat([df[name] for name in columns], ignore_index=True).dropna()).tolist())
+    return df.assign(**{
+        id_column: df[name].map(ids).astype('Int64')
+        for name, id_column in columns.items()
+    })
+
+
+def record_entity_ids(conn, table: str, record: Dict) -> Dict[str, int]:
+    """Entity id columns for a single record (e.g. a manual entry)"""
+    columns = {name: id_column for name, id_column in ENTITY_COLUMNS.get(table, {}).items() if record.get(name)}
+    ids = resolve_entities(conn, [record[name] for name in columns])
+    return {id_column: ids[str(record[name])] for name, id_column in columns.items() if str(record[name]) in ids}
+
+
+def match_entity_ids(conn, name: str) -> List[int]:
+    """
+    Ids of the entities a search name refers to: the entity with the same
+    canonical key, or failing that those whose key starts with its words
+    ("Goldman" finds "Goldman Sachs Group"). Both are index range lookups.
+    """
+    predicate = _entity_predicate(conn, name)
+    if predicate is None:
+        return []
+    condition, params = predicate
+    return [row[0] for row in conn.execute(f"SELECT id FROM company_entities WHERE {condition}", params)]
+
+
+def entity_filter(conn, name: str, id_columns: Sequence[str]) -> Tuple[str, List]:
+    """
+    WHERE condition, and its parameters, for rows whose id columns refer to
+    the entities a search name matches (as match_entity_ids). The entities
+    come from a subquery on company_entities rather than a bound id list, so
+    a short prefix matching thousands of entities stays within SQLite's
+    host parameter limit.
+    """
+    predicate = _entity_predicate(conn, name)
+    if predicate is None:
+        return "0", []
+    condition, params = predicate
+    entities = f"SELECT id FROM company_entities WHERE {condition}"
+    return "(" + " OR ".join(f"{column} IN ({entities})" for column in id_columns) + ")", params * len(id_columns)
+
+
+def _entity_predicate(conn, name: str) -> Optional[Tuple[str, List[str]]]:
+    """Condition on company_entities selecting a search name's entities; None if the name has no key"""
+    key = normalize_company_name(name)
+    if key is None:
+        return None
+    if conn.execute("SELECT 1 FROM company_entities WHERE normalized_name = ?", (key,)).fetchone():
+        return "normalized_name = ?", [key]
+    return "normalized_name >= ? AND normalized_name < ?", [key + ' ', key + '!']
@@ -0,0 +1,219 @@
+"""
+Column normalization helpers for the M&A Market Intelligence Tool
+Vectorized parsers shared by the per-source processing steps
+"""
+
+import re
+import sqlite3
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Monetary columns are stored in millions of dollars throughout the app
+MONEY_UNIT = 1e6
+
+MONEY_SUFFIX_MULTIPLIERS = {
+    'k': 1e3, 'thousand': 1e3,
+    'm': 1e6, 'mm': 1e6, 'mn': 1e6, 'mln': 1e6, 'million': 1e6,
+    'b': 1e9, 'bn': 1e9, 'bln': 1e9, 'billion': 1e9,
+    't': 1e12, 'tn': 1e12, 'trillion': 1e12
+}
+
+_SUFFIX = r'trillion|billion|million|thousand|bln|mln|bn|mm|mn|tn|[kmbt]'
+_SYMBOL = r'[$€£¥]'
+
+# One anchored pattern covers "$1.5B", "USD 250mm", "(3.2 million)",
+# "EUR 100-200M", "1,250.5" and "US$ 40bn"; anything else parses to NaN
+MONEY_PATTERN = re.compile(
+    r'^\s*(?P<negative>\(|-)?\s*'
+    r'(?:[a-z]{2,3}\s*' + _SYMBOL + r'?|' + _SYMBOL + r')?\s*'
+    r'(?P<amount>\d[\d,]*(?:\.\d+)?|\.\d+)\s*'
+    r'(?P<suffix>' + _SUFFIX + r')?\.?\s*'
+    r'(?:(?:-|–|to)\s*' + _SYMBOL + r'?\s*'
+    r'(?P<upper>\d[\d,]*(?:\.\d+)?|\.\d+)\s*'
+    r'(?P<upper_suffix>' + _SUFFIX + r')?\.?\s*)?'
+    r'(?:[a-z]{3})?\s*\)?\s*$',
+    re.IGNORECASE
+)
+
+
+def parse_money(values: pd.Series, unit: float = MONEY_UNIT) -> pd.Series:
+    """
+    Parse a column of monetary strings into floats expressed in unit.
+    
+    Handles K/M/B/T (and mm/bn/million...) suffixes, currency symbols and ISO
+    codes, parentheses or a leading minus for negatives, and ranges (which
+    resolve to their midpoint). Bare numbers are taken to be in unit already.
+    Currencies are not converted.
+    
+    Each distinct string is parsed once, plain numbers skip the regex, and the
+    rest go through a single regex extract pass.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    
+    # Exports repeat the same strings heavily, so parse the distinct values
+    # and broadcast back through the factorized codes
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    uniques = pd.Series(uniques, dtype=object).astype(str)
+    
+    parsed = pd.to_numeric(uniques, errors='coerce').astype(float)
+    pending = ~np.isfinite(parsed)
+    if pending.any():
+        parsed[pending] = _extract_money(uniques[pending], unit)
+    
+    result = np.append(parsed.to_numpy(), np.nan)[codes]
+    return pd.Series(result, index=values.index, dtype=float)
+
+
+def _extract_money(texts: pd.Series, unit: float) -> pd.Series:
+    """Parse strings that are not plain numbers with one MONEY_PATTERN pass"""
+    parts = texts.str.extract(MONEY_PATTERN)
+    
+    amount = pd.to_numeric(parts['amount'].str.replace(',', '', regex=False), errors='coerce')
+    upper = pd.to_numeric(parts['upper'].str.replace(',', '', regex=False), errors='coerce')
+    
+    multiplier = parts['suffix'].str.lower().map(MONEY_SUFFIX_MULTIPLIERS).astype(float)
+    upper_multiplier = parts['upper_suffix'].str.lower().map(MONEY_SUFFIX_MULTIPLIERS).astype(float)
+    
+    # "100-200M": the lower bound shares the upper bound's suffix
+    multiplier = multiplier.fillna(upper_multiplier).fillna(unit)
+    upper_multiplier = upper_multiplier.fillna(multiplier)
+    
+    lower_value = amount * multiplier
+    upper_value = upper * upper_multiplier
+    value = lower_value.where(upper_value.isna(), (lower_value + upper_value) / 2) / unit
+    
+    return value.where(parts['negative'].isna(), -value)
+
+
+# Explicit formats tried when inferring a date column; on ties the earlier
+# entry wins, so US month-first layouts beat day-first ones
+CANDIDATE_DATE_FORMATS = [
+    '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y/%m/%d', '%Y%m%d',
+    '%m/%d/%Y', '%m/%d/%Y %H:%M', '%m/%d/%y', '%d/%m/%Y', '%d/%m/%y',
+    '%d-%m-%Y', '%d.%m.%Y', '%d-%b-%Y', '%d-%b-%y', '%d %b %Y', '%d %B %Y',
+    '%b %d, %Y', '%B %d, %Y', '%b %Y', '%B %Y'
+]
+
+# Distinct values inspected when inferring a format
+DATE_SAMPLE_SIZE = 500
+
+# Share of the sample a format must parse to be adopted (or kept from cache);
+# rows it misses still fall back to per-element parsing
+DATE_FORMAT_MIN_HIT_RATE = 0.5
+
+
+def _date_sample(values: pd.Series) -> pd.Series:
+    """Evenly spaced distinct strings from a date column, skipping n/a-style placeholders"""
+    non_null = values.dropna()
+    step = max(1, len(non_null) // (DATE_SAMPLE_SIZE * 4))
+    sample = pd.Series(non_null.iloc[::step].astype(str).str.strip().unique())
+    sample = sample[sample.str.contains(r'\d', regex=True)]
+    if len(sample) > DATE_SAMPLE_SIZE:
+        sample = sample.iloc[::len(sample) // DATE_SAMPLE_SIZE + 1]
+    return sample
+
+
+def _date_hit_rate(sample: pd.Series, date_format: str) -> float:
+    """Share of sample values that parse with date_format"""
+    if sample.empty:
+        return 0.0
+    return pd.to_datetime(sample, format=date_format, errors='coerce').notna().mean()
+
+
+def infer_date_format(values: pd.Series) -> Optional[str]:
+    """Pick the candidate format that parses most of a sample, or None"""
+    sample = _date_sample(values)
+    if sample.empty:
+        return None
+    
+    best_format, best_rate = None, 0.0
+    for date_format in CANDIDATE_DATE_FORMATS:
+        rate = _date_hit_rate(sample, date_format)
+        if rate > best_rate:
+            best_format, best_rate = date_format, rate
+            if rate == 1.0:
+                break
+    
+    return best_format if best_rate >= DATE_FORMAT_MIN_HIT_RATE else None
+
+
+def parse_dates(values: pd.Series, date_format: Optional[str] = None) -> pd.Series:
+    """
+    Parse a date column with an explicit format, re-parsing only the rows
+    that do not match it with per-element inference
+    """
+    if pd.api.types.is_datetime64_any_dtype(values) or not pd.api.types.is_string_dtype(values):
+        return pd.to_datetime(values, errors='coerce')
+    
+    if date_format is None:
+        return pd.to_datetime(values, format='mixed', errors='coerce')
+    
+    parsed = pd.to_datetime(values, format=date_format, errors='coerce')
+    failed = parsed.isna() & values.notna()
+    if failed.any():
+        parsed[failed] = pd.to_datetime(values[failed], format='mixed', errors='coerce')
+    return parsed
+
+
+class DateFormatRegistry:
+    """
+    Date formats learned per data source and column.
+    The first import of a column samples it to settle on an explicit format;
+    later imports reuse the stored format while it still fits the data.
+    With persist False, formats learned are kept in memory for take_learned.
+    """
+    
+    def __init__(self, db_path: str = "market_intelligence.db", persist: bool = True):
+        self.db_path = db_path
+        self.persist = persist
+        self._learned: Dict[Tuple[str, str], str] = {}
+        self._formats: Optional[Dict[Tuple[str, str], str]] = None
+    
+    def get_format(self, data_source: str, column: str) -> Optional[str]:
+        """Return the stored format for a source column, if any"""
+        if self._formats is None:
+            conn = sqlite3.connect(self.db_path)
+            rows = conn.execute("SELECT data_source, column_name, date_format FROM date_formats").fetchall()
+            conn.close()
+            self._formats = {(row[0], row[1]): row[2] for row in rows}
+        return self._formats.get((data_source, column))
+    
+    def set_format(self, data_source: str, column: str, date_format: str):
+        """Store the format for a source column"""
+        if self.persist:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute('''
+                INSERT OR REPLACE INTO date_formats (data_source, column_name, date_format)
+                VALUES (?, ?, ?)
+            ''', (data_source, column, date_format))
+            conn.commit()
+            conn.close()
+        else:
+            self._learned[(data_source, column)] = date_format
+        
+        if self._formats is not None:
+            self._formats[(data_source, column)] = date_format
+    
+    def take_learned(self) -> Dict[Tuple[str, str], str]:
+        """Formats learned without persisting since the last call, for set_format elsewhere"""
+        learned, self._learned = self._learned, {}
+        return learned
+    
+    def parse(self, values: pd.Series, data_source: str, column: str) -> pd.Series:
+        """Parse a date column using (and maintaining) the cached format"""
+        if not pd.api.types.is_string_dtype(values):
+            return parse_dates(values)
+        
+        date_format = self.get_format(data_source, column)
+        
+        # Re-infer when the source has changed its export layout
+        if date_format is None or _date_hit_rate(_date_sample(values), date_format) < DATE_FORMAT_MIN_HIT_RATE:
+            inferred = infer_date_format(values)
+            if inferred is not None and inferred != date_format:
+                self.set_format(data_source, column, inferred)
+            date_format = inferred
+        
+        return parse_dates(values, date_format)
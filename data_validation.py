@@ -0,0 +1,160 @@
+"""
+Row-level validation for the M&A Market Intelligence Tool
+Declarative per-column rules evaluated as vectorized masks, with a sampled
+mode for previews and a full mode that indexes the failing rows
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from data_normalization import infer_date_format, parse_dates
+
+# Rows checked in sampled mode
+VALIDATION_SAMPLE_SIZE = 5000
+
+# Rule masks are packed into one integer per failing row
+MAX_RULES = 64
+
+
+def _present(values: pd.Series) -> pd.Series:
+    """Mask of values that are neither missing nor blank strings"""
+    present = values.notna()
+    if values.dtype == object or pd.api.types.is_string_dtype(values):
+        present &= values.astype('string').str.strip().ne('').fillna(False)
+    return present
+
+
+def _per_distinct(values: pd.Series, convert) -> pd.Series:
+    """Apply convert to each distinct value once and broadcast the result back"""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    if len(uniques) > len(values) // 2:
+        # Mostly distinct: converting in place beats the broadcast
+        return convert(values.astype(object)).set_axis(values.index)
+    converted = convert(pd.Series(uniques, dtype=object))
+    missing = converted.iloc[:0].reindex([0]).to_numpy()
+    result = np.concatenate([converted.to_numpy(), missing])[codes]
+    return pd.Series(result, index=values.index)
+
+
+def _as_numbers(values: pd.Series) -> pd.Series:
+    """Numeric view of a column (NaN where a value is not a number)"""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype(float)
+    return _per_distinct(values, lambda uniques: pd.to_numeric(uniques.astype(str), errors='coerce').astype(float))
+
+
+def _as_dates(values: pd.Series) -> pd.Series:
+    """Datetime view of a column (NaT where a value is not a date)"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    if pd.api.types.is_string_dtype(values):
+        date_format = infer_date_format(values)
+        return _per_distinct(values, lambda uniques: parse_dates(uniques.astype('string'), date_format))
+    return pd.to_datetime(values, errors='coerce')
+
+
+def column_rule_masks(values: pd.Series, column: str, spec: Dict,
+                      raw_values: Optional[pd.Series] = None) -> List[Tuple[str, pd.Series]]:
+    """
+    Evaluate one column's rules; returns (rule name, failing-row mask) pairs.
+    
+    Supported keys: required, type ('number' or 'date'), min, max,
+    max_future_days (dates), pattern (full-match regex), max_length and
+    allowed (set of values). Only present values are checked by rules other
+    than required.
+    
+    raw_values is the column as read, before the source transform parsed
+    it (row-aligned with values). Presence is then judged on the raw
+    values, so a value the parser coerced to NaN/NaT fails its type rule.
+    """
+    masks = []
+    present = _present(values if raw_values is None else raw_values)
+    
+    if spec.get('required'):
+        masks.append((f"{column}: required", ~present))
+    
+    if spec.get('type') == 'number':
+        numbers = _as_numbers(values)
+        masks.append((f"{column}: not a number", present & numbers.isna()))
+        if 'min' in spec:
+            masks.append((f"{column}: below {spec['min']:,}", (numbers < spec['min']).fillna(False)))
+        if 'max' in spec:
+            masks.append((f"{column}: above {spec['max']:,}", (numbers > spec['max']).fillna(False)))
+    
+    elif spec.get('type') == 'date':
+        dates = _as_dates(values)
+        masks.append((f"{column}: not a date", present & dates.isna()))
+        if 'min' in spec:
+            masks.append((f"{column}: before {spec['min']}", (dates < pd.Timestamp(spec['min'])).fillna(False)))
+        if 'max_future_days' in spec:
+            latest = pd.Timestamp(datetime.now() + timedelta(days=spec['max_future_days']))
+            masks.append((f"{column}: too far in the future", (dates > latest).fillna(False)))
+    
+    if 'pattern' in spec:
+        matches = _per_distinct(values, lambda uniques: uniques.astype('string').str.strip()
+                                .str.fullmatch(spec['pattern']).fillna(False).astype(bool))
+        matches = matches.fillna(False).astype(bool)
+        masks.append((f"{column}: malformed", present & ~matches))
+    
+    if 'max_length' in spec:
+        lengths = values.astype('string').str.len()
+        masks.append((f"{column}: longer than {spec['max_length']}", (lengths > spec['max_length']).fillna(False)))
+    
+    if 'allowed' in spec:
+        masks.append((f"{column}: not an allowed value", present & ~values.isin(spec['allowed'])))
+    
+    return masks
+
+
+def validate_frame(df: pd.DataFrame, column_rules: Dict[str, Dict],
+                   sample_size: Optional[int] = None, raw: Optional[pd.DataFrame] = None) -> Dict:
+    """
+    Validate a frame against per-column rules.
+    
+    With sample_size, a random sample of that many rows is checked (for
+    instant preview feedback). raw holds the rule columns as read, before
+    parsing, row for row with df (see column_rule_masks). Returns the
+    failure count per rule and 'row_errors': a Series indexed like df
+    holding, for each failing row only, a bitmask over 'rules'.
+    """
+    sampled = sample_size is not None and len(df) > sample_size
+    frame = df
+    if sampled:
+        positions = np.random.RandomState(0).choice(len(df), size=sample_size, replace=False)
+        frame = df.iloc[positions]
+        raw = raw.iloc[positions] if raw is not None else None
+    
+    rules = []
+    failed_any = np.zeros(len(frame), dtype=bool)
+    bits = np.zeros(len(frame), dtype=np.uint64)
+    
+    for column, spec in column_rules.items():
+        if column not in frame.columns:
+            continue
+        raw_values = raw[column].set_axis(frame.index) if raw is not None and column in raw.columns else None
+        for rule, mask in column_rule_masks(frame[column], column, spec, raw_values):
+            if len(rules) >= MAX_RULES:
+                raise ValueError(f"At most {MAX_RULES} validation rules are supported")
+            mask = mask.to_numpy(dtype=bool)
+            bits[mask] |= np.uint64(1) << np.uint64(len(rules))
+            failed_any |= mask
+            rules.append((rule, int(mask.sum())))
+    
+    return {
+        'rules': [rule for rule, _ in rules],
+        'rule_failures': {rule: count for rule, count in rules if count},
+        'row_errors': pd.Series(bits[failed_any], index=frame.index[failed_any], dtype=np.uint64),
+        'rows_checked': len(frame),
+        'sampled': sampled
+    }
+
+
+def describe_row_errors(result: Dict, row_label) -> List[str]:
+    """Names of the rules a row failed, decoded from its bitmask"""
+    if row_label not in result['row_errors'].index:
+        return []
+    mask = int(result['row_errors'].loc[row_label])
+    return [rule for bit, rule in enumerate(result['rules']) if mask >> bit & 1]
@@ -0,0 +1,130 @@
+"""
+Deal-to-company links for the M&A Market Intelligence Tool
+Deal targets and acquirers are resolved against the companies universe as
+deals are imported, so a company's deal activity is an index lookup on
+deal_parties instead of a scan over free-text party names
+"""
+
+import sqlite3
+from typing import Dict, Iterable, List
+
+import pandas as pd
+
+# Party roles and the deals column holding each party's entity id
+PARTY_ROLES = {
+    'target': 'target_id',
+    'acquirer': 'acquirer_id'
+}
+
+# Deals linked per batch
+LINK_BATCH_ROWS = 10000
+
+
+def create_deal_parties(cursor: sqlite3.Cursor):
+    """Create the link table, linking every existing deal when it is new"""
+    exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'deal_parties'").fetchone()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS deal_parties (
+            company_id INTEGER NOT NULL REFERENCES companies(id),
+            deal_row_id INTEGER NOT NULL REFERENCES deals(id),
+            role TEXT NOT NULL,
+            PRIMARY KEY (company_id, deal_row_id, role)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_deal_parties_deal ON deal_parties(deal_row_id)")
+    if not exists:
+        DealLinker().link_deals(cursor, since_id=0)
+
+
+class DealLinker:
+    """
+    In-memory hash from company entity (the interned normalized name) to
+    the companies rows carrying it. The hash is loaded once and extended
+    with companies added since, so linking a batch of deals is a dictionary
+    probe per party rather than a query.
+    """
+    
+    def __init__(self):
+        self._companies: Dict[int, List[int]] = {}
+        self._loaded_id = 0
+    
+    def company_index(self, conn) -> Dict[int, List[int]]:
+        """Entity id -> company ids, caught up with companies written since the last call"""
+        rows = conn.execute(
+            "SELECT id, entity_id FROM companies WHERE id > ? AND entity_id IS NOT NULL ORDER BY id",
+            (self._loaded_id,)
+        ).fetchall()
+        for company_id, entity_id in rows:
+            self._companies.setdefault(entity_id, []).append(company_id)
+        if rows:
+            self._loaded_id = rows[-1][0]
+        return self._companies
+    
+    def link_deals(self, conn, since_id: int, deal_keys: Iterable[str] = ()) -> int:
+        """
+        Link deals with an id above since_id, and relink older deals whose
+        vendor deal_id is in deal_keys (their parties may have been updated).
+        Returns the links written.
+        """
+        companies = self.company_index(conn)
+        party_columns = ', '.join(PARTY_ROLES.values())
+        deal_keys = list(deal_keys)
+        
+        written = 0
+        after = since_id
+        while True:
+            rows = conn.execute(
+                f"SELECT id, {party_columns} FROM deals WHERE id > ? ORDER BY id LIMIT ?", (after, LINK_BATCH_ROWS)
+            ).fetchall()
+            if not rows:
+                break
+            written += self._write_links(conn, rows, companies)
+            after = rows[-1][0]
+        
+        for start in range(0, len(deal_keys), LINK_BATCH_ROWS):
+            batch = deal_keys[start:start + LINK_BATCH_ROWS]
+            rows = conn.execute(
+                f"SELECT id, {party_columns} FROM deals WHERE deal_id IN ({', '.join('?' for _ in batch)}) AND id <= ?",
+                batch + [since_id]
+            ).fetchall()
+            written += self._write_links(conn, rows, companies)
+        return written
+    
+    def link_companies(self, conn, since_id: int) -> int:
+        """Link existing deals to companies with an id above since_id; returns the links written"""
+        self.company_index(conn)
+        
+        written = 0
+        for role, column in PARTY_ROLES.items():
+            # One join per role, served by the deals entity id indexes
+            written += conn.execute(f'''
+                INSERT OR IGNORE INTO deal_parties (company_id, deal_row_id, role)
+                SELECT companies.id, deals.id, ?
+                FROM companies JOIN deals ON deals.{column} = companies.entity_id
+                WHERE companies.id > ?
+            ''', (role, since_id)).rowcount
+        return written
+    
+    def _write_links(self, conn, rows: List[tuple], companies: Dict[int, List[int]]) -> int:
+        """Replace the links of a batch of (deal row id, party entity ids...) rows"""
+        links = [
+            (company_id, row[0], role)
+            for row in rows
+            for role, entity_id in zip(PARTY_ROLES, row[1:])
+            if entity_id is not None
+            for company_id in companies.get(entity_id, ())
+        ]
+        conn.executemany("DELETE FROM deal_parties WHERE deal_row_id = ?", [(row[0],) for row in rows])
+        conn.executemany("INSERT OR IGNORE INTO deal_parties (company_id, deal_row_id, role) VALUES (?, ?, ?)", links)
+        return len(links)
+
+
+def company_deals(conn, company_id: int) -> pd.DataFrame:
+    """Deals involving a company, newest first, with its role in each"""
+    return pd.read_sql('''
+        SELECT p.role, d.target_name, d.acquirer_name, d.deal_value, d.deal_type,
+               d.announcement_date, d.status
+        FROM deal_parties p JOIN deals d ON d.id = p.deal_row_id
+        WHERE p.company_id = ?
+        ORDER BY d.announcement_date DESC
+    ''', conn, params=[company_id])
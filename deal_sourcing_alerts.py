@@ -3,13 +3,14 @@ import numpy as np
 import streamlit as st
 import sqlite3
 import json
-import re
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import smtplib
-from email.mime.text import MimeText
-from email.mime.multipart import MimeMultipart
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
 from dataclasses import dataclass
+from search_index import fts_query
+from token_cache import get_token_cache, keyword_count, keyword_tokens
 
 @dataclass
 class Alert:
@@ -29,6 +30,8 @@ class DealSourcingAlerts:
     
     def __init__(self, db_path: str = "market_intelligence.db"):
         self.db_path = db_path
+        # Deal names are not documents, so their tokens are only kept in memory
+        self.token_cache = get_token_cache(None)
         
         # Extended deal keywords with categories
         self.deal_keywords = {
@@ -297,21 +300,20 @@ class DealSourcingAlerts:
     def test_alert(self, alert: Alert) -> pd.DataFrame:
         """Test an alert against current data"""
         try:
+            # Keywords are matched against target and acquirer names through
+            # the deals full-text index
+            match = fts_query(alert.keywords)
+            if match is None:
+                return pd.DataFrame()
+            
             conn = sqlite3.connect(self.db_path)
             
             # Base query
             query = '''
                 SELECT * FROM deals
-                WHERE (
+                WHERE id IN (SELECT rowid FROM deals_fts WHERE deals_fts MATCH ?)
             '''
             
-            # Add keyword conditions
-            keyword_conditions = []
-            for keyword in alert.keywords:
-                keyword_conditions.append(f"target_name LIKE '%{keyword}%' OR acquirer_name LIKE '%{keyword}%'")
-            
-            query += ' OR '.join(keyword_conditions) + ')'
-            
             # Add filters
             filters = alert.filters
             
@@ -328,7 +330,7 @@ class DealSourcingAlerts:
             # Only recent deals (last 30 days)
             query += " AND announcement_date >= date('now', '-30 days')"
             
-            df = pd.read_sql(query, conn)
+            df = pd.read_sql(query, conn, params=[match])
             conn.close()
             
             return df
@@ -443,16 +445,14 @@ class DealSourcingAlerts:
     def search_deals_by_keywords(self, keywords: List[str], filters: Dict = None) -> pd.DataFrame:
         """Search deals by keywords with optional filters"""
         try:
+            match = fts_query(keywords)
+            if match is None:
+                return pd.DataFrame()
+            
             conn = sqlite3.connect(self.db_path)
             
             # Build search query
-            query = 'SELECT * FROM deals WHERE ('
-            
-            keyword_conditions = []
-            for keyword in keywords:
-                keyword_conditions.append(f"target_name LIKE '%{keyword}%' OR acquirer_name LIKE '%{keyword}%'")
-            
-            query += ' OR '.join(keyword_conditions) + ')'
+            query = 'SELECT * FROM deals WHERE id IN (SELECT rowid FROM deals_fts WHERE deals_fts MATCH ?)'
             
             # Apply filters if provided
             if filters:
@@ -474,7 +474,7 @@ class DealSourcingAlerts:
             
             query += ' ORDER BY announcement_date DESC'
             
-            df = pd.read_sql(query, conn)
+            df = pd.read_sql(query, conn, params=[match])
             conn.close()
             
             return df
@@ -483,6 +483,31 @@ class DealSourcingAlerts:
             st.error(f"Error searching deals: {str(e)}")
             return pd.DataFrame()
     
+    def search_press_releases_by_keywords(self, keywords: List[str], since_id: int = 0) -> pd.DataFrame:
+        """
+        Stored press releases matching keywords in their company, title or
+        content, imported after since_id (the last id an alert run saw)
+        """
+        try:
+            match = fts_query(keywords)
+            if match is None:
+                return pd.DataFrame()
+            
+            conn = sqlite3.connect(self.db_path)
+            df = pd.read_sql('''
+                SELECT id, company_name, title, date, sentiment, deal_mentions, red_flags
+                FROM press_releases
+                WHERE id > ? AND id IN (SELECT rowid FROM press_releases_fts WHERE press_releases_fts MATCH ?)
+                ORDER BY id
+            ''', conn, params=[since_id, match])
+            conn.close()
+            
+            return df
+            
+        except Exception as e:
+            st.error(f"Error searching press releases: {str(e)}")
+            return pd.DataFrame()
+    
     def get_trending_keywords(self, days: int = 30) -> Dict[str, int]:
         """Get trending keywords from recent deals"""
         try:
@@ -491,11 +516,12 @@ class DealSourcingAlerts:
             if recent_deals.empty:
                 return {}
             
-            # Combine target and acquirer names
-            all_text = ' '.join(recent_deals['target_name'].fillna('').astype(str) + ' ' + 
-                              recent_deals['acquirer_name'].fillna('').astype(str))
+            # Combine target and acquirer names; repeated deals reuse cached tokens
+            deal_text = recent_deals['target_name'].fillna('').astype(str) + ' ' + \
+                recent_deals['acquirer_name'].fillna('').astype(str)
+            tokens = self.token_cache.tokens(deal_text)
             
-            # Count keyword occurrences
+            # Count whole-word keyword occurrences
             keyword_counts = {}
             all_keywords = []
             
@@ -503,7 +529,8 @@ class DealSourcingAlerts:
                 all_keywords.extend(keywords)
             
             for keyword in all_keywords:
-                count = len(re.findall(keyword.lower(), all_text.lower()))
+                key = keyword_tokens(keyword)
+                count = sum(keyword_count(document, key) for document in tokens)
                 if count > 0:
                     keyword_counts[keyword] = count
             
@@ -7,7 +7,51 @@ from typing import Dict, List, Optional, Tuple
 import re
 from pathlib import Path
 import sqlite3
+import time
 from io import BytesIO
+import psutil
+from text_enrichment import TextEnricher
+from import_registry import ImportRegistry
+from data_normalization import DateFormatRegistry, parse_money
+from analytics_snapshot import SNAPSHOT_TABLES, AnalyticsSnapshot, create_change_tracking
+from excel_streaming import iter_workbook_chunks, read_workbook
+from import_jobs import get_import_job_queue
+from data_validation import VALIDATION_SAMPLE_SIZE, validate_frame
+from filing_store import FilingBlobStore, create_blob_table
+from column_mapping import compile_mapping, frame_records
+from search_index import SearchIndex, column_query, create_search_index, sync_filings_index
+from write_buffer import get_write_buffer
+from company_entities import assign_entity_ids, create_entity_tables, record_entity_ids
+from deal_links import DealLinker, create_deal_parties
+from table_stats import create_table_stats, read_table_stats
+from sentiment import SentimentScorer, weighted_lexicon
+from token_cache import create_token_cache, get_token_cache
+from frame_dtypes import compact_frame
+from json_streaming import is_json_lines, iter_json_lines_chunks, read_json_lines
+
+# Rows per chunk for streaming imports; bounds memory per Streamlit session
+DEFAULT_CHUNK_SIZE = 50000
+
+# Table each data source is imported into
+SOURCE_TABLES = {
+    'mergermarket': 'deals',
+    'preqin': 'deals',
+    'index_constituents': 'companies',
+    'sec_filings': 'filings',
+    'press_releases': 'press_releases'
+}
+
+def process_memory_mb() -> float:
+    """Resident memory of this process and its worker processes in MB"""
+    process = psutil.Process()
+    rss = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            rss += child.memory_info().rss
+        except psutil.Error:
+            # Workers can exit between listing and sampling
+            pass
+    return rss / (1024 * 1024)
 
 class EnhancedDataIngestion:
     """
@@ -15,32 +59,78 @@ class EnhancedDataIngestion:
     Supports manual imports from Mergermarket, Preqin, SEC filings, and index data
     """
     
-    def __init__(self, db_path: str = "market_intelligence.db", auto_init: bool = True):
+    def __init__(self, db_path: str = "market_intelligence.db", auto_init: bool = True,
+                 enrichment_workers: Optional[int] = None, excel_workers: Optional[int] = None):
         self.db_path = db_path
+        # Process pool size for content enrichment (None = one per CPU, 1 = serial)
+        self.enrichment_workers = enrichment_workers
+        # Worker processes parsing Excel sheets in parallel (None = one per CPU, 1 = serial)
+        self.excel_workers = excel_workers
+        self.import_registry = ImportRegistry(db_path)
+        self.date_formats = DateFormatRegistry(db_path)
+        self.analytics_snapshot = AnalyticsSnapshot(db_path)
+        self.filing_store = FilingBlobStore(db_path)
+        self.search_index = SearchIndex(db_path)
+        self._column_mappings = {}
+        # Company hash used to link deal parties, extended as companies are imported
+        self.deal_linker = DealLinker()
+        # Document tokens by content hash, shared with the alert system
+        self.token_cache = get_token_cache(db_path)
         if auto_init:
             self.init_database()
         
-        # Predefined schemas for different data sources
+        # Predefined schemas for different data sources; column_rules are
+        # checked row by row on processed data, with the raw values deciding
+        # which cells were present (see data_validation)
+        ticker_pattern = r'[A-Za-z0-9]{1,8}(?:[.\-/][A-Za-z0-9]{1,4})?'
         self.data_schemas = {
             'mergermarket': {
                 'required_columns': ['deal_id', 'target_name', 'acquirer_name', 'deal_value', 'announcement_date'],
-                'optional_columns': ['industry', 'sector', 'geography', 'deal_type', 'status', 'completion_date']
+                'optional_columns': ['industry', 'sector', 'geography', 'deal_type', 'status', 'completion_date'],
+                'column_rules': {
+                    'deal_id': {'max_length': 64},
+                    'target_name': {'required': True},
+                    'deal_value': {'type': 'number', 'min': 0, 'max': 5000000},
+                    'announcement_date': {'type': 'date', 'min': '1900-01-01', 'max_future_days': 366},
+                    'completion_date': {'type': 'date', 'min': '1900-01-01', 'max_future_days': 3660}
+                }
             },
             'preqin': {
                 'required_columns': ['fund_name', 'target_company', 'investment_amount', 'investment_date'],
-                'optional_columns': ['fund_type', 'industry', 'geography', 'stage', 'exit_date', 'exit_value']
+                'optional_columns': ['fund_type', 'industry', 'geography', 'stage', 'exit_date', 'exit_value'],
+                'column_rules': {
+                    'investment_amount': {'type': 'number', 'min': 0, 'max': 5000000},
+                    'exit_value': {'type': 'number', 'min': 0, 'max': 5000000},
+                    'investment_date': {'type': 'date', 'min': '1900-01-01', 'max_future_days': 366},
+                    'exit_date': {'type': 'date', 'min': '1900-01-01', 'max_future_days': 3660}
+                }
             },
             'sec_filings': {
                 'required_columns': ['company_name', 'filing_type', 'filing_date', 'content'],
-                'optional_columns': ['cik', 'ticker', 'form_type', 'url']
+                'optional_columns': ['cik', 'ticker', 'form_type', 'url'],
+                'column_rules': {
+                    'company_name': {'required': True},
+                    'filing_date': {'type': 'date', 'min': '1993-01-01', 'max_future_days': 1},
+                    'cik': {'pattern': r'\d{1,10}'},
+                    'ticker': {'pattern': ticker_pattern}
+                }
             },
             'index_constituents': {
                 'required_columns': ['company_name', 'ticker', 'index_name'],
-                'optional_columns': ['sector', 'industry', 'market_cap', 'weight', 'country']
+                'optional_columns': ['sector', 'industry', 'market_cap', 'weight', 'country'],
+                'column_rules': {
+                    'company_name': {'required': True},
+                    'ticker': {'pattern': ticker_pattern},
+                    'market_cap': {'type': 'number', 'min': 0},
+                    'weight': {'type': 'number', 'min': 0, 'max': 100}
+                }
             },
             'press_releases': {
                 'required_columns': ['company_name', 'title', 'date', 'content'],
-                'optional_columns': ['source', 'url', 'sentiment', 'keywords']
+                'optional_columns': ['source', 'url', 'sentiment', 'keywords'],
+                'column_rules': {
+                    'date': {'type': 'date', 'min': '1900-01-01', 'max_future_days': 1}
+                }
             }
         }
         
@@ -58,6 +148,17 @@ class EnhancedDataIngestion:
             'strategic partnership', 'joint venture', 'divestiture', 'spin-off',
             'IPO', 'going private', 'tender offer', 'bid', 'purchase'
         ]
+        
+        # Sentiment lexicons
+        self.positive_words = ['growth', 'expansion', 'success', 'strong', 'positive', 'good']
+        self.negative_words = ['decline', 'loss', 'weak', 'negative', 'poor', 'difficult']
+        # Per-word weights overriding the +1/-1 lexicon entries or adding new terms
+        self.sentiment_weights: Dict[str, float] = {}
+        
+        self._text_enricher = None
+        self._text_enricher_key = None
+        self._sentiment_scorer = None
+        self._sentiment_scorer_key = None
     
     def init_database(self):
         """Initialize SQLite database with required tables"""
@@ -115,7 +216,7 @@ class EnhancedDataIngestion:
                 ticker TEXT,
                 filing_type TEXT,
                 filing_date DATE,
-                content TEXT,
+                content_hash TEXT,
                 red_flags TEXT,
                 deal_mentions TEXT,
                 source TEXT,
@@ -124,6 +225,33 @@ class EnhancedDataIngestion:
             )
         ''')
         
+        # Press releases, stored with their enrichment so alerts and due
+        # diligence can query them without reprocessing uploads
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS press_releases (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                company_name TEXT,
+                title TEXT,
+                date DATE,
+                content TEXT,
+                url TEXT,
+                source TEXT,
+                sentiment TEXT,
+                sentiment_score REAL,
+                keywords TEXT,
+                deal_mentions TEXT,
+                red_flags TEXT,
+                import_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Databases created before numeric sentiment scores
+        if 'sentiment_score' not in [row[1] for row in cursor.execute("PRAGMA table_info(press_releases)")]:
+            cursor.execute("ALTER TABLE press_releases ADD COLUMN sentiment_score REAL")
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_press_releases_company ON press_releases(company_name)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_press_releases_date ON press_releases(date)")
+        
         # Alerts table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS alerts (
@@ -151,9 +279,171 @@ class EnhancedDataIngestion:
             )
         ''')
         
+        # Import registry: fingerprints of imported files and rows
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS import_registry (
+                file_hash TEXT,
+                data_source TEXT,
+                file_name TEXT,
+                row_count INTEGER,
+                imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (file_hash, data_source)
+            )
+        ''')
+        
+        # Registries keyed by file hash alone are rekeyed, so one file can be
+        # registered under each data source it was imported as
+        if [row[1] for row in cursor.execute("PRAGMA table_info(import_registry)") if row[5]] == ['file_hash']:
+            cursor.execute("ALTER TABLE import_registry RENAME TO import_registry_old")
+            cursor.execute('''
+                CREATE TABLE import_registry (
+                    file_hash TEXT,
+                    data_source TEXT,
+                    file_name TEXT,
+                    row_count INTEGER,
+                    imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (file_hash, data_source)
+                )
+            ''')
+            cursor.execute("INSERT INTO import_registry SELECT file_hash, data_source, file_name, row_count, imported_at FROM import_registry_old")
+            cursor.execute("DROP TABLE import_registry_old")
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS import_row_hashes (
+                data_source TEXT,
+                row_hash INTEGER,
+                PRIMARY KEY (data_source, row_hash)
+            ) WITHOUT ROWID
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS import_bloom_filters (
+                data_source TEXT PRIMARY KEY,
+                num_bits INTEGER,
+                num_hashes INTEGER,
+                item_count INTEGER,
+                bits BLOB,
+                registered INTEGER
+            )
+        ''')
+        
+        # Databases created before filters recorded the registered count they
+        # cover; their filters are rebuilt before the next import
+        if 'registered' not in [row[1] for row in cursor.execute("PRAGMA table_info(import_bloom_filters)")]:
+            cursor.execute("ALTER TABLE import_bloom_filters ADD COLUMN registered INTEGER")
+        
+        # Row hashes registered per data source, updated with each batch of hashes;
+        # a Bloom filter covering fewer rows is stale
+        counts_exist = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'import_row_counts'"
+        ).fetchone()
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS import_row_counts (
+                data_source TEXT PRIMARY KEY,
+                registered INTEGER NOT NULL
+            )
+        ''')
+        if not counts_exist:
+            cursor.execute('''
+                INSERT INTO import_row_counts (data_source, registered)
+                SELECT data_source, COUNT(*) FROM import_row_hashes GROUP BY data_source
+            ''')
+        
+        # Date formats inferred per data source column, reused on later imports
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS date_formats (
+                data_source TEXT,
+                column_name TEXT,
+                date_format TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (data_source, column_name)
+            )
+        ''')
+        
+        # Background import jobs, polled by the upload page
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS import_jobs (
+                job_id TEXT PRIMARY KEY,
+                user_id TEXT,
+                data_source TEXT,
+                file_format TEXT,
+                file_name TEXT,
+                file_path TEXT,
+                file_hash TEXT,
+                chunk_size INTEGER,
+                status TEXT DEFAULT 'queued',
+                total_rows INTEGER,
+                rows_processed INTEGER DEFAULT 0,
+                rows_per_second REAL,
+                cancel_requested INTEGER DEFAULT 0,
+                error TEXT,
+                result TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP,
+                owner_id TEXT,
+                heartbeat_at TIMESTAMP
+            )
+        ''')
+        
+        job_columns = [row[1] for row in cursor.execute("PRAGMA table_info(import_jobs)")]
+        for column, column_type in (('owner_id', 'TEXT'), ('heartbeat_at', 'TIMESTAMP')):
+            if column not in job_columns:
+                cursor.execute(f"ALTER TABLE import_jobs ADD COLUMN {column} {column_type}")
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_import_jobs_status ON import_jobs(status, user_id)")
+        
+        # Files imported by the watch-folder daemon (run.py --ingest-daemon)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ingest_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                file_name TEXT,
+                data_source TEXT,
+                status TEXT,
+                records INTEGER,
+                rejected INTEGER,
+                skipped INTEGER,
+                rows_per_second REAL,
+                elapsed_seconds REAL,
+                error TEXT,
+                archived_path TEXT,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP
+            )
+        ''')
+        
+        # Dirty-partition triggers for the columnar analytics snapshot
+        create_change_tracking(cursor)
+        
+        # Filing bodies are stored compressed outside the filings table
+        migrated_content = create_blob_table(cursor)
+        
+        # Canonical company ids on deals, filings, press releases and companies
+        create_entity_tables(cursor)
+        
+        # Deal targets and acquirers linked to the companies table
+        create_deal_parties(cursor)
+        
+        # Full-text indexes over filings, press releases and deal parties
+        create_search_index(cursor)
+        
+        # Row counts and latest import times for the data status panel
+        create_table_stats(cursor)
+        
+        # Document tokens shared by enrichment, sentiment and alerts
+        create_token_cache(cursor)
+        
         conn.commit()
+        if migrated_content:
+            # Return the pages freed by the inline bodies to the filesystem
+            conn.execute("VACUUM")
         conn.close()
     
+    @property
+    def job_queue(self):
+        """Process-wide background import queue for this database"""
+        return get_import_job_queue(self)
+    
     def upload_file_interface(self):
         """Streamlit interface for file uploads"""
         st.subheader("📁 Data Upload & Import")
@@ -170,19 +460,50 @@ class EnhancedDataIngestion:
         with col2:
             file_format = st.selectbox(
                 "File Format",
-                ["CSV", "Excel (.xlsx)", "JSON"]
+                ["CSV", "Excel (.xlsx)", "JSON", "JSON Lines"]
             )
         
         uploaded_file = st.file_uploader(
             f"Upload {data_source} {file_format} file",
-            type=['csv', 'xlsx', 'json'],
+            type=['csv', 'xlsx', 'json', 'jsonl', 'ndjson'],
             help=f"Upload {file_format} file containing {data_source} data"
         )
         
+        streaming_mode = st.checkbox(
+            "Streaming import (large files)",
+            help="Read, process and import the file in fixed-size chunks instead of loading it all at once"
+        )
+        
+        file_hash = None
+        previous_import = None
         if uploaded_file is not None:
+            # Identical re-uploads short-circuit before any parsing
+            file_hash = self.import_registry.file_fingerprint(uploaded_file)
+            previous_import = self.import_registry.lookup_file(file_hash, data_source.lower().replace(' ', '_'))
+            if previous_import is not None:
+                st.info(
+                    f"This file was already imported on {str(previous_import['imported_at'])[:16]} "
+                    f"({previous_import['row_count']} records). Nothing new to import."
+                )
+        
+        if uploaded_file is not None and previous_import is None and streaming_mode:
+            self.streaming_import_interface(uploaded_file, data_source.lower().replace(' ', '_'), file_format, file_hash)
+        elif uploaded_file is not None and previous_import is None:
             try:
-                # Process the uploaded file
-                df = self.process_uploaded_file(uploaded_file, data_source.lower().replace(' ', '_'), file_format)
+                # Read the file and drop rows imported by earlier uploads
+                raw_df = self.read_uploaded_file(uploaded_file, file_format)
+                total_rows = len(raw_df)
+                raw_df, row_hashes = self.import_registry.filter_unseen(raw_df, data_source.lower().replace(' ', '_'))
+                
+                if len(raw_df) < total_rows:
+                    st.info(f"{total_rows - len(raw_df)} of {total_rows} records were already imported and will be skipped.")
+                if total_rows and raw_df.empty:
+                    st.success("All records in this file have already been imported.")
+                
+                # Process only the new rows; the preview is held in compact dtypes
+                # (the import itself re-reads the file in the background)
+                raw_values = self.rule_columns(raw_df, data_source.lower().replace(' ', '_'))
+                df = compact_frame(self.apply_source_transform(raw_df, data_source.lower().replace(' ', '_')))
                 
                 if df is not None and not df.empty:
                     st.success(f"File uploaded successfully! {len(df)} records found.")
@@ -192,7 +513,9 @@ class EnhancedDataIngestion:
                     st.dataframe(df.head(10))
                     
                     # Validation
-                    validation_result = self.validate_data_schema(df, data_source.lower().replace(' ', '_'))
+                    validation_result = self.validate_data_schema(
+                        df, data_source.lower().replace(' ', '_'), sample_size=VALIDATION_SAMPLE_SIZE, raw=raw_values
+                    )
                     
                     if validation_result['valid']:
                         st.success("✅ Data schema validation passed")
@@ -200,17 +523,30 @@ class EnhancedDataIngestion:
                         st.warning("⚠️ Data schema validation issues:")
                         for issue in validation_result['issues']:
                             st.write(f"- {issue}")
+                        if validation_result['rule_failures']:
+                            st.caption("Records failing row checks are skipped on import and counted as rejected.")
+                    
+                    source_key = data_source.lower().replace(' ', '_')
+                    if source_key in SOURCE_TABLES:
+                        conn = sqlite3.connect(self.db_path)
+                        mapping = self.get_column_mapping(conn, source_key)
+                        conn.close()
+                        unmapped = [col for col in mapping.unmapped if col in df.columns]
+                        if unmapped:
+                            st.caption(f"Not stored in the {mapping.table} table: {', '.join(unmapped)}")
                     
                     # Import options
                     col1, col2, col3 = st.columns(3)
                     
                     with col1:
                         if st.button("Import Data"):
-                            result = self.import_to_database(df, data_source.lower().replace(' ', '_'))
-                            if result['success']:
-                                st.success(f"✅ Imported {result['records']} records successfully!")
-                            else:
-                                st.error(f"❌ Import failed: {result['error']}")
+                            # Imported in the background; progress is shown under Import Jobs
+                            self.job_queue.submit(
+                                uploaded_file, data_source.lower().replace(' ', '_'), file_format,
+                                st.session_state.get('user_id', 'demo_user'),
+                                file_hash=file_hash, total_rows=total_rows
+                            )
+                            st.success("✅ Import queued")
                     
                     with col2:
                         if st.button("Download Template"):
@@ -235,39 +571,262 @@ class EnhancedDataIngestion:
             except Exception as e:
                 st.error(f"Error processing file: {str(e)}")
         
+        # Background imports for this user
+        self.import_jobs_interface()
+        
         # Manual data entry section
         self.manual_data_entry_interface(data_source.lower().replace(' ', '_'))
     
+    def streaming_import_interface(self, uploaded_file, data_source: str, file_format: str,
+                                   file_hash: Optional[str] = None):
+        """Streamlit interface for chunked streaming imports"""
+        chunk_size = st.number_input(
+            "Chunk size (rows)",
+            min_value=1000,
+            max_value=1000000,
+            value=DEFAULT_CHUNK_SIZE,
+            step=10000
+        )
+        
+        if st.button("Stream Import"):
+            self.job_queue.submit(
+                uploaded_file, data_source, file_format,
+                st.session_state.get('user_id', 'demo_user'),
+                file_hash=file_hash, chunk_size=int(chunk_size)
+            )
+            st.success("✅ Import queued")
+    
+    def import_jobs_interface(self):
+        """Streamlit panel listing the user's background imports, with cancellation"""
+        user_id = st.session_state.get('user_id', 'demo_user')
+        
+        def render_jobs():
+            jobs = self.job_queue.list_jobs(user_id, limit=10)
+            if not jobs:
+                return
+            
+            st.subheader("⏳ Import Jobs")
+            for job in jobs:
+                col1, col2 = st.columns([4, 1])
+                with col1:
+                    label = f"**{job['file_name'] or job['data_source']}** ({job['data_source']}): {job['status']}"
+                    if job['status'] == 'running':
+                        details = f"{job['rows_processed']:,} records, {job['rows_per_second'] or 0:,.0f} rows/s"
+                        if job['eta_seconds'] is not None:
+                            details += f", about {job['eta_seconds']:.0f}s left"
+                            st.progress(min(job['rows_processed'] / job['total_rows'], 1.0), text=f"{label} - {details}")
+                        else:
+                            st.write(f"{label} - {details}")
+                    elif job['status'] == 'failed':
+                        st.write(f"{label} - {job['error']}")
+                    elif job['status'] in ('completed', 'cancelled'):
+                        summary = json.loads(job['result']) if job['result'] else {}
+                        details = f"{job['rows_processed']:,} records"
+                        if summary.get('rejected'):
+                            details += f", {summary['rejected']:,} rejected by validation"
+                        st.write(f"{label} - {details}")
+                    else:
+                        st.write(label)
+                with col2:
+                    if job['status'] in ('queued', 'running') and not job['cancel_requested']:
+                        if st.button("Cancel", key=f"cancel_{job['job_id']}"):
+                            self.job_queue.cancel(job['job_id'])
+        
+        # Re-render every few seconds where fragments are available, without
+        # rerunning (and interrupting) the rest of the page
+        fragment = getattr(st, 'fragment', None)
+        if fragment is not None:
+            fragment(run_every=2)(render_jobs)()
+        else:
+            render_jobs()
+            st.button("🔄 Refresh jobs")
+    
     def process_uploaded_file(self, uploaded_file, data_source: str, file_format: str) -> pd.DataFrame:
         """Process uploaded file based on format and source"""
         try:
-            if file_format == "CSV":
-                df = pd.read_csv(uploaded_file)
-            elif file_format == "Excel (.xlsx)":
-                df = pd.read_excel(uploaded_file)
-            elif file_format == "JSON":
-                df = pd.read_json(uploaded_file)
+            df = self.read_uploaded_file(uploaded_file, file_format)
+            # Held in memory rather than written, so it takes the compact dtypes
+            return compact_frame(self.apply_source_transform(df, data_source))
             
-            # Clean and standardize column names
-            df.columns = df.columns.str.lower().str.replace(' ', '_').str.replace('-', '_')
+        except Exception as e:
+            st.error(f"Error processing file: {str(e)}")
+            return None
+    
+    def read_uploaded_file(self, uploaded_file, file_format: str) -> pd.DataFrame:
+        """Read an uploaded file into a frame with standardized column names"""
+        if file_format == "CSV":
+            df = pd.read_csv(uploaded_file)
+        elif file_format == "Excel (.xlsx)":
+            # Streamed in read-only mode; every sheet is read
+            df = read_workbook(uploaded_file, workers=self.excel_workers)
+        elif file_format == "JSON Lines" or (file_format == "JSON" and is_json_lines(uploaded_file)):
+            df = read_json_lines(uploaded_file)
+        elif file_format == "JSON":
+            df = pd.read_json(uploaded_file)
+        else:
+            raise ValueError(f"Unsupported file format: {file_format}")
+        
+        return self.standardize_columns(df)
+    
+    def standardize_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Clean and standardize column names"""
+        df.columns = df.columns.str.lower().str.replace(' ', '_').str.replace('-', '_')
+        return df
+    
+    def apply_source_transform(self, df: pd.DataFrame, data_source: str) -> pd.DataFrame:
+        """Run the data source specific processing step"""
+        if data_source == 'mergermarket':
+            df = self.process_mergermarket_data(df)
+        elif data_source == 'preqin':
+            df = self.process_preqin_data(df)
+        elif data_source == 'sec_filings':
+            df = self.process_sec_filings(df)
+        elif data_source == 'index_constituents':
+            df = self.process_index_data(df)
+        elif data_source == 'press_releases':
+            df = self.process_press_releases(df)
+        
+        return df
+    
+    def iter_file_chunks(self, uploaded_file, file_format: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """Yield raw DataFrame chunks of at most chunk_size rows"""
+        if file_format == "CSV":
+            with pd.read_csv(uploaded_file, chunksize=chunk_size) as reader:
+                for chunk in reader:
+                    yield chunk
+        elif file_format == "Excel (.xlsx)":
+            # Rows of every sheet are streamed; sheets are parsed in parallel
+            for _, chunk in iter_workbook_chunks(uploaded_file, chunk_size, self.excel_workers):
+                yield chunk
+        elif file_format == "JSON Lines" or (file_format == "JSON" and is_json_lines(uploaded_file)):
+            # Line-delimited records are parsed a chunk at a time, also when
+            # a feed dump is named .json
+            yield from iter_json_lines_chunks(uploaded_file, chunk_size)
+        elif file_format == "JSON":
+            # A single JSON document has no chunked mode; slice the parsed frame
+            df = pd.read_json(uploaded_file)
+            for start in range(0, len(df), chunk_size):
+                yield df.iloc[start:start + chunk_size].copy()
+        else:
+            raise ValueError(f"Unsupported file format: {file_format}")
+    
+    def prepare_chunk(self, chunk: pd.DataFrame, data_source: str,
+                      skip_seen_rows: bool = False) -> Tuple[pd.DataFrame, Optional[np.ndarray], int]:
+        """
+        Standardize, deduplicate, transform and validate one raw chunk.
+        Returns the rows to write, their registry hashes (with skip_seen_rows)
+        and the number of rows rejected by the column rules.
+        """
+        chunk = self.standardize_columns(chunk)
+        
+        row_hashes = None
+        if skip_seen_rows:
+            chunk, row_hashes = self.import_registry.filter_unseen(chunk, data_source)
+        if chunk.empty:
+            return chunk, row_hashes, 0
+        
+        raw_values = self.rule_columns(chunk, data_source)
+        chunk = self.apply_source_transform(chunk, data_source)
+        
+        # Rows failing the column rules are dropped instead of failing the import
+        rejected_rows = self.validate_data_schema(chunk, data_source, raw=raw_values)['row_errors'].index
+        if len(rejected_rows):
+            accepted = ~chunk.index.isin(rejected_rows)
+            chunk = chunk[accepted]
+            if row_hashes is not None:
+                row_hashes = row_hashes[accepted]
+        return chunk, row_hashes, len(rejected_rows)
+    
+    def stream_import_file(self, uploaded_file, data_source: str, file_format: str,
+                           chunk_size: int = DEFAULT_CHUNK_SIZE, progress_callback=None,
+                           skip_seen_rows: bool = False, file_hash: Optional[str] = None,
+                           file_name: Optional[str] = None) -> Dict:
+        """
+        Import a file chunk by chunk: read, transform and write each chunk
+        before reading the next, so memory stays bounded by chunk_size.
+        
+        progress_callback(rows_processed, elapsed_seconds) is called after each
+        chunk; returning False stops the import after the current chunk.
+        The result reports throughput and the peak resident memory sampled
+        after each chunk (including Excel sheet workers).
+        Rows failing the schema's column rules are left out and counted as
+        rejected. With skip_seen_rows, rows already in the import registry are
+        dropped before processing; file_hash registers the file once fully imported
+        (under file_name, defaulting to the upload's own name).
+        """
+        start_time = time.perf_counter()
+        rows_read = 0
+        rows = 0
+        chunks = 0
+        rejected = 0
+        cancelled = False
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        peak_memory_mb = process_memory_mb()
+        conn = None
+        
+        try:
+            conn = sqlite3.connect(self.db_path)
+            if skip_seen_rows:
+                self.import_registry.begin_file(data_source)
             
-            # Data source specific processing
-            if data_source == 'mergermarket':
-                df = self.process_mergermarket_data(df)
-            elif data_source == 'preqin':
-                df = self.process_preqin_data(df)
-            elif data_source == 'sec_filings':
-                df = self.process_sec_filings(df)
-            elif data_source == 'index_constituents':
-                df = self.process_index_data(df)
-            elif data_source == 'press_releases':
-                df = self.process_press_releases(df)
+            for chunk in self.iter_file_chunks(uploaded_file, file_format, chunk_size):
+                rows_read += len(chunk)
+                chunk, row_hashes, chunk_rejected = self.prepare_chunk(chunk, data_source, skip_seen_rows)
+                rejected += chunk_rejected
+                
+                if not chunk.empty:
+                    for key, value in self.write_frame(conn, chunk, data_source).items():
+                        counts[key] += value
+                    if row_hashes is not None:
+                        self.import_registry.register_rows(data_source, row_hashes)
+                
+                rows += len(chunk)
+                chunks += 1
+                peak_memory_mb = max(peak_memory_mb, process_memory_mb())
+                
+                if progress_callback is not None:
+                    if progress_callback(rows_read, time.perf_counter() - start_time) is False:
+                        cancelled = True
+                        break
             
-            return df
+            if file_hash and not cancelled and (counts['inserted'] or counts['updated'] or counts['unchanged']):
+                if file_name is None:
+                    file_name = uploaded_file if isinstance(uploaded_file, str) else getattr(uploaded_file, 'name', None)
+                self.import_registry.register_file(file_hash, data_source, str(Path(file_name).name) if file_name else None, rows_read)
+            
+            elapsed = time.perf_counter() - start_time
+            result = {
+                'success': True,
+                'records': rows,
+                'skipped': rows_read - rows - rejected,
+                'rejected': rejected,
+                'chunks': chunks,
+                'cancelled': cancelled,
+                'elapsed': elapsed,
+                'rows_per_second': rows_read / elapsed if elapsed > 0 else 0.0,
+                'peak_memory_mb': peak_memory_mb,
+                **counts,
+                'message': f'Successfully imported {rows} records in {chunks} chunks'
+            }
+            
+            # One snapshot refresh per file, after the last chunk is written
+            snapshot_error = self.refresh_analytics_snapshot(data_source)
+            if snapshot_error:
+                result['snapshot_error'] = snapshot_error
+            return result
             
         except Exception as e:
-            st.error(f"Error processing file: {str(e)}")
-            return None
+            return {
+                'success': False,
+                'records': rows,
+                'chunks': chunks,
+                'error': str(e)
+            }
+        finally:
+            if conn is not None:
+                conn.close()
+            # The Bloom filter is written once per file, including cancelled and failed imports
+            self.import_registry.save_bloom_filters()
     
     def process_mergermarket_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """Process Mergermarket specific data"""
@@ -275,12 +834,11 @@ class EnhancedDataIngestion:
         date_columns = ['announcement_date', 'completion_date', 'expected_completion']
         for col in date_columns:
             if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
+                df[col] = self.date_formats.parse(df[col], 'mergermarket', col)
         
         # Clean deal values
         if 'deal_value' in df.columns:
-            df['deal_value'] = df['deal_value'].astype(str).str.replace('$', '').str.replace(',', '')
-            df['deal_value'] = pd.to_numeric(df['deal_value'], errors='coerce')
+            df['deal_value'] = parse_money(df['deal_value'])
         
         # Add metadata
         df['source'] = 'Mergermarket'
@@ -294,14 +852,13 @@ class EnhancedDataIngestion:
         date_columns = ['investment_date', 'exit_date', 'fund_vintage']
         for col in date_columns:
             if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors='coerce')
+                df[col] = self.date_formats.parse(df[col], 'preqin', col)
         
         # Clean investment amounts
         amount_columns = ['investment_amount', 'exit_value', 'fund_size']
         for col in amount_columns:
             if col in df.columns:
-                df[col] = df[col].astype(str).str.replace('$', '').str.replace(',', '')
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+                df[col] = parse_money(df[col])
         
         df['source'] = 'Preqin'
         df['import_date'] = datetime.now()
@@ -311,12 +868,14 @@ class EnhancedDataIngestion:
     def process_sec_filings(self, df: pd.DataFrame) -> pd.DataFrame:
         """Process SEC filings data"""
         if 'filing_date' in df.columns:
-            df['filing_date'] = pd.to_datetime(df['filing_date'], errors='coerce')
+            df['filing_date'] = self.date_formats.parse(df['filing_date'], 'sec_filings', 'filing_date')
         
-        # Extract red flags and deal mentions from content
+        # Extract red flags and deal mentions from the cached tokens of the content
         if 'content' in df.columns:
-            df['red_flags'] = df['content'].apply(self.extract_red_flags)
-            df['deal_mentions'] = df['content'].apply(self.extract_deal_mentions)
+            tokens = self.token_cache.tokens(df['content'], workers=self.enrichment_workers)
+            enriched = self.get_text_enricher().enrich_token_series(tokens, df.index)
+            df['red_flags'] = enriched['red_flags']
+            df['deal_mentions'] = enriched['deal_mentions']
         
         df['source'] = 'SEC EDGAR'
         df['import_date'] = datetime.now()
@@ -325,10 +884,9 @@ class EnhancedDataIngestion:
     
     def process_index_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """Process index constituent data"""
-        # Clean market cap values
+        # Clean market cap values ("1.5B" is stored as 1500, in $M)
         if 'market_cap' in df.columns:
-            df['market_cap'] = df['market_cap'].astype(str).str.replace('$', '').str.replace('B', '000000000').str.replace('M', '000000')
-            df['market_cap'] = pd.to_numeric(df['market_cap'], errors='coerce')
+            df['market_cap'] = parse_money(df['market_cap'])
         
         df['source'] = 'Index Data'
         df['import_date'] = datetime.now()
@@ -338,60 +896,77 @@ class EnhancedDataIngestion:
     def process_press_releases(self, df: pd.DataFrame) -> pd.DataFrame:
         """Process press release data"""
         if 'date' in df.columns:
-            df['date'] = pd.to_datetime(df['date'], errors='coerce')
+            df['date'] = self.date_formats.parse(df['date'], 'press_releases', 'date')
         
-        # Extract keywords and sentiment
+        # Keywords and sentiment are both scored from the cached tokens
         if 'content' in df.columns:
-            df['deal_mentions'] = df['content'].apply(self.extract_deal_mentions)
-            df['red_flags'] = df['content'].apply(self.extract_red_flags)
-            df['sentiment'] = df['content'].apply(self.analyze_sentiment)
+            tokens = self.token_cache.tokens(df['content'], workers=self.enrichment_workers)
+            enriched = self.get_text_enricher().enrich_token_series(tokens, df.index)
+            df['deal_mentions'] = enriched['deal_mentions']
+            df['red_flags'] = enriched['red_flags']
+            scored = self.get_sentiment_scorer().score_token_series(tokens, df.index)
+            df['sentiment_score'] = scored['sentiment_score']
+            df['sentiment'] = scored['sentiment']
         
         df['source'] = 'Press Release'
         df['import_date'] = datetime.now()
         
         return df
     
+    def get_text_enricher(self) -> TextEnricher:
+        """Return the keyword matcher, rebuilding it only when a keyword list changes"""
+        key = (tuple(self.red_flag_keywords), tuple(self.deal_keywords))
+        if self._text_enricher is None or self._text_enricher_key != key:
+            self._text_enricher = TextEnricher(self.red_flag_keywords, self.deal_keywords)
+            self._text_enricher_key = key
+        return self._text_enricher
+    
+    def get_sentiment_scorer(self) -> SentimentScorer:
+        """Return the sentiment scorer, rebuilding it only when the lexicon or weights change"""
+        key = (
+            tuple(self.positive_words), tuple(self.negative_words),
+            tuple(sorted(self.sentiment_weights.items()))
+        )
+        if self._sentiment_scorer is None or self._sentiment_scorer_key != key:
+            self._sentiment_scorer = SentimentScorer(
+                weighted_lexicon(self.positive_words, self.negative_words, self.sentiment_weights)
+            )
+            self._sentiment_scorer_key = key
+        return self._sentiment_scorer
+    
     def extract_red_flags(self, text: str) -> str:
         """Extract red flag keywords from text"""
-        if pd.isna(text):
-            return ""
-        
-        text_lower = text.lower()
-        found_flags = [flag for flag in self.red_flag_keywords if flag in text_lower]
-        return ", ".join(found_flags)
+        return self.get_text_enricher().enrich_text(text)[0]
     
     def extract_deal_mentions(self, text: str) -> str:
         """Extract deal-related keywords from text"""
-        if pd.isna(text):
-            return ""
-        
-        text_lower = text.lower()
-        found_deals = [keyword for keyword in self.deal_keywords if keyword in text_lower]
-        return ", ".join(found_deals)
+        return self.get_text_enricher().enrich_text(text)[1]
     
     def analyze_sentiment(self, text: str) -> str:
-        """Simple sentiment analysis (placeholder for more sophisticated analysis)"""
-        if pd.isna(text):
-            return "Neutral"
-        
-        positive_words = ['growth', 'expansion', 'success', 'strong', 'positive', 'good']
-        negative_words = ['decline', 'loss', 'weak', 'negative', 'poor', 'difficult']
-        
-        text_lower = text.lower()
-        positive_score = sum(1 for word in positive_words if word in text_lower)
-        negative_score = sum(1 for word in negative_words if word in text_lower)
-        
-        if positive_score > negative_score:
-            return "Positive"
-        elif negative_score > positive_score:
-            return "Negative"
-        else:
-            return "Neutral"
+        """Weighted lexicon sentiment label of one text"""
+        return self.get_sentiment_scorer().score_text(text)[1]
+    
+    def rule_columns(self, df: pd.DataFrame, data_source: str) -> pd.DataFrame:
+        """
+        The columns a source's rules check, as read; taken before
+        apply_source_transform (which parses df in place) for validate_data_schema
+        """
+        column_rules = self.data_schemas.get(data_source, {}).get('column_rules', {})
+        return df[[column for column in df.columns if column in column_rules]]
     
-    def validate_data_schema(self, df: pd.DataFrame, data_source: str) -> Dict:
-        """Validate data against expected schema"""
+    def validate_data_schema(self, df: pd.DataFrame, data_source: str,
+                             sample_size: Optional[int] = None, raw: Optional[pd.DataFrame] = None) -> Dict:
+        """
+        Validate data against expected schema.
+        
+        Column rules run on a random sample of sample_size rows when given
+        (preview feedback) or on every row otherwise, in which case
+        'row_errors' indexes each failing row with a bitmask over 'rules'.
+        raw (from rule_columns) lets values the transform could not parse
+        fail their number and date rules instead of passing as missing.
+        """
         if data_source not in self.data_schemas:
-            return {'valid': True, 'issues': []}
+            return {'valid': True, 'issues': [], 'row_errors': pd.Series(dtype=np.uint64)}
         
         schema = self.data_schemas[data_source]
         issues = []
@@ -407,9 +982,16 @@ class EnhancedDataIngestion:
             if null_values > len(df) * 0.5:
                 issues.append(f"High percentage of missing deal values: {null_values}/{len(df)}")
         
+        # Row-level rules
+        result = validate_frame(df, schema.get('column_rules', {}), sample_size, raw)
+        scope = f"sampled {result['rows_checked']:,}" if result['sampled'] else f"{result['rows_checked']:,}"
+        for rule, count in result['rule_failures'].items():
+            issues.append(f"{rule} ({count:,} of {scope} rows)")
+        
         return {
             'valid': len(issues) == 0,
-            'issues': issues
+            'issues': issues,
+            **result
         }
     
     def get_data_template(self, data_source: str) -> pd.DataFrame:
@@ -428,24 +1010,19 @@ class EnhancedDataIngestion:
         """Import processed data to database"""
         try:
             conn = sqlite3.connect(self.db_path)
-            
-            if data_source in ['mergermarket', 'preqin']:
-                # Import to deals table
-                df.to_sql('deals', conn, if_exists='append', index=False)
-            elif data_source == 'index_constituents':
-                # Import to companies table
-                df.to_sql('companies', conn, if_exists='append', index=False)
-            elif data_source == 'sec_filings':
-                # Import to filings table
-                df.to_sql('filings', conn, if_exists='append', index=False)
-            
+            counts = self.write_frame(conn, df, data_source)
             conn.close()
             
-            return {
+            result = {
                 'success': True,
                 'records': len(df),
+                **counts,
                 'message': f'Successfully imported {len(df)} records'
             }
+            snapshot_error = self.refresh_analytics_snapshot(data_source)
+            if snapshot_error:
+                result['snapshot_error'] = snapshot_error
+            return result
             
         except Exception as e:
             return {
@@ -454,6 +1031,182 @@ class EnhancedDataIngestion:
                 'error': str(e)
             }
     
+    def write_frame(self, conn: sqlite3.Connection, df: pd.DataFrame, data_source: str) -> Dict[str, int]:
+        """
+        Write a processed frame (from apply_source_transform or prepare_chunk)
+        to the table for its data source over the caller's connection, and
+        return the inserted/updated/unchanged row counts
+        """
+        table = SOURCE_TABLES.get(data_source)
+        if table is None:
+            # No table for this source; nothing was written
+            return {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        
+        # Company names resolve to entity ids, on the table's column names
+        # (Preqin's target_company is target_name), before the rows are
+        # written; new entities are committed on their own, as they are idempotent
+        mapping = self.get_column_mapping(conn, data_source)
+        df = assign_entity_ids(conn, table, mapping.rename(df))
+        conn.commit()
+        
+        # Rows above the current highest id are the ones this write adds
+        last_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+        
+        if data_source == 'mergermarket' and 'deal_id' in df.columns:
+            # Keyed deals are merged so overlapping refreshes stay idempotent
+            counts = self.upsert_deals(conn, df)
+        else:
+            texts = {}
+            if table == 'filings' and 'content' in df.columns:
+                # Bodies go to the blob store in the same transaction as their metadata
+                hashes = self.filing_store.put_many(conn, df['content'])
+                texts = {digest: text for digest, text in zip(hashes, df['content']) if digest is not None}
+                df = df.drop(columns='content').assign(content_hash=hashes)
+            
+            inserted = mapping.insert(conn, df)
+            
+            if table == 'filings':
+                # Filing bodies are indexed here rather than by trigger; the
+                # immediate lock keeps concurrent importers from indexing a row twice
+                conn.execute("BEGIN IMMEDIATE")
+                sync_filings_index(conn, texts)
+                conn.commit()
+            counts = {'inserted': inserted, 'updated': 0, 'unchanged': 0}
+        
+        if table in ('deals', 'companies'):
+            self._link_deal_parties(conn, table, df, last_id, counts['updated'])
+        return counts
+    
+    def _link_deal_parties(self, conn: sqlite3.Connection, table: str, df: pd.DataFrame,
+                           last_id: int, updated: int):
+        """Link deals or companies written after last_id to their counterparts in deal_parties"""
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if table == 'deals':
+                # Updated deals may have changed parties, so they are relinked too
+                deal_keys = df['deal_id'].dropna().astype(str).tolist() if updated else []
+                self.deal_linker.link_deals(conn, last_id, deal_keys)
+            else:
+                self.deal_linker.link_companies(conn, last_id)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    
+    def get_column_mapping(self, conn: sqlite3.Connection, data_source: str):
+        """Compiled column projection and INSERT for a data source, built once per instance"""
+        mapping = self._column_mappings.get(data_source)
+        if mapping is None:
+            mapping = compile_mapping(conn, data_source, SOURCE_TABLES[data_source], self.data_schemas.get(data_source))
+            self._column_mappings[data_source] = mapping
+        return mapping
+    
+    def get_press_releases(self, company_name: Optional[str] = None, since_id: int = 0,
+                           limit: Optional[int] = None) -> pd.DataFrame:
+        """
+        Stored press releases newer than since_id, oldest first, so callers
+        can keep the last id they saw and only read what was imported since
+        """
+        query = "SELECT * FROM press_releases WHERE id > ?"
+        params = [since_id]
+        if company_name:
+            company_filter = column_query('company_name', [company_name])
+            if company_filter is None:
+                return pd.DataFrame()
+            query += " AND id IN (SELECT rowid FROM press_releases_fts WHERE press_releases_fts MATCH ?)"
+            params.append(company_filter)
+        query += " ORDER BY id"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return pd.read_sql(query, conn, params=params)
+        finally:
+            conn.close()
+    
+    def refresh_analytics_snapshot(self, data_source: str) -> Optional[str]:
+        """
+        Re-export the snapshot partitions touched by an import.
+        Returns an error message instead of raising: a failed refresh leaves
+        the snapshot invalidated, and the dashboards fall back to SQLite.
+        """
+        table = SOURCE_TABLES.get(data_source)
+        if table not in SNAPSHOT_TABLES:
+            return None
+        
+        try:
+            self.analytics_snapshot.refresh([table])
+            return None
+        except Exception as e:
+            return str(e)
+    
+    def upsert_deals(self, conn: sqlite3.Connection, df: pd.DataFrame) -> Dict[str, int]:
+        """
+        Merge a batch of deals keyed on deal_id in a single transaction.
+        
+        The batch is deduplicated (last occurrence wins), bulk-loaded into a
+        temporary staging table and merged with one INSERT ... ON CONFLICT.
+        Rows whose values already match the stored deal are left untouched.
+        """
+        table_columns = [row[1] for row in conn.execute("PRAGMA table_info(deals)")]
+        columns = [col for col in df.columns if col in table_columns and col != 'id']
+        
+        batch = df[columns]
+        keyed = batch['deal_id'].notna()
+        batch = pd.concat([
+            batch[keyed].drop_duplicates(subset='deal_id', keep='last'),
+            batch[~keyed]
+        ])
+        
+        column_list = ', '.join(columns)
+        # import_date changes on every run, so it does not count as a change
+        compared = [col for col in columns if col not in ('deal_id', 'import_date')]
+        differs = ' OR '.join(f"deals.{col} IS NOT excluded.{col}" for col in compared) or '0'
+        staged_differs = ' OR '.join(f"d.{col} IS NOT s.{col}" for col in compared) or '0'
+        updates = ', '.join(f"{col} = excluded.{col}" for col in columns if col != 'deal_id')
+        
+        cursor = conn.cursor()
+        try:
+            cursor.execute("DROP TABLE IF EXISTS temp.deals_staging")
+            # CREATE TABLE AS keeps the column affinities of deals, so staged
+            # values compare exactly like stored ones
+            cursor.execute(f"CREATE TEMP TABLE deals_staging AS SELECT {column_list} FROM deals WHERE 0")
+            
+            cursor.execute("BEGIN")
+            cursor.executemany(
+                f"INSERT INTO deals_staging ({column_list}) VALUES ({', '.join('?' for _ in columns)})",
+                frame_records(batch)
+            )
+            
+            existing, changed = cursor.execute(f'''
+                SELECT COUNT(*), COALESCE(SUM(CASE WHEN {staged_differs} THEN 1 ELSE 0 END), 0)
+                FROM deals_staging s JOIN deals d ON d.deal_id = s.deal_id
+            ''').fetchone()
+            
+            # "WHERE true" resolves the parsing ambiguity between a SELECT's
+            # join clause and the ON CONFLICT clause
+            conflict_action = f"DO UPDATE SET {updates} WHERE {differs}" if updates else "DO NOTHING"
+            cursor.execute(f'''
+                INSERT INTO deals ({column_list})
+                SELECT {column_list} FROM deals_staging WHERE true
+                ON CONFLICT(deal_id) {conflict_action}
+            ''')
+            
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.execute("DROP TABLE IF EXISTS temp.deals_staging")
+        
+        return {
+            'inserted': len(batch) - existing,
+            'updated': changed,
+            'unchanged': existing - changed
+        }
+    
     def manual_data_entry_interface(self, data_source: str):
         """Interface for manual data entry"""
         st.subheader("✏️ Manual Data Entry")
@@ -539,12 +1292,21 @@ class EnhancedDataIngestion:
                 st.error("Failed to add company")
     
     def save_manual_entry(self, data: Dict, table: str) -> bool:
-        """Save manual entry to database"""
+        """Save manual entry to database, returning once it is committed and linked"""
         try:
             conn = sqlite3.connect(self.db_path)
-            df = pd.DataFrame([data])
-            df.to_sql(table, conn, if_exists='append', index=False)
-            conn.close()
+            try:
+                entity_ids = record_entity_ids(conn, table, data)
+                conn.commit()
+                last_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+                
+                # Group-committed with other sessions' small writes
+                get_write_buffer(self.db_path).insert(table, {**data, **entity_ids})
+                if table in ('deals', 'companies'):
+                    # Rows other writers added meanwhile are relinked too, which is idempotent
+                    self._link_deal_parties(conn, table, pd.DataFrame([data]), last_id, 0)
+            finally:
+                conn.close()
             return True
         except Exception as e:
             st.error(f"Database error: {str(e)}")
@@ -554,27 +1316,25 @@ class EnhancedDataIngestion:
         """Get current data status and statistics"""
         try:
             conn = sqlite3.connect(self.db_path)
-            
-            # Get record counts
-            deals_count = pd.read_sql("SELECT COUNT(*) as count FROM deals", conn).iloc[0]['count']
-            companies_count = pd.read_sql("SELECT COUNT(*) as count FROM companies", conn).iloc[0]['count']
-            filings_count = pd.read_sql("SELECT COUNT(*) as count FROM filings", conn).iloc[0]['count']
-            
-            # Get latest import dates
-            latest_deal = pd.read_sql("SELECT MAX(import_date) as latest FROM deals", conn).iloc[0]['latest']
-            latest_company = pd.read_sql("SELECT MAX(last_updated) as latest FROM companies", conn).iloc[0]['latest']
-            
+            # Counters kept by triggers (see table_stats), not COUNT/MAX scans
+            stats = read_table_stats(conn)
             conn.close()
             
+            empty = {'rows': 0, 'latest': None}
             return {
-                'deals': deals_count,
-                'companies': companies_count,
-                'filings': filings_count,
-                'latest_deal_import': latest_deal,
-                'latest_company_update': latest_company
+                'deals': stats.get('deals', empty)['rows'],
+                'companies': stats.get('companies', empty)['rows'],
+                'filings': stats.get('filings', empty)['rows'],
+                'latest_deal_import': stats.get('deals', empty)['latest'],
+                'latest_company_update': stats.get('companies', empty)['latest']
             }
             
         except Exception as e:
             return {
                 'error': str(e)
-            }
\ No newline at end of file
+            }
+
+if __name__ == "__main__":
+    # python -m enhanced_data_ingestion load ... runs the headless bulk loader
+    from bulk_loader import main
+    raise SystemExit(main())
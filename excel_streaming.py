@@ -0,0 +1,189 @@
+"""
+Streaming Excel reader for the M&A Market Intelligence Tool
+Reads workbooks row by row in openpyxl read-only mode instead of building the
+whole document in memory, and parses independent sheets in parallel workers
+"""
+
+import multiprocessing
+import os
+import queue
+import shutil
+import tempfile
+from typing import Iterator, List, Optional, Tuple
+
+import pandas as pd
+from openpyxl import load_workbook
+
+# Chunks buffered between sheet workers and the importer; bounds memory
+# when workers parse faster than chunks are written
+QUEUE_CHUNKS_PER_WORKER = 2
+
+
+def sheet_names(path: str) -> List[str]:
+    """Names of the worksheets in a workbook"""
+    workbook = load_workbook(path, read_only=True)
+    try:
+        return list(workbook.sheetnames)
+    finally:
+        workbook.close()
+
+
+def iter_sheet_chunks(path: str, sheet_name: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Yield a worksheet as frames of at most chunk_size rows.
+    The first non-empty row is the header; blank rows are skipped.
+    """
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook[sheet_name].iter_rows(values_only=True)
+        
+        header = None
+        for row in rows:
+            if any(value is not None for value in row):
+                header = row
+                break
+        if header is None:
+            return
+        
+        # Read-only mode trusts the sheet's recorded dimensions, which are
+        # often padded; drop unnamed trailing columns
+        width = len(header)
+        while width and header[width - 1] is None:
+            width -= 1
+        columns = [str(name) if name is not None else f'column_{index + 1}'
+                   for index, name in enumerate(header[:width])]
+        
+        batch = []
+        for row in rows:
+            row = row[:width]
+            if not any(value is not None for value in row):
+                continue
+            batch.append(row + (None,) * (width - len(row)))
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame(batch, columns=columns)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns)
+    finally:
+        workbook.close()
+
+
+def iter_workbook_chunks(source, chunk_size: int, workers: Optional[int] = 1) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Yield (sheet_name, chunk) for every sheet of a workbook.
+    
+    source is a path or a file-like upload (spooled to a temporary file so
+    workers can reopen it). With workers > 1 (None means one per CPU) sheets
+    are parsed in worker processes; chunks arrive in sheet-completion order,
+    each sheet's chunks in row order.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    
+    path, temp_dir = _spool_to_path(source)
+    try:
+        names = sheet_names(path)
+        
+        streamed = False
+        if workers > 1 and len(names) > 1:
+            parallel = _iter_parallel(path, names, chunk_size, min(workers, len(names)))
+            try:
+                for item in parallel:
+                    streamed = True
+                    yield item
+                return
+            except (OSError, RuntimeError):
+                # Worker processes can be unavailable in restricted
+                # environments; fall back to serial parsing if nothing was sent
+                if streamed:
+                    raise
+            finally:
+                # Stops the workers when the importer closes this generator early
+                parallel.close()
+        
+        for name in names:
+            for chunk in iter_sheet_chunks(path, name, chunk_size):
+                yield name, chunk
+    finally:
+        if temp_dir is not None:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def read_workbook(source, chunk_size: int = 50000, workers: Optional[int] = 1) -> pd.DataFrame:
+    """Read every sheet of a workbook into one frame"""
+    chunks = [chunk for _, chunk in iter_workbook_chunks(source, chunk_size, workers)]
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _spool_to_path(source) -> Tuple[str, Optional[str]]:
+    """Return a filesystem path for source and the temp dir to remove afterwards"""
+    if isinstance(source, (str, os.PathLike)):
+        return str(source), None
+    
+    temp_dir = tempfile.mkdtemp(prefix='excel_import_')
+    path = os.path.join(temp_dir, 'upload.xlsx')
+    position = source.tell()
+    source.seek(0)
+    with open(path, 'wb') as handle:
+        shutil.copyfileobj(source, handle, 1 << 20)
+    source.seek(position)
+    return path, temp_dir
+
+
+def _iter_parallel(path: str, names: List[str], chunk_size: int, workers: int) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """Parse sheets in worker processes, streaming chunks back through a bounded queue"""
+    context = multiprocessing.get_context()
+    sheet_queue = context.Queue()
+    chunk_queue = context.Queue(maxsize=workers * QUEUE_CHUNKS_PER_WORKER)
+    for name in names:
+        sheet_queue.put(name)
+    for _ in range(workers):
+        sheet_queue.put(None)
+    
+    processes = [
+        context.Process(target=_sheet_worker, args=(path, chunk_size, sheet_queue, chunk_queue), daemon=True)
+        for _ in range(workers)
+    ]
+    try:
+        for process in processes:
+            process.start()
+        
+        remaining = len(names)
+        while remaining:
+            try:
+                kind, name, payload = chunk_queue.get(timeout=1)
+            except queue.Empty:
+                # A worker killed mid-sheet (e.g. out of memory) never reports back
+                if any(process.exitcode not in (None, 0) for process in processes):
+                    raise RuntimeError("Excel sheet worker exited unexpectedly")
+                continue
+            
+            if kind == 'chunk':
+                yield name, payload
+            elif kind == 'error':
+                raise ValueError(f"Error reading sheet '{name}': {payload}")
+            else:
+                remaining -= 1
+    finally:
+        # Also reached when the importer stops early; workers may be blocked
+        # on a full queue, so stop them rather than wait
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            if process.pid is not None:
+                process.join()
+
+
+def _sheet_worker(path: str, chunk_size: int, sheet_queue, chunk_queue):
+    """Worker loop: parse sheets from sheet_queue until the None sentinel"""
+    for sheet_name in iter(sheet_queue.get, None):
+        try:
+            for chunk in iter_sheet_chunks(path, sheet_name, chunk_size):
+                chunk_queue.put(('chunk', sheet_name, chunk))
+            chunk_queue.put(('done', sheet_name, None))
+        except Exception as e:
+            chunk_queue.put(('error', sheet_name, str(e)))
+            return
@@ -0,0 +1,141 @@
+"""
+Compressed filing content store for the M&A Market Intelligence Tool
+Filing bodies live in a content-addressed blob table, so the filings metadata
+table stays small and full text is only read when a document is opened
+"""
+
+import hashlib
+import sqlite3
+import zlib
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+# zlib level for filing text; higher levels cost more CPU for little gain on prose
+BLOB_COMPRESSION_LEVEL = 6
+
+# Filings compressed per batch when migrating inline content
+MIGRATION_BATCH_ROWS = 1000
+
+
+def content_hash(text: str) -> str:
+    """Content address of a filing body"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def create_blob_table(cursor: sqlite3.Cursor) -> bool:
+    """
+    Create the blob table and move any inline filings.content into it.
+    Returns True when bodies were migrated, so the caller can VACUUM once
+    the transaction is committed.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS filing_blobs (
+            content_hash TEXT PRIMARY KEY,
+            raw_size INTEGER,
+            content BLOB
+        )
+    ''')
+    
+    columns = [row[1] for row in cursor.execute("PRAGMA table_info(filings)")]
+    if 'content_hash' not in columns:
+        cursor.execute("ALTER TABLE filings ADD COLUMN content_hash TEXT")
+    if 'content' not in columns:
+        return False
+    
+    return _migrate_inline_content(cursor) > 0
+
+
+def _migrate_inline_content(cursor: sqlite3.Cursor) -> int:
+    """Compress inline filing bodies into filing_blobs, drop the column and return the rows moved"""
+    last_id = -1
+    migrated = 0
+    while True:
+        rows = cursor.execute('''
+            SELECT id, content FROM filings
+            WHERE id > ? AND content IS NOT NULL ORDER BY id LIMIT ?
+        ''', (last_id, MIGRATION_BATCH_ROWS)).fetchall()
+        if not rows:
+            break
+        hashes = FilingBlobStore.put_many(cursor, [content for _, content in rows])
+        cursor.executemany(
+            "UPDATE filings SET content_hash = ? WHERE id = ?",
+            [(digest, filing_id) for (filing_id, _), digest in zip(rows, hashes)]
+        )
+        last_id = rows[-1][0]
+        migrated += len(rows)
+    
+    try:
+        cursor.execute("ALTER TABLE filings DROP COLUMN content")
+    except sqlite3.OperationalError:
+        # DROP COLUMN needs SQLite 3.35; older builds keep an empty column
+        cursor.execute("UPDATE filings SET content = NULL")
+    return migrated
+
+
+class FilingBlobStore:
+    """
+    zlib-compressed filing bodies keyed by the SHA-256 of their text.
+    Identical documents (re-filed exhibits, repeated imports) are stored once.
+    """
+    
+    def __init__(self, db_path: str = "market_intelligence.db"):
+        self.db_path = db_path
+    
+    @staticmethod
+    def put_many(conn, texts: Iterable[Optional[str]]) -> List[Optional[str]]:
+        """
+        Store filing bodies through an open connection or cursor (so they
+        commit with the metadata rows) and return their content hashes;
+        missing bodies map to None.
+        """
+        hashes = []
+        blobs = {}
+        for text in texts:
+            if text is None or (not isinstance(text, str) and pd.isna(text)):
+                hashes.append(None)
+                continue
+            text = str(text)
+            digest = content_hash(text)
+            hashes.append(digest)
+            if digest not in blobs:
+                raw = text.encode('utf-8')
+                blobs[digest] = (digest, len(raw), zlib.compress(raw, BLOB_COMPRESSION_LEVEL))
+        
+        conn.executemany(
+            "INSERT OR IGNORE INTO filing_blobs (content_hash, raw_size, content) VALUES (?, ?, ?)",
+            list(blobs.values())
+        )
+        return hashes
+    
+    def get(self, digest: str) -> Optional[str]:
+        """Decompressed body for a content hash"""
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute("SELECT content FROM filing_blobs WHERE content_hash = ?", (digest,)).fetchone()
+        conn.close()
+        return zlib.decompress(row[0]).decode('utf-8') if row else None
+    
+    def get_filing_content(self, filing_id: int) -> Optional[str]:
+        """Body of a filing, loaded only when the document is opened"""
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute('''
+            SELECT b.content FROM filings f JOIN filing_blobs b ON b.content_hash = f.content_hash
+            WHERE f.id = ?
+        ''', (filing_id,)).fetchone()
+        conn.close()
+        return zlib.decompress(row[0]).decode('utf-8') if row else None
+    
+    def prune(self) -> int:
+        """
+        Delete blobs no filing refers to; returns the number removed. Bodies
+        the search index still needs to forget a changed filing are kept.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.execute('''
+            DELETE FROM filing_blobs
+            WHERE content_hash NOT IN (SELECT content_hash FROM filings WHERE content_hash IS NOT NULL)
+              AND content_hash NOT IN (SELECT content_hash FROM filings_fts_pending WHERE content_hash IS NOT NULL)
+        ''')
+        conn.commit()
+        conn.close()
+        return cursor.rowcount
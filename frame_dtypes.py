@@ -0,0 +1,137 @@
+"""
+Compact column dtypes for the M&A Market Intelligence Tool
+Large frames held in memory (upload previews, deal histories and report
+exports) keep low-cardinality text as categoricals, money as float32, whole
+numbers as nullable integers and other text as pyarrow-backed strings
+"""
+
+import sqlite3
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Low-cardinality text columns held as categoricals
+CATEGORY_COLUMNS = frozenset({
+    'industry', 'sector', 'geography', 'deal_type', 'status', 'source',
+    'filing_type', 'sentiment', 'role', 'entity_type', 'stage', 'country'
+})
+
+# Money columns ($M) held as float32, about seven significant digits; values
+# written back to the database should come from the uncompacted frame
+MONEY_COLUMNS = frozenset({
+    'deal_value', 'market_cap', 'revenue', 'investment_amount',
+    'total_value', 'avg_deal_size'
+})
+
+# Tables covered by the memory report
+REPORT_TABLES = ('deals', 'companies', 'filings', 'press_releases', 'alerts', 'watchlist')
+
+# Rows read per chunk when measuring a table
+REPORT_CHUNK_ROWS = 100000
+
+# Nullable integer types from narrowest to widest; nothing narrower than
+# Int32, whose arithmetic on small-valued columns (rank * 2) would wrap
+_INTEGER_TYPES = ('Int32', 'Int64')
+
+_ARROW_STRING = pd.StringDtype('pyarrow')
+
+
+def compact_frame(df: pd.DataFrame, category_columns: Iterable[str] = CATEGORY_COLUMNS,
+                  money_columns: Iterable[str] = MONEY_COLUMNS) -> pd.DataFrame:
+    """Copy of df with each column in its compact dtype; columns no rule fits are kept as they are"""
+    category_columns = set(category_columns)
+    money_columns = set(money_columns)
+    compacted = {}
+    for position, column in enumerate(df.columns):
+        series = _compact_column(df.iloc[:, position], column in category_columns, column in money_columns)
+        if series is not None:
+            compacted[position] = series
+    if not compacted:
+        return df
+    
+    df = df.copy(deep=False)
+    for position, series in compacted.items():
+        df.isetitem(position, series)
+    return df
+
+
+def _compact_column(series: pd.Series, category: bool, money: bool) -> Optional[pd.Series]:
+    """Compact version of one column, or None to keep it as is"""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return None
+    
+    if _is_text(series):
+        if category:
+            return series.astype('category')
+        if dtype == object:
+            return series.astype(_ARROW_STRING)
+        return None
+    
+    if pd.api.types.is_bool_dtype(dtype) or not pd.api.types.is_numeric_dtype(dtype):
+        return None
+    if money:
+        return series.astype(np.float32) if dtype != np.float32 else None
+    return _nullable_integer(series)
+
+
+def _is_text(series: pd.Series) -> bool:
+    """True for string columns and object columns holding only strings"""
+    if pd.api.types.is_string_dtype(series.dtype) and series.dtype != object:
+        return True
+    return series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty')
+
+
+def _nullable_integer(series: pd.Series) -> Optional[pd.Series]:
+    """Whole-number column as Int32, or Int64 when its values need it; None if it has fractions"""
+    values = series.dropna()
+    if pd.api.types.is_float_dtype(series.dtype):
+        if not np.isfinite(values).all() or not (values == np.floor(values)).all():
+            return None
+    elif not pd.api.types.is_integer_dtype(series.dtype):
+        return None
+    
+    low, high = (values.min(), values.max()) if len(values) else (0, 0)
+    for integer_type in _INTEGER_TYPES:
+        bounds = np.iinfo(integer_type.lower())
+        if bounds.min <= low and high <= bounds.max:
+            return series.astype(integer_type) if series.dtype != integer_type else None
+    return None
+
+
+def read_frame(query: str, conn, params: Optional[Sequence] = None, **policy) -> pd.DataFrame:
+    """pd.read_sql with compact dtypes; policy overrides compact_frame's column sets"""
+    return compact_frame(pd.read_sql(query, conn, params=params), **policy)
+
+
+def frame_memory_mb(df: pd.DataFrame) -> float:
+    """Deep memory use of a frame in MB, counting string contents"""
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def memory_report(conn: sqlite3.Connection, tables: Iterable[str] = REPORT_TABLES,
+                  chunk_rows: int = REPORT_CHUNK_ROWS) -> pd.DataFrame:
+    """
+    Memory of each table read with default dtypes (before) and with compact
+    dtypes (after). Tables are read in chunks, so the report itself holds at
+    most chunk_rows rows at a time.
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    rows = []
+    for table in tables:
+        if table not in existing:
+            continue
+        row_count, before, after = 0, 0.0, 0.0
+        for chunk in pd.read_sql(f"SELECT * FROM {table}", conn, chunksize=chunk_rows):
+            row_count += len(chunk)
+            before += frame_memory_mb(chunk)
+            after += frame_memory_mb(compact_frame(chunk))
+        rows.append({
+            'table': table,
+            'rows': row_count,
+            'before_mb': round(before, 2),
+            'after_mb': round(after, 2),
+            'saved_pct': round(100 * (1 - after / before), 1) if before else 0.0
+        })
+    return pd.DataFrame(rows, columns=['table', 'rows', 'before_mb', 'after_mb', 'saved_pct'])
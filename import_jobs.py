@@ -0,0 +1,319 @@
+"""
+Background import jobs for the M&A Market Intelligence Tool
+Uploads are spooled to disk and imported by a worker thread, so large imports
+survive Streamlit reruns and several users' imports queue instead of
+contending for the SQLite write lock
+"""
+
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+# Seconds the idle worker waits before checking the table for new jobs
+JOB_POLL_INTERVAL = 1.0
+
+# Seconds between heartbeats of a running job
+JOB_HEARTBEAT_INTERVAL = 5.0
+
+# A running job whose heartbeat is older than this is presumed abandoned
+# (its worker process died) and queued again
+JOB_LEASE_SECONDS = 60.0
+
+# File extensions used when spooling uploads
+JOB_FILE_EXTENSIONS = {
+    'CSV': '.csv',
+    'Excel (.xlsx)': '.xlsx',
+    'JSON': '.json',
+    'JSON Lines': '.jsonl'
+}
+
+# One queue (and worker thread) per database, shared by all sessions
+_queues: Dict[str, 'ImportJobQueue'] = {}
+_queues_lock = threading.Lock()
+
+
+def get_import_job_queue(ingestion) -> 'ImportJobQueue':
+    """Return the process-wide job queue for an ingestion instance's database"""
+    with _queues_lock:
+        job_queue = _queues.get(ingestion.db_path)
+        if job_queue is None:
+            job_queue = ImportJobQueue(ingestion)
+            _queues[ingestion.db_path] = job_queue
+        return job_queue
+
+
+class ImportJobQueue:
+    """
+    Persistent queue of import jobs executed one at a time.
+    Jobs are picked fairly: the next job comes from the user whose last job
+    started longest ago, so one user's backlog cannot starve the others.
+    A running job carries its worker's owner id and a heartbeat; jobs whose
+    heartbeat has expired are queued again, while jobs other live workers
+    are running are left alone.
+    """
+    
+    def __init__(self, ingestion, jobs_dir: Optional[str] = None):
+        self.ingestion = ingestion
+        self.db_path = ingestion.db_path
+        self.jobs_dir = jobs_dir or os.path.splitext(self.db_path)[0] + '_jobs'
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wake = threading.Event()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        
+        self.start()
+    
+    def submit(self, uploaded_file, data_source: str, file_format: str, user_id: str,
+               file_hash: Optional[str] = None, total_rows: Optional[int] = None,
+               chunk_size: Optional[int] = None) -> str:
+        """Spool an upload to disk, queue its import and return the job id"""
+        job_id = uuid.uuid4().hex
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        file_path = os.path.join(self.jobs_dir, job_id + JOB_FILE_EXTENSIONS.get(file_format, ''))
+        
+        if isinstance(uploaded_file, str):
+            shutil.copyfile(uploaded_file, file_path)
+            file_name = os.path.basename(uploaded_file)
+        else:
+            position = uploaded_file.tell()
+            uploaded_file.seek(0)
+            with open(file_path, 'wb') as handle:
+                shutil.copyfileobj(uploaded_file, handle, 1 << 20)
+            uploaded_file.seek(position)
+            file_name = getattr(uploaded_file, 'name', None)
+        
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            INSERT INTO import_jobs
+            (job_id, user_id, data_source, file_format, file_name, file_path, file_hash, total_rows, chunk_size)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (job_id, user_id, data_source, file_format, file_name, file_path, file_hash, total_rows, chunk_size))
+        conn.commit()
+        conn.close()
+        
+        self.start()
+        self._wake.set()
+        return job_id
+    
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job. Queued jobs are cancelled at once; running jobs stop
+        after the chunk in progress. Returns False if the job already finished.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.execute('''
+            UPDATE import_jobs SET status = 'cancelled', finished_at = ?
+            WHERE job_id = ? AND status = 'queued'
+        ''', (datetime.now().isoformat(sep=' ', timespec='seconds'), job_id))
+        cancelled = cursor.rowcount > 0
+        if not cancelled:
+            cursor = conn.execute(
+                "UPDATE import_jobs SET cancel_requested = 1 WHERE job_id = ? AND status = 'running'",
+                (job_id,)
+            )
+            cancelled = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        
+        if cancelled:
+            self._remove_spooled_file(job_id)
+        return cancelled
+    
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Current state of a job, including its ETA when the row count is known"""
+        jobs = self._fetch_jobs("WHERE job_id = ?", (job_id,))
+        return jobs[0] if jobs else None
+    
+    def list_jobs(self, user_id: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        """Most recent jobs, optionally for a single user"""
+        if user_id is None:
+            return self._fetch_jobs("ORDER BY created_at DESC LIMIT ?", (limit,))
+        return self._fetch_jobs("WHERE user_id = ? ORDER BY created_at DESC LIMIT ?", (user_id, limit))
+    
+    def start(self):
+        """Start the worker thread if it is not running"""
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='import-job-worker', daemon=True)
+                self._worker.start()
+    
+    def run_pending(self) -> int:
+        """Run queued jobs in the calling thread until none are left; returns the number run"""
+        count = 0
+        while self._run_next_job():
+            count += 1
+        return count
+    
+    def _run(self):
+        """Worker loop: run jobs as they arrive"""
+        while True:
+            if not self._run_next_job():
+                self._wake.wait(JOB_POLL_INTERVAL)
+                self._wake.clear()
+    
+    def _run_next_job(self) -> bool:
+        """Claim and run the next job fairly across users; False if none is queued"""
+        job = self._claim_next_job()
+        if job is None:
+            return False
+        
+        job_id = job['job_id']
+        last_update = [0.0]
+        
+        # Heartbeats come from their own thread, so a slow chunk does not let the lease lapse
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job_id, stop_heartbeat),
+                                     name='import-job-heartbeat', daemon=True)
+        heartbeat.start()
+        
+        def report_progress(rows: int, elapsed: float) -> bool:
+            # Progress writes are throttled; the cancel flag is read every chunk
+            conn = sqlite3.connect(self.db_path)
+            try:
+                now = time.monotonic()
+                if now - last_update[0] >= 0.5:
+                    conn.execute(
+                        "UPDATE import_jobs SET rows_processed = ?, rows_per_second = ? WHERE job_id = ?",
+                        (rows, rows / elapsed if elapsed > 0 else 0.0, job_id)
+                    )
+                    conn.commit()
+                    last_update[0] = now
+                cancel_requested = conn.execute(
+                    "SELECT cancel_requested FROM import_jobs WHERE job_id = ?", (job_id,)
+                ).fetchone()[0]
+            finally:
+                conn.close()
+            return not cancel_requested
+        
+        options = {'chunk_size': job['chunk_size']} if job['chunk_size'] else {}
+        try:
+            result = self.ingestion.stream_import_file(
+                job['file_path'], job['data_source'], job['file_format'],
+                progress_callback=report_progress, skip_seen_rows=True,
+                file_hash=job['file_hash'], file_name=job['file_name'], **options
+            )
+        except Exception as e:
+            result = {'success': False, 'records': 0, 'error': str(e)}
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+        
+        if not result['success']:
+            status = 'failed'
+        elif result.get('cancelled'):
+            status = 'cancelled'
+        else:
+            status = 'completed'
+        
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.execute('''
+            UPDATE import_jobs
+            SET status = ?, rows_processed = COALESCE(?, rows_processed), rows_per_second = COALESCE(?, rows_per_second),
+                error = ?, result = ?, finished_at = ?, heartbeat_at = NULL
+            WHERE job_id = ? AND owner_id = ?
+        ''', (
+            status,
+            result['records'] + result.get('skipped', 0) + result.get('rejected', 0) if result['success'] else None,
+            result.get('rows_per_second'),
+            result.get('error'),
+            json.dumps(result, default=str),
+            datetime.now().isoformat(sep=' ', timespec='seconds'),
+            job_id,
+            self.owner_id
+        ))
+        finished = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        
+        # A job whose lease lapsed may have been claimed again; its new worker owns the file
+        if finished:
+            self._remove_spooled_file(job_id, job['file_path'])
+        return True
+    
+    def _heartbeat(self, job_id: str, stop: threading.Event):
+        """Refresh a running job's heartbeat until stop is set"""
+        while not stop.wait(JOB_HEARTBEAT_INTERVAL):
+            conn = sqlite3.connect(self.db_path)
+            try:
+                conn.execute(
+                    "UPDATE import_jobs SET heartbeat_at = ? WHERE job_id = ? AND owner_id = ?",
+                    (datetime.now().isoformat(sep=' ', timespec='microseconds'), job_id, self.owner_id)
+                )
+                conn.commit()
+            except sqlite3.OperationalError:
+                # A busy database skips one beat; the lease outlasts several
+                pass
+            finally:
+                conn.close()
+    
+    def _claim_next_job(self) -> Optional[Dict]:
+        """Mark the next fair job as running and return it"""
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        try:
+            # BEGIN IMMEDIATE: two app processes must not claim the same job
+            conn.execute("BEGIN IMMEDIATE")
+            
+            # Jobs whose worker stopped beating are retried; rows they had
+            # already written are skipped through the import registry
+            expired = (datetime.now() - timedelta(seconds=JOB_LEASE_SECONDS)).isoformat(sep=' ', timespec='microseconds')
+            conn.execute('''
+                UPDATE import_jobs SET status = 'queued', started_at = NULL, owner_id = NULL, heartbeat_at = NULL
+                WHERE status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < ?)
+            ''', (expired,))
+            
+            row = conn.execute('''
+                SELECT job_id FROM import_jobs j
+                WHERE status = 'queued'
+                ORDER BY COALESCE(
+                    (SELECT MAX(started_at) FROM import_jobs k WHERE k.user_id IS j.user_id), ''
+                ), created_at
+                LIMIT 1
+            ''').fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            
+            now = datetime.now().isoformat(sep=' ', timespec='microseconds')
+            conn.execute(
+                "UPDATE import_jobs SET status = 'running', started_at = ?, owner_id = ?, heartbeat_at = ? WHERE job_id = ?",
+                (now, self.owner_id, now, row[0])
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        
+        return self.get_job(row[0])
+    
+    def _fetch_jobs(self, clause: str, params: tuple) -> List[Dict]:
+        """Load jobs as dicts, adding eta_seconds where it can be estimated"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        rows = conn.execute(f"SELECT * FROM import_jobs {clause}", params).fetchall()
+        conn.close()
+        
+        jobs = []
+        for row in rows:
+            job = dict(row)
+            job['eta_seconds'] = None
+            if job['status'] == 'running' and job['total_rows'] and job['rows_per_second']:
+                remaining = max(job['total_rows'] - job['rows_processed'], 0)
+                job['eta_seconds'] = remaining / job['rows_per_second']
+            jobs.append(job)
+        return jobs
+    
+    def _remove_spooled_file(self, job_id: str, file_path: Optional[str] = None):
+        """Delete a finished job's spooled upload, unless the job is still running"""
+        if file_path is None:
+            job = self.get_job(job_id)
+            if job is None or job['status'] == 'running':
+                return
+            file_path = job['file_path']
+        if file_path and os.path.exists(file_path):
+            os.remove(file_path)
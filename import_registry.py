@@ -0,0 +1,380 @@
+"""
+Import registry for the M&A Market Intelligence Tool
+Fingerprints uploaded files and their rows so re-uploads skip work already done
+"""
+
+import hashlib
+import math
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Bloom filter sizing: start small and grow 4x whenever the capacity is used up
+INITIAL_BLOOM_CAPACITY = 1000000
+BLOOM_ERROR_RATE = 0.01
+
+# SQLite caps the number of host parameters per statement
+LOOKUP_BATCH_SIZE = 500
+
+# Fingerprint text of a missing value, whatever dtype the chunk inferred
+FINGERPRINT_NA = '\x00'
+
+# Whole numbers below this magnitude are exact in float64 and fingerprint as integers
+_EXACT_INTEGER_LIMIT = 2 ** 53
+
+
+class BloomFilter:
+    """Vectorized Bloom filter over 64-bit row hashes"""
+    
+    def __init__(self, num_bits: int, num_hashes: int, bits: Optional[bytes] = None, count: int = 0):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.count = count
+        if bits is None:
+            self.bits = np.zeros((num_bits + 7) // 8, dtype=np.uint8)
+        else:
+            self.bits = np.frombuffer(bits, dtype=np.uint8).copy()
+    
+    @classmethod
+    def for_capacity(cls, capacity: int, error_rate: float = BLOOM_ERROR_RATE) -> 'BloomFilter':
+        """Size a filter for capacity items at the given false-positive rate"""
+        num_bits = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return cls(num_bits, num_hashes)
+    
+    @property
+    def capacity(self) -> int:
+        """Number of items the filter holds before exceeding its error rate"""
+        return int(self.num_bits * math.log(2) / self.num_hashes)
+    
+    def _positions(self, hashes: np.ndarray) -> np.ndarray:
+        """Bit positions per hash using double hashing (h1 + i * h2)"""
+        h1 = hashes.astype(np.uint64)
+        with np.errstate(over='ignore'):
+            h2 = ((h1 >> np.uint64(33)) ^ (h1 * np.uint64(0x9E3779B97F4A7C15))) | np.uint64(1)
+            steps = np.arange(self.num_hashes, dtype=np.uint64)
+            positions = h1[:, None] + steps[None, :] * h2[:, None]
+        return positions % np.uint64(self.num_bits)
+    
+    def add(self, hashes: np.ndarray):
+        """Add an array of hashes to the filter"""
+        if len(hashes) == 0:
+            return
+        positions = self._positions(hashes).ravel()
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3), np.left_shift(1, positions & np.uint64(7)).astype(np.uint8))
+        self.count += len(hashes)
+    
+    def might_contain(self, hashes: np.ndarray) -> np.ndarray:
+        """Boolean mask: False means definitely unseen, True means possibly seen"""
+        if len(hashes) == 0:
+            return np.zeros(0, dtype=bool)
+        positions = self._positions(hashes)
+        set_bits = (self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)) & 1
+        return set_bits.all(axis=1)
+
+
+def _canonical_text(series: pd.Series) -> np.ndarray:
+    """
+    Values of a column as text that depends only on the values: numbers
+    (including numeric strings) in one format, 7, 7.0 and "7" alike, and
+    missing values as FINGERPRINT_NA
+    """
+    missing = series.isna().to_numpy()
+    text = series.astype(str).to_numpy(dtype=object)
+    dtype = series.dtype
+    if not (pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)
+            or pd.api.types.is_datetime64_any_dtype(dtype)):
+        numeric = pd.api.types.is_numeric_dtype(dtype)
+        numbers = (series if numeric else pd.to_numeric(series, errors='coerce')).to_numpy(dtype=float, na_value=np.nan)
+        whole = np.isfinite(numbers) & (numbers == np.floor(numbers)) & (np.abs(numbers) < _EXACT_INTEGER_LIMIT)
+        text[whole] = numbers[whole].astype(np.int64).astype(str)
+        # Larger numeric strings keep their digits; float64 would merge neighbours
+        fractional = ~np.isnan(numbers) & ~whole & (numeric | (np.abs(numbers) < _EXACT_INTEGER_LIMIT))
+        text[fractional] = numbers[fractional].astype(str)
+    text[missing] = FINGERPRINT_NA
+    return text
+
+
+def _covered_count(registered: Optional[int]) -> int:
+    """Stored coverage of a filter; saved before coverage was tracked, it may miss any row"""
+    return -1 if registered is None else registered
+
+
+class ImportRegistry:
+    """
+    Registry of imported files and row fingerprints.
+    A file whose hash is registered can be skipped outright; for new files only
+    rows whose content hash has not been seen before need processing.
+    """
+    
+    def __init__(self, db_path: str = "market_intelligence.db"):
+        self.db_path = db_path
+        self._bloom_filters: Dict[str, BloomFilter] = {}
+        # Hashes added to each cached filter since it was last loaded or saved
+        self._unsaved_counts: Dict[str, int] = {}
+        # Registered row count (import_row_counts) each cached filter holds every hash of
+        self._covered: Dict[str, int] = {}
+    
+    def file_fingerprint(self, uploaded_file) -> str:
+        """SHA-256 of a file path or file-like object (rewound afterwards)"""
+        digest = hashlib.sha256()
+        
+        if isinstance(uploaded_file, str):
+            with open(uploaded_file, 'rb') as handle:
+                for block in iter(lambda: handle.read(1 << 20), b''):
+                    digest.update(block)
+            return digest.hexdigest()
+        
+        position = uploaded_file.tell()
+        uploaded_file.seek(0)
+        while True:
+            block = uploaded_file.read(1 << 20)
+            if not block:
+                break
+            digest.update(block.encode('utf-8') if isinstance(block, str) else block)
+        uploaded_file.seek(position)
+        return digest.hexdigest()
+    
+    def row_fingerprints(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        64-bit content hash per row, independent of column order. Columns are
+        hashed as canonical text, so a row hashes the same whether its chunk
+        inferred a column as int64, float64 (a NaN elsewhere) or object.
+        """
+        canonical = pd.DataFrame(
+            {column: _canonical_text(df[column]) for column in sorted(df.columns)}, index=df.index
+        )
+        hashes = pd.util.hash_pandas_object(canonical, index=False)
+        return hashes.to_numpy().view(np.int64)
+    
+    def lookup_file(self, file_hash: str, data_source: str) -> Optional[Dict]:
+        """Return the registry entry for a file hash, if it was imported before as data_source"""
+        conn = sqlite3.connect(self.db_path)
+        row = conn.execute(
+            "SELECT data_source, file_name, row_count, imported_at FROM import_registry "
+            "WHERE file_hash = ? AND data_source = ?",
+            (file_hash, data_source)
+        ).fetchone()
+        conn.close()
+        
+        if row is None:
+            return None
+        return {'data_source': row[0], 'file_name': row[1], 'row_count': row[2], 'imported_at': row[3]}
+    
+    def filter_unseen(self, df: pd.DataFrame, data_source: str) -> Tuple[pd.DataFrame, np.ndarray]:
+        """
+        Drop rows whose content hash is already registered for data_source.
+        Returns the remaining rows and their hashes (for register_rows).
+        """
+        hashes = self.row_fingerprints(df)
+        unseen = self.unseen_mask(data_source, hashes)
+        if unseen.all():
+            return df, hashes
+        return df[unseen], hashes[unseen]
+    
+    def unseen_mask(self, data_source: str, hashes: np.ndarray) -> np.ndarray:
+        """True for each row hash not yet registered for data_source"""
+        if len(hashes) == 0:
+            return np.ones(0, dtype=bool)
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            bloom = self._get_bloom_filter(data_source, conn)
+            current = self._registered_count(conn, data_source) == self._covered[data_source]
+        finally:
+            conn.close()
+        
+        # Only hashes the Bloom filter cannot rule out need a database lookup;
+        # a filter missing rows registered elsewhere cannot rule any out
+        candidates = hashes[bloom.might_contain(hashes)] if current else hashes
+        seen = self._lookup_row_hashes(data_source, np.unique(candidates).tolist())
+        
+        if not seen:
+            return np.ones(len(hashes), dtype=bool)
+        return ~np.isin(hashes, np.fromiter(seen, dtype=np.int64, count=len(seen)))
+    
+    def begin_file(self, data_source: str):
+        """
+        Bring the Bloom filter up to date before importing a file: reload the
+        persisted one, and rebuild it from the stored hashes if rows were
+        registered that it does not cover (a crashed import, another session)
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            registered = self._registered_count(conn, data_source)
+            if self._covered.get(data_source) == registered:
+                return
+            self._bloom_filters.pop(data_source, None)
+            bloom = self._get_bloom_filter(data_source, conn)
+            if self._covered[data_source] != registered:
+                conn.execute("BEGIN IMMEDIATE")
+                registered = self._registered_count(conn, data_source)
+                bloom = self._rebuild_bloom_filter(conn, data_source, bloom.count, registered)
+                self._save_bloom_filter(conn, data_source, bloom)
+                conn.commit()
+            self._unsaved_counts.pop(data_source, None)
+        finally:
+            conn.close()
+    
+    def register_rows(self, data_source: str, row_hashes: np.ndarray):
+        """
+        Record the content hashes of imported rows. The hashes and the
+        registered row count are stored in one transaction; the cached Bloom
+        filter takes the hashes in memory and is persisted by
+        save_bloom_filters (once per file) or when it has to be rebuilt.
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            bloom = self._get_bloom_filter(data_source, conn)
+            
+            # Sorted keys insert into the primary key B-tree about twice as fast
+            added = conn.executemany(
+                "INSERT OR IGNORE INTO import_row_hashes (data_source, row_hash) VALUES (?, ?)",
+                ((data_source, row_hash) for row_hash in np.sort(row_hashes).tolist())
+            ).rowcount
+            conn.execute('''
+                INSERT INTO import_row_counts (data_source, registered) VALUES (?, ?)
+                ON CONFLICT (data_source) DO UPDATE SET registered = registered + excluded.registered
+            ''', (data_source, added))
+            registered = self._registered_count(conn, data_source)
+            
+            if bloom.count + len(row_hashes) > bloom.capacity:
+                # The table already holds the new hashes, so the rebuild covers them
+                bloom = self._rebuild_bloom_filter(conn, data_source, bloom.count + len(row_hashes), registered)
+                self._save_bloom_filter(conn, data_source, bloom)
+                self._unsaved_counts.pop(data_source, None)
+            else:
+                bloom.add(row_hashes)
+                # The filter stays current only if no other writer registered rows it lacks
+                if self._covered[data_source] + added == registered:
+                    self._covered[data_source] = registered
+                self._unsaved_counts[data_source] = self._unsaved_counts.get(data_source, 0) + len(row_hashes)
+            
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def save_bloom_filters(self):
+        """
+        Persist the filters that took new hashes since they were loaded.
+        Bits another session saved in the meantime are merged in rather than
+        overwritten; if it grew the filter, it is rebuilt from the stored hashes.
+        """
+        if not any(self._unsaved_counts.values()):
+            return
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for data_source, added in list(self._unsaved_counts.items()):
+                if not added:
+                    continue
+                bloom = self._bloom_filters[data_source]
+                row = conn.execute(
+                    "SELECT num_bits, num_hashes, item_count, bits, registered FROM import_bloom_filters "
+                    "WHERE data_source = ?",
+                    (data_source,)
+                ).fetchone()
+                if row is not None and (row[0], row[1]) == (bloom.num_bits, bloom.num_hashes):
+                    np.bitwise_or(bloom.bits, np.frombuffer(row[3], dtype=np.uint8), out=bloom.bits)
+                    bloom.count = max(bloom.count, row[2] + added)
+                    # Registered counts only grow, so the union covers the later of the two
+                    self._covered[data_source] = max(self._covered[data_source], _covered_count(row[4]))
+                elif row is not None:
+                    bloom = self._rebuild_bloom_filter(conn, data_source, max(bloom.count, row[2] + added),
+                                                       self._registered_count(conn, data_source))
+                self._save_bloom_filter(conn, data_source, bloom)
+            conn.commit()
+            self._unsaved_counts.clear()
+        finally:
+            conn.close()
+    
+    def register_file(self, file_hash: str, data_source: str, file_name: str, row_count: int):
+        """Record a fully imported file so identical re-uploads as data_source short-circuit"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+            INSERT OR REPLACE INTO import_registry (file_hash, data_source, file_name, row_count)
+            VALUES (?, ?, ?, ?)
+        ''', (file_hash, data_source, file_name, row_count))
+        conn.commit()
+        conn.close()
+    
+    def _lookup_row_hashes(self, data_source: str, candidates: List[int]) -> set:
+        """Return the subset of candidate hashes stored for data_source"""
+        seen = set()
+        if not candidates:
+            return seen
+        
+        conn = sqlite3.connect(self.db_path)
+        for start in range(0, len(candidates), LOOKUP_BATCH_SIZE):
+            batch = candidates[start:start + LOOKUP_BATCH_SIZE]
+            rows = conn.execute(
+                f"SELECT row_hash FROM import_row_hashes WHERE data_source = ? AND row_hash IN ({', '.join('?' for _ in batch)})",
+                [data_source] + batch
+            ).fetchall()
+            seen.update(row[0] for row in rows)
+        conn.close()
+        
+        return seen
+    
+    def _registered_count(self, conn: sqlite3.Connection, data_source: str) -> int:
+        """Row hashes registered for data_source, kept by register_rows"""
+        row = conn.execute("SELECT registered FROM import_row_counts WHERE data_source = ?", (data_source,)).fetchone()
+        return row[0] if row else 0
+    
+    def _get_bloom_filter(self, data_source: str, conn: Optional[sqlite3.Connection] = None) -> BloomFilter:
+        """Load (and cache) the persisted Bloom filter for a data source"""
+        if data_source in self._bloom_filters:
+            return self._bloom_filters[data_source]
+        
+        own_conn = conn is None
+        if own_conn:
+            conn = sqlite3.connect(self.db_path)
+        row = conn.execute(
+            "SELECT num_bits, num_hashes, item_count, bits, registered FROM import_bloom_filters WHERE data_source = ?",
+            (data_source,)
+        ).fetchone()
+        if own_conn:
+            conn.close()
+        
+        if row is None:
+            bloom = BloomFilter.for_capacity(INITIAL_BLOOM_CAPACITY)
+            self._covered[data_source] = 0
+        else:
+            bloom = BloomFilter(row[0], row[1], bits=row[3], count=row[2])
+            self._covered[data_source] = _covered_count(row[4])
+        
+        self._bloom_filters[data_source] = bloom
+        return bloom
+    
+    def _rebuild_bloom_filter(self, conn: sqlite3.Connection, data_source: str, needed: int,
+                              registered: int) -> BloomFilter:
+        """
+        Size the filter for needed hashes and repopulate it from the stored
+        row hashes, which number registered
+        """
+        capacity = INITIAL_BLOOM_CAPACITY
+        while capacity < max(needed, registered):
+            capacity *= 4
+        bloom = BloomFilter.for_capacity(capacity)
+        
+        cursor = conn.execute("SELECT row_hash FROM import_row_hashes WHERE data_source = ?", (data_source,))
+        while True:
+            rows = cursor.fetchmany(1000000)
+            if not rows:
+                break
+            bloom.add(np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)))
+        
+        self._bloom_filters[data_source] = bloom
+        self._covered[data_source] = registered
+        return bloom
+    
+    def _save_bloom_filter(self, conn: sqlite3.Connection, data_source: str, bloom: BloomFilter):
+        """Persist the Bloom filter bits for a data source with the registered count they cover"""
+        conn.execute('''
+            INSERT OR REPLACE INTO import_bloom_filters
+            (data_source, num_bits, num_hashes, item_count, bits, registered)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (data_source, bloom.num_bits, bloom.num_hashes, bloom.count, bloom.bits.tobytes(),
+              self._covered[data_source]))
@@ -0,0 +1,189 @@
+"""
+Watch-folder ingestion for the M&A Market Intelligence Tool
+Imports the files data vendors drop into a directory without going through
+the Streamlit uploader, archives them and logs per-file throughput and errors
+"""
+
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from enhanced_data_ingestion import DEFAULT_CHUNK_SIZE, EnhancedDataIngestion
+
+FILE_FORMATS = {
+    '.csv': 'CSV',
+    '.xlsx': 'Excel (.xlsx)',
+    '.json': 'JSON',
+    '.jsonl': 'JSON Lines',
+    '.ndjson': 'JSON Lines'
+}
+
+# Filename fragments naming a data source; used when headers fit several sources
+SOURCE_NAME_HINTS = {
+    'mergermarket': 'mergermarket',
+    'preqin': 'preqin',
+    'sec': 'sec_filings',
+    'edgar': 'sec_filings',
+    'filing': 'sec_filings',
+    'index': 'index_constituents',
+    'constituent': 'index_constituents',
+    'press': 'press_releases'
+}
+
+# Seconds between scans of the watch folder
+DEFAULT_POLL_INTERVAL = 30
+
+# Files modified more recently than this may still be being copied in
+SETTLE_SECONDS = 10
+
+# Rows read to detect a file's source from its header
+DETECTION_ROWS = 100
+
+
+def file_format_for(path: str) -> Optional[str]:
+    """Upload format name for a file extension, or None if unsupported"""
+    return FILE_FORMATS.get(Path(path).suffix.lower())
+
+
+def detect_data_source(ingestion: EnhancedDataIngestion, path: str, file_format: str) -> Optional[str]:
+    """
+    Data source of a file, from its header and name.
+    Sources whose required columns are all present qualify; a filename hint
+    decides between several, and is used alone when none qualifies.
+    """
+    name = Path(path).stem.lower()
+    hinted = [source for fragment, source in SOURCE_NAME_HINTS.items() if fragment in name]
+    
+    chunks = ingestion.iter_file_chunks(path, file_format, DETECTION_ROWS)
+    try:
+        first = next(chunks, None)
+    finally:
+        chunks.close()
+    columns = set(ingestion.standardize_columns(first).columns) if first is not None else set()
+    
+    qualifying = [
+        source for source, schema in ingestion.data_schemas.items()
+        if schema['required_columns'] and set(schema['required_columns']) <= columns
+    ]
+    for source in hinted:
+        if source in qualifying:
+            return source
+    if qualifying:
+        return max(qualifying, key=lambda source: len(ingestion.data_schemas[source]['required_columns']))
+    return hinted[0] if hinted else None
+
+
+class IngestDaemon:
+    """
+    Polls a directory and imports each new file as a streaming import.
+    Imported files move to archive_dir and files that fail to failed_dir,
+    so nothing is picked up twice; every file gets a row in ingest_log.
+    """
+    
+    def __init__(self, watch_dir: str, ingestion: Optional[EnhancedDataIngestion] = None,
+                 archive_dir: Optional[str] = None, failed_dir: Optional[str] = None,
+                 poll_interval: float = DEFAULT_POLL_INTERVAL, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 settle_seconds: float = SETTLE_SECONDS):
+        self.watch_dir = watch_dir
+        self.ingestion = ingestion or EnhancedDataIngestion()
+        self.archive_dir = archive_dir or os.path.join(watch_dir, 'archive')
+        self.failed_dir = failed_dir or os.path.join(watch_dir, 'failed')
+        self.poll_interval = poll_interval
+        self.chunk_size = chunk_size
+        self.settle_seconds = settle_seconds
+    
+    def pending_files(self) -> List[str]:
+        """Supported files in the watch folder that are no longer being written, oldest first"""
+        now = time.time()
+        files = []
+        for entry in os.scandir(self.watch_dir):
+            if not entry.is_file() or entry.name.startswith('.') or file_format_for(entry.name) is None:
+                continue
+            modified = entry.stat().st_mtime
+            if now - modified >= self.settle_seconds:
+                files.append((modified, entry.path))
+        return [path for _, path in sorted(files)]
+    
+    def run_once(self) -> List[Dict]:
+        """Import every pending file and return their log entries"""
+        return [self.process_file(path) for path in self.pending_files()]
+    
+    def run_forever(self):
+        """Poll the watch folder until interrupted"""
+        print(f"👀 Watching {self.watch_dir} (every {self.poll_interval:g}s)")
+        while True:
+            for entry in self.run_once():
+                self.print_entry(entry)
+            time.sleep(self.poll_interval)
+    
+    def process_file(self, path: str) -> Dict:
+        """Import one file, move it out of the watch folder and log the outcome"""
+        started_at = datetime.now()
+        entry = {'file_name': os.path.basename(path), 'data_source': None, 'status': 'failed',
+                 'records': 0, 'rejected': 0, 'skipped': 0, 'rows_per_second': None,
+                 'elapsed': None, 'error': None}
+        
+        try:
+            file_format = file_format_for(path)
+            file_hash = self.ingestion.import_registry.file_fingerprint(path)
+            entry['data_source'] = data_source = detect_data_source(self.ingestion, path, file_format)
+            
+            if data_source is None:
+                entry['error'] = "Could not detect the data source from the file name or columns"
+            elif self.ingestion.import_registry.lookup_file(file_hash, data_source):
+                entry['status'] = 'duplicate'
+            else:
+                result = self.ingestion.stream_import_file(
+                    path, data_source, file_format, chunk_size=self.chunk_size,
+                    skip_seen_rows=True, file_hash=file_hash
+                )
+                if result['success']:
+                    entry.update(status='imported', records=result['records'], rejected=result['rejected'],
+                                 skipped=result['skipped'], rows_per_second=result['rows_per_second'],
+                                 elapsed=result['elapsed'])
+                else:
+                    entry['error'] = result['error']
+        except Exception as e:
+            entry['error'] = str(e)
+        
+        target_dir = self.failed_dir if entry['status'] == 'failed' else self.archive_dir
+        entry['archived_path'] = self._move(path, target_dir)
+        self._log(entry, started_at)
+        return entry
+    
+    def _move(self, path: str, target_dir: str) -> str:
+        """Move a processed file into target_dir under a timestamped name"""
+        os.makedirs(target_dir, exist_ok=True)
+        target = os.path.join(target_dir, f"{datetime.now():%Y%m%d-%H%M%S}_{os.path.basename(path)}")
+        shutil.move(path, target)
+        return target
+    
+    def _log(self, entry: Dict, started_at: datetime):
+        """Record a processed file in ingest_log"""
+        conn = sqlite3.connect(self.ingestion.db_path)
+        conn.execute('''
+            INSERT INTO ingest_log
+            (file_name, data_source, status, records, rejected, skipped, rows_per_second, elapsed_seconds,
+             error, archived_path, started_at, finished_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            entry['file_name'], entry['data_source'], entry['status'], entry['records'], entry['rejected'],
+            entry['skipped'], entry['rows_per_second'], entry['elapsed'], entry['error'], entry['archived_path'],
+            started_at.isoformat(sep=' ', timespec='seconds'), datetime.now().isoformat(sep=' ', timespec='seconds')
+        ))
+        conn.commit()
+        conn.close()
+    
+    def print_entry(self, entry: Dict):
+        """One console line per processed file"""
+        if entry['status'] == 'imported':
+            print(f"✅ {entry['file_name']} ({entry['data_source']}): {entry['records']:,} records, "
+                  f"{entry['rejected']:,} rejected, {entry['rows_per_second']:,.0f} rows/s")
+        elif entry['status'] == 'duplicate':
+            print(f"⏭️  {entry['file_name']}: already imported, archived")
+        else:
+            print(f"❌ {entry['file_name']}: {entry['error']}")
@@ -0,0 +1,76 @@
+"""
+Streaming JSON Lines reader for the M&A Market Intelligence Tool
+Line-delimited JSON feeds are parsed in batches of records, so memory is
+bounded by the batch size rather than by the size of the dump
+"""
+
+import json
+from contextlib import contextmanager
+from typing import Iterator
+
+import pandas as pd
+
+# Longest first line examined when checking whether a .json file is line-delimited
+SNIFF_BYTES = 1 << 20
+
+
+@contextmanager
+def _open_source(source):
+    """Binary handle on a path or an uploaded file, read from the start"""
+    if isinstance(source, (str, bytes)) or hasattr(source, '__fspath__'):
+        with open(source, 'rb') as handle:
+            yield handle
+        return
+    
+    # Uploaded files are rewound before and after, as other readers expect
+    source.seek(0)
+    try:
+        yield source
+    finally:
+        source.seek(0)
+
+
+def _next_line(handle):
+    """Next non-blank line, at most SNIFF_BYTES long; empty at end of file"""
+    line = handle.readline(SNIFF_BYTES)
+    while line and not line.strip():
+        line = handle.readline(SNIFF_BYTES)
+    return line
+
+
+def is_json_lines(source) -> bool:
+    """
+    True when a JSON file holds one record per line. Its first line must be
+    a complete JSON object, followed by more records (a single JSON
+    document ends with its top-level value) or flat enough to be a record.
+    Pretty-printed and array documents are not line-delimited.
+    """
+    with _open_source(source) as handle:
+        first = _next_line(handle)
+        try:
+            record = json.loads(first)
+        except ValueError:
+            return False
+        if not isinstance(record, dict):
+            return False
+        if _next_line(handle):
+            return True
+        return not any(isinstance(value, (dict, list)) for value in record.values())
+
+
+def iter_json_lines_chunks(source, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """
+    Yield the records of a JSON Lines file as frames of at most chunk_size
+    rows. Values keep their JSON types; dates and money are left to the
+    source transforms, as for CSV.
+    """
+    with _open_source(source) as handle:
+        with pd.read_json(handle, lines=True, chunksize=chunk_size, dtype=False, convert_dates=False) as reader:
+            for chunk in reader:
+                yield chunk
+
+
+def read_json_lines(source, chunk_size: int = 50000) -> pd.DataFrame:
+    """Whole JSON Lines file as one frame (for previews; imports use the chunks)"""
+    chunks = list(iter_json_lines_chunks(source, chunk_size))
+    return pd.concat(chunks) if chunks else pd.DataFrame()
@@ -9,6 +9,12 @@ try:
     import json
     from enhanced_data_ingestion import EnhancedDataIngestion
     from deal_sourcing_alerts import DealSourcingAlerts
+    from analytics_snapshot import AnalyticsSnapshot
+    from filing_store import FilingBlobStore
+    from search_index import SearchIndex
+    from write_buffer import get_write_buffer
+    from company_entities import entity_filter
+    from frame_dtypes import memory_report, read_frame
 except ImportError as e:
     print(f"Missing required package: {e}")
     print("Please run: python3 setup.py")
@@ -117,30 +123,38 @@ def show_dashboard():
     col1, col2, col3, col4 = st.columns(4)
     
     try:
-        conn = sqlite3.connect("market_intelligence.db")
-        
-        # Total deals
-        total_deals = pd.read_sql("SELECT COUNT(*) as count FROM deals", conn).iloc[0]['count']
-        
-        # Deals this month
-        deals_this_month = pd.read_sql("""
-            SELECT COUNT(*) as count FROM deals 
-            WHERE announcement_date >= date('now', 'start of month')
-        """, conn).iloc[0]['count']
-        
-        # Average deal size
-        avg_deal_size = pd.read_sql("""
-            SELECT AVG(deal_value) as avg_size FROM deals 
-            WHERE deal_value > 0
-        """, conn).iloc[0]['avg_size'] or 0
-        
-        # Active deals
-        active_deals = pd.read_sql("""
-            SELECT COUNT(*) as count FROM deals 
-            WHERE status IN ('Announced', 'Pending')
-        """, conn).iloc[0]['count']
-        
-        conn.close()
+        # Columnar snapshot first; SQLite until an import has built it
+        metrics = AnalyticsSnapshot().deal_metrics()
+        if metrics is not None:
+            total_deals = metrics['total_deals']
+            deals_this_month = metrics['deals_this_month']
+            avg_deal_size = metrics['avg_deal_size']
+            active_deals = metrics['active_deals']
+        else:
+            conn = sqlite3.connect("market_intelligence.db")
+            
+            # Total deals
+            total_deals = pd.read_sql("SELECT COUNT(*) as count FROM deals", conn).iloc[0]['count']
+            
+            # Deals this month
+            deals_this_month = pd.read_sql("""
+                SELECT COUNT(*) as count FROM deals 
+                WHERE announcement_date >= date('now', 'start of month')
+            """, conn).iloc[0]['count']
+            
+            # Average deal size
+            avg_deal_size = pd.read_sql("""
+                SELECT AVG(deal_value) as avg_size FROM deals 
+                WHERE deal_value > 0
+            """, conn).iloc[0]['avg_size'] or 0
+            
+            # Active deals
+            active_deals = pd.read_sql("""
+                SELECT COUNT(*) as count FROM deals 
+                WHERE status IN ('Announced', 'Pending')
+            """, conn).iloc[0]['count']
+            
+            conn.close()
         
         with col1:
             st.metric("Total Deals", f"{total_deals:,}", f"+{deals_this_month} this month")
@@ -177,21 +191,23 @@ def show_dashboard():
 def show_deal_volume_chart():
     """Show deal volume over time"""
     try:
-        conn = sqlite3.connect("market_intelligence.db")
-        
-        query = """
-            SELECT 
-                strftime('%Y-%m', announcement_date) as month,
-                COUNT(*) as deal_count,
-                SUM(deal_value) as total_value
-            FROM deals 
-            WHERE announcement_date >= date('now', '-12 months')
-            GROUP BY strftime('%Y-%m', announcement_date)
-            ORDER BY month
-        """
-        
-        df = pd.read_sql(query, conn)
-        conn.close()
+        df = AnalyticsSnapshot().monthly_deal_volume(months=12)
+        if df is None:
+            conn = sqlite3.connect("market_intelligence.db")
+            
+            query = """
+                SELECT 
+                    strftime('%Y-%m', announcement_date) as month,
+                    COUNT(*) as deal_count,
+                    SUM(deal_value) as total_value
+                FROM deals 
+                WHERE announcement_date >= date('now', '-12 months')
+                GROUP BY strftime('%Y-%m', announcement_date)
+                ORDER BY month
+            """
+            
+            df = pd.read_sql(query, conn)
+            conn.close()
         
         if not df.empty:
             fig = px.line(df, x='month', y='deal_count', 
@@ -208,19 +224,21 @@ def show_deal_volume_chart():
 def show_industry_distribution():
     """Show industry distribution pie chart"""
     try:
-        conn = sqlite3.connect("market_intelligence.db")
-        
-        query = """
-            SELECT industry, COUNT(*) as count
-            FROM deals 
-            WHERE industry IS NOT NULL
-            GROUP BY industry
-            ORDER BY count DESC
-            LIMIT 10
-        """
-        
-        df = pd.read_sql(query, conn)
-        conn.close()
+        df = AnalyticsSnapshot().industry_distribution(limit=10)
+        if df is None:
+            conn = sqlite3.connect("market_intelligence.db")
+            
+            query = """
+                SELECT industry, COUNT(*) as count
+                FROM deals 
+                WHERE industry IS NOT NULL
+                GROUP BY industry
+                ORDER BY count DESC
+                LIMIT 10
+            """
+            
+            df = pd.read_sql(query, conn)
+            conn.close()
         
         if not df.empty:
             fig = px.pie(df, values='count', names='industry', 
@@ -332,6 +350,14 @@ def show_data_management(data_ingestion):
     
     with tab3:
         show_data_table("filings", "Filings Database")
+    
+    with st.expander("🧮 Memory Footprint"):
+        st.caption("Memory of each table loaded with default dtypes and with the compact dtypes used by the app")
+        if st.button("Measure Tables"):
+            conn = sqlite3.connect("market_intelligence.db")
+            report = memory_report(conn)
+            conn.close()
+            st.dataframe(report, use_container_width=True, hide_index=True)
 
 def show_data_table(table_name: str, title: str):
     """Show data table with filtering options"""
@@ -460,7 +486,12 @@ def search_companies_with_filters(filters: dict) -> pd.DataFrame:
     try:
         conn = sqlite3.connect("market_intelligence.db")
         
-        query = "SELECT * FROM companies WHERE 1=1"
+        # Deal activity per company is an index lookup on deal_parties
+        query = """
+            SELECT companies.*,
+                   (SELECT COUNT(*) FROM deal_parties p WHERE p.company_id = companies.id) AS deal_count
+            FROM companies WHERE 1=1
+        """
         params = []
         
         if filters.get('industries'):
@@ -494,32 +525,16 @@ def search_companies_with_filters(filters: dict) -> pd.DataFrame:
 def apply_company_tags(company_names: list, tag: str):
     """Apply tags to selected companies"""
     try:
-        conn = sqlite3.connect("market_intelligence.db")
-        cursor = conn.cursor()
-        
-        for company_name in company_names:
-            # Get existing tags
-            existing_tags = cursor.execute(
-                "SELECT tags FROM companies WHERE company_name = ?", 
-                (company_name,)
-            ).fetchone()
-            
-            if existing_tags and existing_tags[0]:
-                current_tags = existing_tags[0].split(',')
-                if tag not in current_tags:
-                    new_tags = ','.join(current_tags + [tag])
-                else:
-                    new_tags = existing_tags[0]
-            else:
-                new_tags = tag
-            
-            cursor.execute(
-                "UPDATE companies SET tags = ? WHERE company_name = ?",
-                (new_tags, company_name)
-            )
-        
-        conn.commit()
-        conn.close()
+        # One statement appends the tag unless the company already has it
+        get_write_buffer("market_intelligence.db").execute("""
+            UPDATE companies
+            SET tags = CASE
+                WHEN tags IS NULL OR tags = '' THEN ?
+                WHEN instr(',' || tags || ',', ',' || ? || ',') > 0 THEN tags
+                ELSE tags || ',' || ?
+            END
+            WHERE company_name = ?
+        """, [(tag, tag, tag, company_name) for company_name in company_names], many=True)
         
     except Exception as e:
         st.error(f"Error applying tags: {str(e)}")
@@ -529,15 +544,17 @@ def get_company_transaction_history(company_name: str) -> pd.DataFrame:
     try:
         conn = sqlite3.connect("market_intelligence.db")
         
-        query = """
+        # Name variants resolve to the same entity, matched on the indexed id columns
+        condition, params = entity_filter(conn, company_name, ['target_id', 'acquirer_id'])
+        query = f"""
             SELECT target_name, acquirer_name, deal_value, deal_type, 
                    announcement_date, status
             FROM deals 
-            WHERE target_name LIKE ? OR acquirer_name LIKE ?
+            WHERE {condition}
             ORDER BY announcement_date DESC
         """
         
-        df = pd.read_sql(query, conn, params=[f"%{company_name}%", f"%{company_name}%"])
+        df = read_frame(query, conn, params=params)
         conn.close()
         
         return df
@@ -573,17 +590,11 @@ def show_watchlist():
 def add_to_watchlist(entity_type: str, entity_name: str, notes: str) -> bool:
     """Add item to watchlist"""
     try:
-        conn = sqlite3.connect("market_intelligence.db")
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+        get_write_buffer("market_intelligence.db").execute("""
             INSERT INTO watchlist (user_id, entity_type, entity_name, notes)
             VALUES (?, ?, ?, ?)
         """, ("demo_user", entity_type, entity_name, notes))
         
-        conn.commit()
-        conn.close()
-        
         return True
         
     except Exception as e:
@@ -631,41 +642,108 @@ def show_due_diligence():
         
         st.subheader("📈 Deal Facts")
         show_deal_facts(company_name)
+        
+        st.subheader("📰 Press Releases")
+        show_company_press_releases(company_name)
+    
+    search_terms = st.text_input("Search filings and press releases", help="Separate alternative terms with commas")
+    if search_terms:
+        show_document_search([term.strip() for term in search_terms.split(',')], company_name or None)
 
 def show_company_filings(company_name: str):
     """Show recent filings for a company"""
     try:
         conn = sqlite3.connect("market_intelligence.db")
         
-        df = pd.read_sql("""
-            SELECT filing_type, filing_date, red_flags, deal_mentions
+        # Company names are matched through their entity ids, not a name scan
+        condition, params = entity_filter(conn, company_name, ['company_id'])
+        df = pd.read_sql(f"""
+            SELECT id, filing_type, filing_date, red_flags, deal_mentions
             FROM filings
-            WHERE company_name LIKE ?
+            WHERE {condition}
             ORDER BY filing_date DESC
             LIMIT 10
-        """, conn, params=[f"%{company_name}%"])
+        """, conn, params=params)
         
         conn.close()
         
         if not df.empty:
-            st.dataframe(df, use_container_width=True, hide_index=True)
+            st.dataframe(df.drop(columns='id'), use_container_width=True, hide_index=True)
+            
+            # Full text is only fetched from the blob store when a filing is opened
+            labels = {row['id']: f"{row['filing_type']} ({row['filing_date']})" for _, row in df.iterrows()}
+            filing_id = st.selectbox("Open filing", [None] + list(labels),
+                                     format_func=lambda key: "Select a filing" if key is None else labels[key])
+            if filing_id is not None:
+                content = FilingBlobStore("market_intelligence.db").get_filing_content(int(filing_id))
+                st.text_area("Filing content", content or "No content stored for this filing", height=300)
         else:
             st.info("No filings found")
             
     except Exception as e:
         st.error(f"Error loading filings: {str(e)}")
 
+def show_company_press_releases(company_name: str):
+    """Show stored press releases for a company with their precomputed enrichment"""
+    try:
+        conn = sqlite3.connect("market_intelligence.db")
+        
+        condition, params = entity_filter(conn, company_name, ['company_id'])
+        df = pd.read_sql(f"""
+            SELECT date, title, sentiment, deal_mentions, red_flags
+            FROM press_releases
+            WHERE {condition}
+            ORDER BY date DESC
+            LIMIT 10
+        """, conn, params=params)
+        
+        conn.close()
+        
+        if not df.empty:
+            st.dataframe(df, use_container_width=True, hide_index=True)
+        else:
+            st.info("No press releases found")
+            
+    except Exception as e:
+        st.error(f"Error loading press releases: {str(e)}")
+
+def show_document_search(terms: list, company_name: str = None):
+    """Ranked full-text search over filings and press releases"""
+    try:
+        search_index = SearchIndex("market_intelligence.db")
+        results = [
+            ("Filing", search_index.search_filings(terms, company_name)),
+            ("Press release", search_index.search_press_releases(terms, company_name))
+        ]
+        
+        found = False
+        for kind, df in results:
+            for _, row in df.iterrows():
+                found = True
+                heading = row['title'] if 'title' in row else row['filing_type']
+                date = row['date'] if 'date' in row else row['filing_date']
+                st.markdown(f"**{kind} - {row['company_name']}: {heading}** ({date})")
+                st.caption(row['snippet'] or "")
+        
+        if not found:
+            st.info("No matching documents")
+            
+    except Exception as e:
+        st.error(f"Error searching documents: {str(e)}")
+
 def show_red_flags(company_name: str):
     """Show red flags for a company"""
     try:
         conn = sqlite3.connect("market_intelligence.db")
         
-        df = pd.read_sql("""
+        condition, params = entity_filter(conn, company_name, ['company_id'])
+        df = read_frame(f"""
             SELECT red_flags, filing_date, filing_type
             FROM filings
-            WHERE company_name LIKE ? AND red_flags IS NOT NULL AND red_flags != ''
+            WHERE {condition}
+              AND red_flags IS NOT NULL AND red_flags != ''
             ORDER BY filing_date DESC
-        """, conn, params=[f"%{company_name}%"])
+        """, conn, params=params)
         
         conn.close()
         
@@ -683,13 +761,14 @@ def show_deal_facts(company_name: str):
     try:
         conn = sqlite3.connect("market_intelligence.db")
         
-        df = pd.read_sql("""
+        condition, params = entity_filter(conn, company_name, ['target_id', 'acquirer_id'])
+        df = read_frame(f"""
             SELECT target_name, acquirer_name, deal_value, deal_type, 
                    announcement_date, status
             FROM deals
-            WHERE target_name LIKE ? OR acquirer_name LIKE ?
+            WHERE {condition}
             ORDER BY announcement_date DESC
-        """, conn, params=[f"%{company_name}%", f"%{company_name}%"])
+        """, conn, params=params)
         
         conn.close()
         
@@ -782,13 +861,14 @@ def generate_report(report_type: str, date_range: tuple, format_type: str, inclu
     try:
         conn = sqlite3.connect("market_intelligence.db")
         
+        # Exported money keeps full precision (no float32)
         if report_type == "Deal Summary":
             query = """
                 SELECT * FROM deals 
                 WHERE announcement_date BETWEEN ? AND ?
                 ORDER BY announcement_date DESC
             """
-            df = pd.read_sql(query, conn, params=[date_range[0], date_range[1]])
+            df = read_frame(query, conn, params=[date_range[0], date_range[1]], money_columns=())
         
         elif report_type == "Market Analysis":
             query = """
@@ -56,42 +56,26 @@ def get_alerts_system():
         st.error(f"Error loading alerts system: {str(e)}")
         return None
 
+@st.cache_resource
+def get_analytics_snapshot():
+    """Get cached columnar snapshot reader"""
+    from analytics_snapshot import AnalyticsSnapshot
+    return AnalyticsSnapshot("market_intelligence.db")
+
 @st.cache_data(ttl=300)  # Cache for 5 minutes
 def get_data_status() -> Dict:
     """Get data status with caching"""
     try:
+        from table_stats import read_table_stats
         conn = sqlite3.connect("market_intelligence.db")
-        
-        # Get counts in single query
-        query = """
-        SELECT 
-            'deals' as table_name, COUNT(*) as count FROM deals
-        UNION ALL
-        SELECT 'companies', COUNT(*) FROM companies  
-        UNION ALL
-        SELECT 'filings', COUNT(*) FROM filings
-        UNION ALL
-        SELECT 'alerts', COUNT(*) FROM alerts
-        """
-        
-        df = pd.read_sql(query, conn)
+        # Counters kept by triggers (see table_stats), not COUNT/MAX scans
+        stats = read_table_stats(conn)
         conn.close()
         
-        status = dict(zip(df['table_name'], df['count']))
+        status = {table: stats.get(table, {}).get('rows', 0) for table in ('deals', 'companies', 'filings', 'alerts')}
+        if stats.get('deals', {}).get('latest'):
+            status['latest_deal_import'] = stats['deals']['latest']
         
-        # Get latest import date
-        try:
-            conn = sqlite3.connect("market_intelligence.db")
-            latest_import = pd.read_sql(
-                "SELECT MAX(import_date) as latest FROM deals", 
-                conn
-            ).iloc[0]['latest']
-            conn.close()
-            if latest_import:
-                status['latest_deal_import'] = latest_import
-        except:
-            pass
-            
         return status
         
     except Exception as e:
@@ -101,6 +85,11 @@ def get_data_status() -> Dict:
 def get_dashboard_metrics() -> Dict:
     """Get dashboard metrics with caching"""
     try:
+        # Columnar snapshot first; SQLite until an import has built it
+        metrics = get_analytics_snapshot().deal_metrics()
+        if metrics is not None:
+            return metrics
+        
         conn = sqlite3.connect("market_intelligence.db")
         
         # Combine queries for efficiency
@@ -131,6 +120,10 @@ def get_dashboard_metrics() -> Dict:
 def get_deal_volume_data():
     """Get deal volume chart data with caching"""
     try:
+        df = get_analytics_snapshot().monthly_deal_volume(months=12)
+        if df is not None:
+            return df
+        
         conn = sqlite3.connect("market_intelligence.db")
         
         query = """
@@ -156,6 +149,10 @@ def get_deal_volume_data():
 def get_industry_distribution():
     """Get industry distribution with caching"""
     try:
+        df = get_analytics_snapshot().industry_distribution(limit=10)
+        if df is not None:
+            return df
+        
         conn = sqlite3.connect("market_intelligence.db")
         
         query = """
@@ -106,6 +106,25 @@ def check_system_resources():
         db_size = db_path.stat().st_size / (1024**2)  # MB
         print(f"Database Size: {db_size:.2f}MB")
 
+def report_frame_memory():
+    """Report table memory with default and compact DataFrame dtypes"""
+    print("\n🧮 DataFrame Memory")
+    print("=" * 50)
+    
+    try:
+        from frame_dtypes import memory_report
+        conn = sqlite3.connect("market_intelligence.db")
+        report = memory_report(conn)
+        conn.close()
+        
+        for _, row in report.iterrows():
+            print(f"{row['table']}: {row['rows']} rows, {row['before_mb']:.2f}MB -> {row['after_mb']:.2f}MB ({row['saved_pct']}% saved)")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Memory report failed: {e}")
+        return False
+
 def optimize_database():
     """Optimize database for better performance"""
     print("\n🔧 Database Optimization")
@@ -130,6 +149,14 @@ def optimize_database():
             cursor.execute(index_sql)
             print(f"✅ Created index: {index_sql.split()[-1]}")
         
+        # Cached tokens and filing bodies no stored document refers to any more
+        from filing_store import FilingBlobStore
+        from token_cache import TokenCache
+        conn.commit()
+        pruned_tokens = TokenCache("market_intelligence.db").prune()
+        pruned_bodies = FilingBlobStore("market_intelligence.db").prune()
+        print(f"✅ Pruned {pruned_tokens} cached token sets and {pruned_bodies} filing bodies")
+        
         # Vacuum database
         cursor.execute("VACUUM")
         print("✅ Database vacuumed")
@@ -188,6 +215,7 @@ def main():
     tests = [
         ("Startup Performance", measure_app_startup),
         ("Database Performance", test_database_performance),
+        ("DataFrame Memory", report_frame_memory),
         ("Database Optimization", optimize_database)
     ]
     
@@ -97,6 +97,29 @@ def start_streamlit():
     
     return True
 
+def run_ingest_daemon(args):
+    """Import files dropped into a folder; --once processes the current files and exits"""
+    folders = [arg for arg in args if not arg.startswith("--")]
+    if not folders or not Path(folders[0]).is_dir():
+        print("Usage: python run.py --ingest-daemon <directory> [--once]")
+        return False
+    
+    from ingest_daemon import IngestDaemon
+    daemon = IngestDaemon(folders[0])
+    
+    if "--once" in args:
+        entries = daemon.run_once()
+        for entry in entries:
+            daemon.print_entry(entry)
+        print(f"📦 Processed {len(entries)} files")
+        return all(entry['status'] != 'failed' for entry in entries)
+    
+    try:
+        daemon.run_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Ingestion daemon stopped")
+    return True
+
 def main():
     """Main entry point"""
     import sys
@@ -111,6 +134,8 @@ def main():
             print("⚡ Starting ultra-fast mode...")
             subprocess.run(["streamlit", "run", "app_fast.py", "--server.port", "8501"])
             return True
+        elif sys.argv[1] == "--ingest-daemon":
+            return run_ingest_daemon(sys.argv[2:])
     
     # Check if we're in the right directory
     required_files = ['main_app.py', 'enhanced_data_ingestion.py', 'requirements.txt']
@@ -0,0 +1,304 @@
+"""
+Full-text search for the M&A Market Intelligence Tool
+SQLite FTS5 indexes over filings, press releases and deal parties, replacing
+LIKE '%term%' scans with ranked MATCH queries
+"""
+
+import re
+import sqlite3
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+FTS_TOKENIZER = "unicode61 remove_diacritics 2"
+
+# Tables indexed through external-content FTS tables kept in sync by
+# triggers; a table is skipped until it exists
+TRIGGER_INDEXED_TABLES = {
+    'deals': ['target_name', 'acquirer_name'],
+    'press_releases': ['company_name', 'title', 'content']
+}
+
+# Filing bodies are compressed in filing_blobs, which triggers cannot read,
+# so filings_fts is contentless and filled from Python as filings are written
+FILING_FTS_COLUMNS = ['company_name', 'filing_type', 'red_flags', 'content']
+
+# Filing columns whose updates change the indexed values (content through its hash)
+FILING_TRACKED_COLUMNS = ['company_name', 'filing_type', 'red_flags', 'content_hash']
+
+# Filings indexed per batch when catching up with existing rows
+INDEX_BATCH_ROWS = 1000
+
+# Characters of context around the first hit in a filing snippet
+SNIPPET_CHARS = 160
+
+
+def fts_query(terms: Iterable[str], prefix: bool = True) -> Optional[str]:
+    """
+    FTS5 MATCH expression matching any of terms.
+    Each term becomes a quoted phrase (so user input cannot inject query
+    syntax), prefix-matched on its last word; None if no term has a word.
+    """
+    phrases = []
+    for term in terms:
+        words = re.findall(r'\w+', str(term))
+        if words:
+            phrases.append('"' + ' '.join(words) + '"' + ('*' if prefix else ''))
+    return ' OR '.join(phrases) if phrases else None
+
+
+def column_query(column: str, terms: Iterable[str], prefix: bool = True) -> Optional[str]:
+    """MATCH expression restricted to one indexed column"""
+    query = fts_query(terms, prefix)
+    return f"{column} : ({query})" if query else None
+
+
+def create_search_index(cursor: sqlite3.Cursor):
+    """
+    Create the FTS tables and their sync triggers, building the index for
+    rows written before it existed
+    """
+    existing = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS filings_fts
+        USING fts5({', '.join(FILING_FTS_COLUMNS)}, content='', tokenize='{FTS_TOKENIZER}')
+    ''')
+    
+    # Indexed filings that were deleted or updated, with the values they were
+    # indexed under: a contentless index only forgets a row given those values
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS filings_fts_pending (
+            id INTEGER PRIMARY KEY,
+            {' TEXT, '.join(FILING_TRACKED_COLUMNS)} TEXT
+        )
+    ''')
+    if 'filings_fts' in existing and 'filings_fts_pending' not in existing:
+        # Indexes built before deletes were tracked may hold stale rows; rebuild once
+        cursor.execute("INSERT INTO filings_fts (filings_fts) VALUES ('delete-all')")
+    
+    # Only the first change since a row was indexed is kept (later OLD values
+    # were never indexed), and rows not indexed yet need no entry
+    tracked = ', '.join(FILING_TRACKED_COLUMNS)
+    old_values = ', '.join(f"OLD.{col}" for col in FILING_TRACKED_COLUMNS)
+    for trigger, event in (
+        ("filings_fts_delete", "AFTER DELETE ON filings"),
+        ("filings_fts_update", f"AFTER UPDATE OF {tracked} ON filings")
+    ):
+        cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        cursor.execute(f'''
+            CREATE TRIGGER {trigger} {event}
+            WHEN OLD.id <= (SELECT rowid FROM filings_fts ORDER BY rowid DESC LIMIT 1)
+                AND NOT EXISTS (SELECT 1 FROM filings_fts_pending WHERE id = OLD.id)
+            BEGIN
+                INSERT INTO filings_fts_pending (id, {tracked}) VALUES (OLD.id, {old_values});
+            END
+        ''')
+    
+    for table, columns in TRIGGER_INDEXED_TABLES.items():
+        if table not in existing:
+            continue
+        fts = f"{table}_fts"
+        column_list = ', '.join(columns)
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts}
+            USING fts5({column_list}, content='{table}', content_rowid='id', tokenize='{FTS_TOKENIZER}')
+        ''')
+        
+        new_values = ', '.join(f"NEW.{col}" for col in columns)
+        old_values = ', '.join(f"OLD.{col}" for col in columns)
+        delete_old = f"INSERT INTO {fts} ({fts}, rowid, {column_list}) VALUES ('delete', OLD.id, {old_values});"
+        insert_new = f"INSERT INTO {fts} (rowid, {column_list}) VALUES (NEW.id, {new_values});"
+        for trigger, event, body in (
+            (f"{table}_fts_insert", f"AFTER INSERT ON {table}", insert_new),
+            (f"{table}_fts_delete", f"AFTER DELETE ON {table}", delete_old),
+            (f"{table}_fts_update", f"AFTER UPDATE OF {column_list} ON {table}", delete_old + insert_new)
+        ):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            cursor.execute(f"CREATE TRIGGER {trigger} {event} BEGIN {body} END")
+        
+        if fts not in existing:
+            cursor.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+    
+    sync_filings_index(cursor)
+
+
+def sync_filings_index(conn, texts: Optional[Dict[str, str]] = None) -> int:
+    """
+    Bring filings_fts up to date: forget deleted filings, re-index updated
+    ones and add new ones. Returns the number of filings (re)indexed; texts
+    is passed on to index_new_filings.
+    """
+    return _apply_pending_filings(conn) + index_new_filings(conn, texts)
+
+
+def _apply_pending_filings(conn) -> int:
+    """Apply the FTS5 'delete' command to changed filings and index their current values"""
+    columns = ', '.join(FILING_FTS_COLUMNS)
+    reindexed = 0
+    while True:
+        pending = conn.execute(
+            f"SELECT id, {', '.join(FILING_TRACKED_COLUMNS)} FROM filings_fts_pending ORDER BY id LIMIT ?",
+            (INDEX_BATCH_ROWS,)
+        ).fetchall()
+        if not pending:
+            return reindexed
+        
+        old_texts = _load_bodies(conn, {row[4] for row in pending})
+        if any(digest is not None and old_texts.get(digest) is None for *_, digest in pending):
+            # A body the index holds is gone, so its row cannot be deleted; rebuild from filings
+            conn.execute("INSERT INTO filings_fts (filings_fts) VALUES ('delete-all')")
+            conn.execute("DELETE FROM filings_fts_pending")
+            return reindexed
+        
+        conn.executemany(
+            f"INSERT INTO filings_fts (filings_fts, rowid, {columns}) VALUES ('delete', ?, ?, ?, ?, ?)",
+            [(filing_id, company, filing_type, red_flags, old_texts.get(digest))
+             for filing_id, company, filing_type, red_flags, digest in pending]
+        )
+        
+        ids = [row[0] for row in pending]
+        placeholders = ', '.join('?' for _ in ids)
+        rows = conn.execute(
+            f"SELECT id, company_name, filing_type, red_flags, content_hash FROM filings WHERE id IN ({placeholders})",
+            ids
+        ).fetchall()
+        new_texts = _load_bodies(conn, {row[4] for row in rows})
+        conn.executemany(
+            f"INSERT INTO filings_fts (rowid, {columns}) VALUES (?, ?, ?, ?, ?)",
+            [(filing_id, company, filing_type, red_flags, new_texts.get(digest))
+             for filing_id, company, filing_type, red_flags, digest in rows]
+        )
+        conn.execute(f"DELETE FROM filings_fts_pending WHERE id IN ({placeholders})", ids)
+        reindexed += len(rows)
+
+
+def _load_bodies(conn, hashes) -> Dict[str, Optional[str]]:
+    """Decompressed filing bodies by content hash (None for hashes without a blob)"""
+    bodies = {}
+    for digest in set(hashes) - {None}:
+        blob = conn.execute("SELECT content FROM filing_blobs WHERE content_hash = ?", (digest,)).fetchone()
+        bodies[digest] = zlib.decompress(blob[0]).decode('utf-8') if blob else None
+    return bodies
+
+
+def index_new_filings(conn, texts: Optional[Dict[str, str]] = None) -> int:
+    """
+    Add filings not yet in filings_fts and return how many were indexed.
+    texts maps content hashes to bodies the caller still holds, sparing their
+    decompression; other bodies are read from filing_blobs.
+    """
+    texts = texts or {}
+    indexed = 0
+    while True:
+        last_id = conn.execute("SELECT rowid FROM filings_fts ORDER BY rowid DESC LIMIT 1").fetchone()
+        rows = conn.execute('''
+            SELECT id, company_name, filing_type, red_flags, content_hash FROM filings
+            WHERE id > ? ORDER BY id LIMIT ?
+        ''', (last_id[0] if last_id else 0, INDEX_BATCH_ROWS)).fetchall()
+        if not rows:
+            return indexed
+        
+        # Bodies decompressed for this batch only, so catching up stays bounded in memory
+        batch_texts = dict(texts)
+        batch_texts.update(_load_bodies(conn, {row[4] for row in rows} - set(texts)))
+        
+        conn.executemany(
+            f"INSERT INTO filings_fts (rowid, {', '.join(FILING_FTS_COLUMNS)}) VALUES (?, ?, ?, ?, ?)",
+            [(filing_id, company, filing_type, red_flags, batch_texts.get(digest))
+             for filing_id, company, filing_type, red_flags, digest in rows]
+        )
+        indexed += len(rows)
+
+
+def make_snippet(text: Optional[str], terms: Iterable[str], width: int = SNIPPET_CHARS) -> str:
+    """Window of text around the first word starting with a query term, hits in bold"""
+    if not text:
+        return ''
+    words = [word for term in terms for word in re.findall(r'\w+', str(term))]
+    if not words:
+        return text[:width]
+    
+    hit = re.compile(r'\b(?:' + '|'.join(re.escape(word) for word in words) + r')\w*', re.IGNORECASE)
+    first = hit.search(text)
+    start = max(0, first.start() - width // 2) if first else 0
+    window = text[start:start + width]
+    
+    snippet = hit.sub(lambda match: f"**{match.group(0)}**", window)
+    return ('...' if start > 0 else '') + snippet + ('...' if start + width < len(text) else '')
+
+
+class SearchIndex:
+    """Ranked full-text queries over filings and press releases"""
+    
+    def __init__(self, db_path: str = "market_intelligence.db"):
+        self.db_path = db_path
+    
+    def search_filings(self, terms: List[str], company: Optional[str] = None, limit: int = 20) -> pd.DataFrame:
+        """
+        Filings matching any of terms, best BM25 score first, with a snippet.
+        Only the returned filings' bodies are decompressed.
+        """
+        query = self._match_expression(terms, company)
+        if query is None:
+            return pd.DataFrame()
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            # Deleted or updated filings are applied first, so results and snippets are current
+            if conn.execute("SELECT 1 FROM filings_fts_pending LIMIT 1").fetchone():
+                conn.execute("BEGIN IMMEDIATE")
+                sync_filings_index(conn)
+                conn.commit()
+            
+            df = pd.read_sql('''
+                SELECT f.id, f.company_name, f.filing_type, f.filing_date, f.red_flags,
+                       -s.rank AS score, b.content AS blob
+                FROM (SELECT rowid, rank FROM filings_fts WHERE filings_fts MATCH ? ORDER BY rank LIMIT ?) s
+                JOIN filings f ON f.id = s.rowid
+                LEFT JOIN filing_blobs b ON b.content_hash = f.content_hash
+                ORDER BY s.rank
+            ''', conn, params=[query, limit])
+        finally:
+            conn.close()
+        
+        df['snippet'] = [
+            make_snippet(zlib.decompress(blob).decode('utf-8') if blob is not None else None, terms)
+            for blob in df.pop('blob')
+        ]
+        return df
+    
+    def search_press_releases(self, terms: List[str], company: Optional[str] = None, limit: int = 20) -> pd.DataFrame:
+        """Press releases matching any of terms, best BM25 score first, with a snippet"""
+        query = self._match_expression(terms, company)
+        if query is None:
+            return pd.DataFrame()
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'press_releases_fts'").fetchone()
+            if not exists:
+                return pd.DataFrame()
+            return pd.read_sql('''
+                SELECT p.id, p.company_name, p.title, p.date, -press_releases_fts.rank AS score,
+                       snippet(press_releases_fts, -1, '**', '**', '...', 24) AS snippet
+                FROM press_releases_fts JOIN press_releases p ON p.id = press_releases_fts.rowid
+                WHERE press_releases_fts MATCH ?
+                ORDER BY press_releases_fts.rank
+                LIMIT ?
+            ''', conn, params=[query, limit])
+        finally:
+            conn.close()
+    
+    def _match_expression(self, terms: List[str], company: Optional[str]) -> Optional[str]:
+        """
+        MATCH expression for terms, optionally restricted to a company.
+        Document terms match whole words: prefix expansion over large bodies
+        costs far more than over names.
+        """
+        query = fts_query(terms, prefix=False)
+        company_filter = column_query('company_name', [company]) if company else None
+        if query is None or company_filter is None:
+            return query
+        return f"({query}) AND {company_filter}"
@@ -0,0 +1,142 @@
+"""
+Lexicon sentiment scoring for the M&A Market Intelligence Tool
+A column of documents is tokenized in one vectorized pass over its UTF-8
+bytes; lexicon hits form a sparse (document, term) matrix, and scores are
+its product with the lexicon's weight vector
+"""
+
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Documents tokenized per pass; bounds the byte-level working arrays
+SCORE_BATCH_DOCS = 20000
+
+# Bytes that belong to a word: ASCII letters, digits, underscore and every
+# byte of a multi-byte UTF-8 character, so "headstrong" is one token
+WORD_BYTES = np.zeros(256, dtype=bool)
+WORD_BYTES[list(b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_')] = True
+WORD_BYTES[0x80:] = True
+
+
+def weighted_lexicon(positive_words: Iterable[str], negative_words: Iterable[str],
+                     weights: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """Lexicon of +1 positive and -1 negative words, with weights overriding or adding terms"""
+    lexicon = {word.lower(): 1.0 for word in positive_words}
+    lexicon.update({word.lower(): -1.0 for word in negative_words})
+    lexicon.update({word.lower(): float(weight) for word, weight in (weights or {}).items()})
+    return lexicon
+
+
+class SentimentScorer:
+    """
+    Weighted lexicon scorer over whole columns.
+    A document's score is its polarity, sum(weight * count) over
+    sum(|weight| * count) of the lexicon words it contains, from -1 (only
+    negative words) to 1; documents without lexicon words score 0.
+    Terms are single words matched whole, case-insensitively.
+    """
+    
+    def __init__(self, lexicon: Dict[str, float]):
+        terms = sorted(word.lower() for word in lexicon)
+        for term in terms:
+            if not term or not WORD_BYTES[np.frombuffer(term.encode('utf-8'), dtype=np.uint8)].all():
+                raise ValueError(f"Lexicon terms must be single words: {term!r}")
+        self.terms = terms
+        self.weights = np.array([float(lexicon[term]) for term in terms])
+        
+        # Terms grouped by encoded length, each group as a sorted fixed-width
+        # byte array that tokens of that length are binary-searched in
+        self._terms_by_length: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        encoded = [term.encode('utf-8') for term in terms]
+        for length in sorted({len(term) for term in encoded}):
+            term_ids = np.array([i for i, term in enumerate(encoded) if len(term) == length])
+            values = np.array([encoded[i] for i in term_ids], dtype=f'S{length}')
+            order = np.argsort(values)
+            self._terms_by_length[length] = (values[order], term_ids[order])
+    
+    def term_document_matrix(self, texts: pd.Series, lowered: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Lexicon hits of a column as a sparse matrix in coordinate form:
+        (document positions, term indexes), one entry per occurrence.
+        lowered skips lower-casing texts that already are.
+        """
+        rows, columns = [], []
+        for start in range(0, len(texts), SCORE_BATCH_DOCS):
+            batch_rows, batch_columns = self._batch_hits(texts.iloc[start:start + SCORE_BATCH_DOCS], lowered)
+            rows.append(batch_rows + start)
+            columns.append(batch_columns)
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(rows), np.concatenate(columns)
+    
+    def score_series(self, texts: pd.Series) -> pd.DataFrame:
+        """Polarity score and label of each document in a column"""
+        rows, columns = self.term_document_matrix(texts)
+        return self._score(rows, columns, texts.index)
+    
+    def score_token_series(self, tokens: Sequence[str], index: pd.Index) -> pd.DataFrame:
+        """Polarity score and label of each tokenized document (e.g. from TokenCache.tokens)"""
+        # Tokens are lower-cased words between spaces, so they split into the
+        # same words as the raw text through the vectorized byte path
+        rows, columns = self.term_document_matrix(pd.Series(tokens, dtype=object), lowered=True)
+        return self._score(rows, columns, index)
+    
+    def score_text(self, text) -> Tuple[float, str]:
+        """Polarity score and label of one document"""
+        result = self.score_series(pd.Series([text], dtype=object)).iloc[0]
+        return float(result['sentiment_score']), result['sentiment']
+    
+    def _score(self, rows: np.ndarray, columns: np.ndarray, index: pd.Index) -> pd.DataFrame:
+        """Scores and labels from a term-document matrix in coordinate form (one entry per occurrence)"""
+        # The sparse matrix-vector products, as weighted row sums
+        weighted = np.bincount(rows, weights=self.weights[columns], minlength=len(index))
+        magnitude = np.bincount(rows, weights=np.abs(self.weights[columns]), minlength=len(index))
+        scores = np.divide(weighted, magnitude, out=np.zeros(len(index)), where=magnitude > 0)
+        
+        labels = np.where(scores > 0, "Positive", np.where(scores < 0, "Negative", "Neutral"))
+        return pd.DataFrame({'sentiment_score': scores, 'sentiment': labels}, index=index)
+    
+    def _batch_hits(self, texts: pd.Series, lowered: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """Lexicon hits of one batch, with document positions relative to the batch"""
+        strings = pa.array(texts.astype('string'), type=pa.large_string(), from_pandas=True)
+        if not lowered:
+            strings = pc.utf8_lower(strings)
+        _, offset_buffer, data_buffer = strings.buffers()
+        offsets = np.frombuffer(offset_buffer, dtype=np.int64)[strings.offset:strings.offset + len(strings) + 1]
+        if data_buffer is None or offsets[-1] == offsets[0]:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        data = np.frombuffer(data_buffer, dtype=np.uint8)[offsets[0]:offsets[-1]]
+        offsets = offsets - offsets[0]
+        
+        # Tokens are maximal runs of word bytes, cut at document boundaries
+        in_word = WORD_BYTES[data]
+        starts = in_word.copy()
+        starts[1:] &= ~in_word[:-1]
+        ends = in_word.copy()
+        ends[:-1] &= ~in_word[1:]
+        non_empty = offsets[:-1] < offsets[1:]
+        doc_starts, doc_ends = offsets[:-1][non_empty], offsets[1:][non_empty] - 1
+        starts[doc_starts] = in_word[doc_starts]
+        ends[doc_ends] = in_word[doc_ends]
+        token_starts = np.flatnonzero(starts)
+        token_lengths = np.flatnonzero(ends) + 1 - token_starts
+        
+        hit_starts, hit_terms = [], []
+        for length, (values, term_ids) in self._terms_by_length.items():
+            candidates = token_starts[token_lengths == length]
+            if not len(candidates):
+                continue
+            tokens = data[candidates[:, None] + np.arange(length)].view(f'S{length}').ravel()
+            positions = np.minimum(np.searchsorted(values, tokens), len(values) - 1)
+            matched = values[positions] == tokens
+            hit_starts.append(candidates[matched])
+            hit_terms.append(term_ids[positions[matched]])
+        if not hit_starts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        
+        hit_starts = np.concatenate(hit_starts)
+        return np.searchsorted(offsets, hit_starts, side='right') - 1, np.concatenate(hit_terms)
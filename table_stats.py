@@ -0,0 +1,70 @@
+"""
+Table statistics for the M&A Market Intelligence Tool
+Row counts and latest import timestamps kept current by triggers, so the
+sidebar data status is one primary-key read instead of COUNT/MAX scans
+"""
+
+import sqlite3
+from typing import Dict, Optional
+
+# Tables tracked and the timestamp column whose latest value is kept
+STATS_TABLES = {
+    'deals': 'import_date',
+    'companies': 'last_updated',
+    'filings': 'import_date',
+    'press_releases': 'import_date',
+    'alerts': 'created_date'
+}
+
+
+def create_table_stats(cursor: sqlite3.Cursor):
+    """
+    Create table_stats and its triggers, counting tables that have no stats
+    row yet once. Triggers are recreated on each call to follow STATS_TABLES.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS table_stats (
+            table_name TEXT PRIMARY KEY,
+            row_count INTEGER NOT NULL DEFAULT 0,
+            latest TIMESTAMP
+        )
+    ''')
+    
+    existing = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    counted = {row[0] for row in cursor.execute("SELECT table_name FROM table_stats")}
+    for table, column in STATS_TABLES.items():
+        if table not in existing:
+            continue
+        if table not in counted:
+            cursor.execute(f'''
+                INSERT INTO table_stats (table_name, row_count, latest)
+                SELECT '{table}', COUNT(*), MAX({column}) FROM {table}
+            ''')
+        
+        # Keeps the later of the stored and the new timestamp; NULLs never replace a value
+        newer = f"CASE WHEN NEW.{column} > latest OR latest IS NULL THEN NEW.{column} ELSE latest END"
+        for trigger, event, body in (
+            (f"{table}_stats_insert", f"AFTER INSERT ON {table}",
+             f"UPDATE table_stats SET row_count = row_count + 1, latest = {newer} WHERE table_name = '{table}';"),
+            (f"{table}_stats_delete", f"AFTER DELETE ON {table}",
+             f"UPDATE table_stats SET row_count = row_count - 1 WHERE table_name = '{table}';"),
+            (f"{table}_stats_update", f"AFTER UPDATE OF {column} ON {table}",
+             f"UPDATE table_stats SET latest = {newer} WHERE table_name = '{table}';")
+        ):
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            cursor.execute(f"CREATE TRIGGER {trigger} {event} BEGIN {body} END")
+
+
+def recount_table_stats(conn):
+    """Recompute every stats row from its table (e.g. after deleting the latest rows)"""
+    conn.execute("DELETE FROM table_stats")
+    create_table_stats(conn.cursor())
+    conn.commit()
+
+
+def read_table_stats(conn) -> Dict[str, Dict[str, Optional[object]]]:
+    """Row count and latest timestamp of each tracked table"""
+    return {
+        table: {'rows': row_count, 'latest': latest}
+        for table, row_count, latest in conn.execute("SELECT table_name, row_count, latest FROM table_stats")
+    }
@@ -0,0 +1,80 @@
+"""
+Keyword enrichment for filings and press releases
+Red flag and deal keywords are matched against a document's tokens, so one
+tokenization (shared through the token cache) serves both outputs and any
+later change to the keyword lists; sentiment is scored by sentiment.py
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from token_cache import PARALLEL_MIN_CHARS, Tokens, keyword_tokens, tokenize, tokenize_many
+
+
+class TextEnricher:
+    """
+    Keyword matcher built once from the red flag and deal keyword lists.
+    Keywords match whole words, and multi-word keywords match their words in
+    sequence; enrich_tokens returns the red flags and deal mentions of a
+    tokenized document together.
+    """
+    
+    def __init__(self, red_flag_keywords: List[str], deal_keywords: List[str]):
+        self.red_flag_keywords = list(red_flag_keywords)
+        self.deal_keywords = list(deal_keywords)
+        
+        self._red_flag_keys = [(keyword_tokens(k), k) for k in self.red_flag_keywords]
+        self._deal_keys = [(keyword_tokens(k), k) for k in self.deal_keywords]
+        
+        # Keywords by first word: a document's word set selects the few
+        # candidates, and only phrases need a substring check
+        self._keys_by_first_word: Dict[str, List[Tuple[Tokens, bool]]] = {}
+        for key in {key for key, _ in self._red_flag_keys + self._deal_keys}:
+            words = key.split()
+            if words:
+                self._keys_by_first_word.setdefault(words[0], []).append((key, len(words) == 1))
+        self._first_words = frozenset(self._keys_by_first_word)
+    
+    def find_keywords(self, tokens: Tokens) -> set:
+        """Return the keywords (in the Tokens layout) present in a tokenized document"""
+        found = set()
+        for word in self._first_words.intersection(tokens.split()):
+            for key, single_word in self._keys_by_first_word[word]:
+                if single_word or key in tokens:
+                    found.add(key)
+        return found
+    
+    def enrich_tokens(self, tokens: Tokens) -> Tuple[str, str]:
+        """Return (red_flags, deal_mentions) for a tokenized document"""
+        if not tokens:
+            return "", ""
+        
+        found = self.find_keywords(tokens)
+        
+        red_flags = ", ".join(keyword for key, keyword in self._red_flag_keys if key in found)
+        deal_mentions = ", ".join(keyword for key, keyword in self._deal_keys if key in found)
+        
+        return red_flags, deal_mentions
+    
+    def enrich_text(self, text) -> Tuple[str, str]:
+        """Return (red_flags, deal_mentions) for a single document"""
+        return self.enrich_tokens(tokenize(text))
+    
+    def enrich_token_series(self, tokens: Sequence[Tokens], index: pd.Index) -> pd.DataFrame:
+        """Enrich a column of tokenized documents (e.g. from TokenCache.tokens)"""
+        return pd.DataFrame(
+            [self.enrich_tokens(document) for document in tokens],
+            columns=['red_flags', 'deal_mentions'],
+            index=index
+        )
+    
+    def enrich_series(self, texts: pd.Series, workers: Optional[int] = 1,
+                      min_parallel_chars: int = PARALLEL_MIN_CHARS) -> pd.DataFrame:
+        """
+        Enrich a column of documents without the token cache.
+        
+        With workers > 1 (None means one per CPU) batches of at least
+        min_parallel_chars of text are tokenized in a process pool.
+        """
+        return self.enrich_token_series(tokenize_many(texts.tolist(), workers, min_parallel_chars), texts.index)
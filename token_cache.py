@@ -0,0 +1,274 @@
+"""
+Shared document token cache for the M&A Market Intelligence Tool
+Documents are tokenized once and their words stored under the hash of their
+text, so keyword enrichment, sentiment and alert keyword counts reuse them
+across imports, keyword list changes and alert runs
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from filing_store import content_hash
+
+# Below this much uncached text a process pool costs more to start than it saves
+PARALLEL_MIN_CHARS = 2000000
+
+# Shards per worker; several small shards even out uneven document sizes
+SHARDS_PER_WORKER = 4
+
+# Documents whose tokens each process keeps in memory
+MEMORY_CACHE_DOCS = 20000
+
+# Hashes looked up per query
+LOOKUP_BATCH_HASHES = 500
+
+# zlib level for stored tokens; the fastest level, as imports write every new document
+TOKEN_COMPRESSION_LEVEL = 1
+
+# Seconds to wait for the write lock when storing new tokens during an import
+BUSY_TIMEOUT = 30.0
+
+# Words are runs of ASCII letters, digits, underscore or non-ASCII characters,
+# the same word bytes the sentiment scorer splits on
+_WORDS = re.compile(r'[0-9a-z_\u0080-\U0010ffff]+')
+
+# A document's lower-cased words in order, each wrapped in spaces
+# (" sec  investigation "), so a keyword's occurrences are a substring count
+Tokens = str
+
+_caches: Dict[str, 'TokenCache'] = {}
+_caches_lock = threading.Lock()
+
+
+def get_token_cache(db_path: Optional[str] = "market_intelligence.db") -> 'TokenCache':
+    """Return the process-wide token cache for a database (None: memory only)"""
+    with _caches_lock:
+        token_cache = _caches.get(db_path)
+        if token_cache is None:
+            token_cache = TokenCache(db_path)
+            _caches[db_path] = token_cache
+        return token_cache
+
+
+def create_token_cache(cursor: sqlite3.Cursor):
+    """Create the persistent token table"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS document_tokens (
+            content_hash TEXT PRIMARY KEY,
+            tokens BLOB
+        )
+    ''')
+
+
+def _missing(text) -> bool:
+    """True for None, NaN and pd.NA"""
+    return text is None or (not isinstance(text, str) and pd.isna(text))
+
+
+def tokenize(text) -> Tokens:
+    """Tokens of a document; empty for missing text"""
+    if _missing(text):
+        return ""
+    return _wrap(_WORDS.findall(str(text).lower()))
+
+
+def _wrap(words: List[str]) -> Tokens:
+    """Words joined in the Tokens layout"""
+    return " " + "  ".join(words) + " " if words else ""
+
+
+def keyword_tokens(keyword: str) -> Tokens:
+    """
+    A keyword in the Tokens layout. It occurs in a document when its words
+    appear there whole and in sequence ("spin-off" also matches "spin off").
+    """
+    return _wrap(_WORDS.findall(keyword.lower()))
+
+
+def keyword_count(tokens: Tokens, keyword: Tokens) -> int:
+    """Occurrences of a keyword (from keyword_tokens) in a tokenized document"""
+    return tokens.count(keyword) if keyword else 0
+
+
+def tokenize_many(texts: List, workers: Optional[int] = 1,
+                  min_parallel_chars: int = PARALLEL_MIN_CHARS) -> List[Tokens]:
+    """
+    Tokenize a list of documents, in order.
+    
+    With workers > 1 (None means one per CPU) lists of at least
+    min_parallel_chars of text are sharded across a process pool.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers > 1 and len(texts) > 1:
+        total_chars = sum(len(text) for text in texts if isinstance(text, str))
+        if total_chars >= min_parallel_chars:
+            results = _tokenize_parallel(texts, workers)
+            if results is not None:
+                return results
+    return [tokenize(text) for text in texts]
+
+
+def _tokenize_parallel(texts: List, workers: int) -> Optional[List[Tokens]]:
+    """Tokenize contiguous shards in a process pool; None if the pool is unavailable"""
+    workers = min(workers, len(texts))
+    shard_count = min(len(texts), workers * SHARDS_PER_WORKER)
+    shard_size = -(-len(texts) // shard_count)
+    shards = [texts[start:start + shard_size] for start in range(0, len(texts), shard_size)]
+    
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map() yields shard results in submission order
+            results = []
+            for shard_result in executor.map(_tokenize_shard, shards):
+                results.extend(shard_result)
+            return results
+    except (OSError, RuntimeError):
+        # Process pools can be unavailable in restricted environments
+        return None
+
+
+def _tokenize_shard(texts: List) -> List[Tokens]:
+    """Tokenize one shard of documents inside a pool worker"""
+    return [tokenize(text) for text in texts]
+
+
+class TokenCache:
+    """
+    Tokens of documents keyed by the SHA-256 of their text, held in a
+    per-process LRU in front of the document_tokens table. Tokens do not
+    depend on any keyword list, so re-running enrichment with changed
+    keywords, or an alert over documents already imported, only re-matches.
+    With persist False, stored tokens are read but new ones are only
+    collected, for take_unstored to hand to the process that writes them.
+    """
+    
+    def __init__(self, db_path: Optional[str] = None, memory_docs: int = MEMORY_CACHE_DOCS,
+                 persist: bool = True):
+        self.db_path = db_path
+        self.memory_docs = memory_docs
+        self.persist = persist
+        self._unstored: Dict[str, Tokens] = {}
+        self._memory: 'OrderedDict[str, Tokens]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'stored_hits': 0, 'tokenized': 0}
+    
+    def tokens(self, texts: Iterable, workers: Optional[int] = 1) -> List[Tokens]:
+        """Tokens of each document, tokenizing only those never seen before"""
+        texts = list(texts)
+        hashes = [None if _missing(text) else content_hash(str(text)) for text in texts]
+        wanted = list(dict.fromkeys(digest for digest in hashes if digest is not None))
+        
+        found: Dict[str, Tokens] = {}
+        with self._lock:
+            for digest in wanted:
+                tokens = self._memory.get(digest)
+                if tokens is not None:
+                    self._memory.move_to_end(digest)
+                    found[digest] = tokens
+        self.stats['memory_hits'] += len(found)
+        
+        if self.db_path and len(found) < len(wanted):
+            stored = self._load([digest for digest in wanted if digest not in found])
+            self.stats['stored_hits'] += len(stored)
+            found.update(stored)
+        
+        # Documents still missing are tokenized once per distinct text
+        pending = {}
+        for text, digest in zip(texts, hashes):
+            if digest is not None and digest not in found and digest not in pending:
+                pending[digest] = str(text)
+        if pending:
+            tokenized = dict(zip(pending, tokenize_many(list(pending.values()), workers)))
+            self.stats['tokenized'] += len(tokenized)
+            if self.db_path and self.persist:
+                self.store(tokenized)
+            elif self.db_path:
+                self._unstored.update(tokenized)
+            found.update(tokenized)
+        
+        self._remember(found)
+        return [found[digest] if digest is not None else "" for digest in hashes]
+    
+    def prune(self) -> int:
+        """
+        Delete stored tokens of documents no filing or press release holds
+        any more (deleted or refreshed since); returns the number removed
+        """
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
+        # Press releases keep their text, so their hashes are computed here
+        conn.create_function('text_hash', 1, lambda text: None if text is None else content_hash(str(text)),
+                             deterministic=True)
+        cursor = conn.execute('''
+            DELETE FROM document_tokens
+            WHERE content_hash NOT IN (SELECT content_hash FROM filings WHERE content_hash IS NOT NULL)
+              AND content_hash NOT IN (SELECT text_hash(content) FROM press_releases WHERE content IS NOT NULL)
+        ''')
+        conn.commit()
+        conn.close()
+        return cursor.rowcount
+    
+    def clear_memory(self):
+        """Drop the in-memory entries; stored tokens are kept"""
+        with self._lock:
+            self._memory.clear()
+    
+    def _remember(self, entries: Dict[str, Tokens]):
+        """Add entries to the memory LRU, evicting the least recently used"""
+        with self._lock:
+            for digest, tokens in entries.items():
+                self._memory[digest] = tokens
+                self._memory.move_to_end(digest)
+            while len(self._memory) > self.memory_docs:
+                self._memory.popitem(last=False)
+    
+    def _load(self, hashes: List[str]) -> Dict[str, Tokens]:
+        """Stored tokens among hashes"""
+        loaded = {}
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
+            try:
+                for start in range(0, len(hashes), LOOKUP_BATCH_HASHES):
+                    batch = hashes[start:start + LOOKUP_BATCH_HASHES]
+                    rows = conn.execute(
+                        f"SELECT content_hash, tokens FROM document_tokens WHERE content_hash IN ({', '.join('?' for _ in batch)})",
+                        batch
+                    )
+                    for digest, blob in rows:
+                        loaded[digest] = zlib.decompress(blob).decode('utf-8')
+            finally:
+                conn.close()
+        except sqlite3.OperationalError:
+            # Databases without the token table (not initialized) cache in memory only
+            return {}
+        return loaded
+    
+    def take_unstored(self) -> Dict[str, Tokens]:
+        """Tokens collected without persisting since the last call, for store() elsewhere"""
+        entries, self._unstored = self._unstored, {}
+        return entries
+    
+    def store(self, entries: Dict[str, Tokens]):
+        """Persist newly tokenized documents; another process may have stored them first"""
+        rows = [
+            (digest, zlib.compress(tokens.encode('utf-8'), TOKEN_COMPRESSION_LEVEL))
+            for digest, tokens in entries.items()
+        ]
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
+            try:
+                conn.executemany("INSERT OR IGNORE INTO document_tokens (content_hash, tokens) VALUES (?, ?)", rows)
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.OperationalError:
+            # Databases without the token table (not initialized) cache in memory only
+            pass
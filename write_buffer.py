@@ -0,0 +1,189 @@
+"""
+Write-behind buffer for the M&A Market Intelligence Tool
+Small interactive writes (manual entries, tags, watchlist items) from every
+session are queued to one writer thread that applies them in group commits,
+instead of each opening a connection and paying for its own fsync
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional, Sequence
+
+# Seconds the writer waits for more writes to join a commit after the first arrives
+GROUP_COMMIT_INTERVAL = 0.005
+
+# Writes applied per transaction at most
+MAX_BATCH_WRITES = 500
+
+# Seconds SQLite retries a locked database (e.g. during an import) before failing
+BUSY_TIMEOUT = 30.0
+
+# Seconds a caller waits for its write to be committed
+WRITE_TIMEOUT = 60.0
+
+# One buffer (and writer thread) per database, shared by all sessions
+_buffers: Dict[str, 'WriteBuffer'] = {}
+_buffers_lock = threading.Lock()
+
+
+def get_write_buffer(db_path: str = "market_intelligence.db") -> 'WriteBuffer':
+    """Return the process-wide write buffer for a database"""
+    with _buffers_lock:
+        write_buffer = _buffers.get(db_path)
+        if write_buffer is None:
+            write_buffer = WriteBuffer(db_path)
+            _buffers[db_path] = write_buffer
+        return write_buffer
+
+
+def sql_value(value):
+    """Bind value for one field: timestamps as text, as pandas.to_sql stores them"""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+class _PendingWrite:
+    """One queued statement and the future acknowledging its commit"""
+    
+    __slots__ = ('sql', 'params', 'many', 'future')
+    
+    def __init__(self, sql: str, params, many: bool):
+        self.sql = sql
+        self.params = params
+        self.many = many
+        self.future = Future()
+
+
+class WriteBuffer:
+    """
+    Queue of small writes applied by a single thread in group commits.
+    The writer takes every write arriving within commit_interval of the
+    first into one transaction; each write runs under its own savepoint,
+    so a failing statement is rolled back without affecting the rest of the
+    batch. A write's future resolves (to its row count) only once the
+    transaction holding it has committed.
+    """
+    
+    def __init__(self, db_path: str, commit_interval: float = GROUP_COMMIT_INTERVAL,
+                 max_batch: int = MAX_BATCH_WRITES):
+        self.db_path = db_path
+        self.commit_interval = commit_interval
+        self.max_batch = max_batch
+        self.stats = {'writes': 0, 'commits': 0, 'failed': 0}
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+    
+    def start(self):
+        """Start the writer thread unless it is already running"""
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="write-buffer", daemon=True)
+                self._worker.start()
+    
+    def submit(self, sql: str, params: Sequence = (), many: bool = False) -> Future:
+        """
+        Queue a statement (executemany over params with many) and return a
+        future resolving to its row count once committed
+        """
+        write = _PendingWrite(sql, params, many)
+        self.start()
+        self._queue.put(write)
+        return write.future
+    
+    def execute(self, sql: str, params: Sequence = (), many: bool = False,
+                timeout: Optional[float] = WRITE_TIMEOUT) -> int:
+        """Queue a statement and wait until it is committed; raises the statement's error"""
+        return self.submit(sql, params, many).result(timeout)
+    
+    def insert(self, table: str, record: Dict, timeout: Optional[float] = WRITE_TIMEOUT) -> int:
+        """Insert one record given as a column -> value mapping and wait for its commit"""
+        columns = list(record)
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+        return self.execute(sql, [sql_value(record[column]) for column in columns], timeout=timeout)
+    
+    def flush(self, timeout: Optional[float] = WRITE_TIMEOUT):
+        """Wait until everything queued so far is committed"""
+        self.submit("SELECT 1").result(timeout)
+    
+    def close(self, timeout: Optional[float] = WRITE_TIMEOUT):
+        """Commit what is queued and stop the writer thread"""
+        with self._worker_lock:
+            worker = self._worker
+            self._worker = None
+        if worker is not None and worker.is_alive():
+            self._queue.put(None)
+            worker.join(timeout)
+    
+    def _run(self):
+        """Writer loop: gather a batch, commit it, acknowledge it"""
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT)
+        # Transactions are opened and committed explicitly below
+        conn.isolation_level = None
+        try:
+            stopping = False
+            while not stopping:
+                first = self._queue.get()
+                if first is None:
+                    break
+                
+                batch = [first]
+                deadline = time.monotonic() + self.commit_interval
+                while len(batch) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    try:
+                        write = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if write is None:
+                        stopping = True
+                        break
+                    batch.append(write)
+                
+                self._commit(conn, batch)
+        finally:
+            conn.close()
+    
+    def _commit(self, conn: sqlite3.Connection, batch: Iterable[_PendingWrite]):
+        """Apply a batch in one transaction, then resolve each write's future"""
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for write in batch:
+                conn.execute("SAVEPOINT buffered_write")
+                try:
+                    if write.many:
+                        cursor = conn.executemany(write.sql, write.params)
+                    else:
+                        cursor = conn.execute(write.sql, write.params)
+                    conn.execute("RELEASE buffered_write")
+                    outcomes.append((write, cursor.rowcount, None))
+                except sqlite3.Error as e:
+                    conn.execute("ROLLBACK TO buffered_write")
+                    conn.execute("RELEASE buffered_write")
+                    outcomes.append((write, None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            # Nothing in the batch was committed
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for write in batch:
+                write.future.set_exception(e)
+            self.stats['failed'] += len(batch)
+            return
+        
+        self.stats['commits'] += 1
+        for write, rowcount, error in outcomes:
+            if error is None:
+                self.stats['writes'] += 1
+                write.future.set_result(rowcount)
+            else:
+                self.stats['failed'] += 1
+                write.future.set_exception(error)